@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict
 
 from aidr_aiguard_lab.defaults import defaults
@@ -15,7 +17,7 @@ class AppArgs(BaseModel):
     detectors: str = defaults.default_detectors_str
     use_labels_as_detectors: bool = False
     report_any_topic: bool = False
-    topic_threshold: float = defaults.topic_threshold
+    topic_threshold: float | None = None
     fail_fast: bool = False
     malicious_prompt_labels: str = defaults.malicious_prompt_labels_str
     benign_labels: str = defaults.benign_labels_str
@@ -29,6 +31,18 @@ class AppArgs(BaseModel):
     print_label_stats: bool = False
     print_fps: bool = False
     print_fns: bool = False
+    error_payloads: bool = False
+    results_out: str | None = None
+    responses_out: str | None = None
+    manifest: str | None = None
+    full: bool = False
+    watch: bool = False
+    compare: tuple[str, str] | None = None
+    matrix: str | None = None
+    near_dup_policy: Literal["keep-one", "weight", "report"] | None = None
+    near_dup_threshold: float = defaults.near_dup_threshold
+    output_jsonl: str | None = None
+    preserve_order: bool = False
     verbose: bool = False
     debug: bool = False
     assume_tps: bool = False
@@ -36,3 +50,14 @@ class AppArgs(BaseModel):
     rps: int = defaults.default_rps
     max_poll_attempts: int = defaults.max_poll_attempts
     fp_check_only: bool = False
+    loop: bool = False
+    duration: float | None = None
+    fast_parse: bool = False
+    dataset_cache: str | None = None
+    parse_workers: int = 1
+    profile: Literal["cpu", "wall"] | None = None
+    metrics_port: int | None = None
+    trace_out: str | None = None
+    metrics_json: str | None = None
+    bootstrap: int = 0
+    confidence: float = defaults.confidence_level
@@ -1,21 +1,22 @@
 from __future__ import annotations
 
+import contextlib
 import sys
-from typing import Annotated
+from typing import Annotated, Literal
 
 import cyclopts
 from cyclopts import App, Parameter
 
-from aidr_aiguard_lab._types import AppArgs
-from aidr_aiguard_lab.config.settings import Settings
 from aidr_aiguard_lab.defaults import defaults
-from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+from aidr_aiguard_lab.utils.utils import parse_duration
 
 app = App(help="Process prompts with AI Guard API.\nSpecify a --prompt or --input-file", help_format="markdown")
 
 
 INPUT_FILE_HELP = (
     "File containing test cases to process. Supports multiple formats:\n"
+    "-      Read test cases from stdin as they arrive: JSONL records if\n"
+    "        the first line starts with '{', otherwise one prompt per line.\n"
     ".txt    One prompt per line.\n"
     ".jsonl  JSON Lines format, each line is test case with labels and\n"
     "        messages array:\n"
@@ -66,8 +67,8 @@ REPORT_ANY_TOPIC_HELP = (
 )
 
 TOPIC_THRESHOLD_HELP = (
-    "Threshold for topic detection confidence. Only applies when using\n"
-    f"AI Guard with topics. Default: {defaults.topic_threshold}."
+    "Threshold for topic detection confidence: topics reported with a lower\n"
+    "confidence are not counted as detected. Default: none (every reported topic counts)."
 )
 
 FAIL_FAST_HELP = "Enable fail-fast mode: detectors will block and exit on first\ndetection. Default: False.\n"
@@ -132,15 +133,157 @@ AIDR_CONFIG_HELP = (
     "  --aidr-config /path/to/config.json"
 )
 
+COMPARE_HELP = (
+    "A/B evaluation: send every test case to two AIDR configs (each a JSON string or file, as for\n"
+    "--aidr-config) back to back, under one --rps budget. Prints each side's summary, then paired\n"
+    "metric deltas with McNemar p-values, latency differences and the disagreeing test cases.\n"
+    "Per-run output files are written once per side, e.g. results-a.jsonl.gz and results-b.jsonl.gz."
+)
+
+MATRIX_HELP = (
+    "Evaluate the dataset on every AIDR config variant in this JSON file, in one pass:\n"
+    '  {"variants": [{"name": "input", "aidr_config": {"event_type": "input"}, "rps": 10},\n'
+    '                {"name": "output", "aidr_config": {"event_type": "output"}}]}\n'
+    "Each variant gets its own tracker, summary and output files (results-<name>.jsonl, ...) and its\n"
+    "own rate cap (default: --rps); the report ends with one row per variant."
+)
+
+NEAR_DUP_POLICY_HELP = (
+    "Cluster near-duplicate test cases (MinHash/LSH over word shingles of the system and user messages;\n"
+    "only cases with the same labels and recipe are clustered) before sending:\n"
+    "  keep-one: send only the first test case of each cluster\n"
+    "  weight: send every test case, and also report metrics where each cluster counts as one test case\n"
+    "  report: send every test case and print the largest clusters"
+)
+NEAR_DUP_THRESHOLD_HELP = (
+    "Estimated Jaccard similarity of two test cases' shingles from which they are near-duplicates\n"
+    f"(default: {defaults.near_dup_threshold})"
+)
+
 RPS_HELP = f"Requests per second (1-100 allowed. Default: {defaults.default_rps})"
 MAX_POLL_ATTEMPTS_HELP = f"Maximum poll (retry) attempts for 202 responses (default: {defaults.max_poll_attempts})"
 
+RESULTS_OUT_HELP = (
+    "Stream one row per scored test case (index, content hash, expected/detected labels,\n"
+    "topic confidences, analyzers, blocked, latency, request id, FPs/FNs) to this file.\n"
+    "Format from the extension: .jsonl, .jsonl.gz, or .parquet/.arrow (requires pyarrow)."
+)
+
+RESPONSES_OUT_HELP = (
+    "Store the raw AI Guard response of every scored test case, keyed by test index\n"
+    "and content hash, to this .jsonl or .jsonl.gz file. Re-score it offline with\n"
+    "different detector and label settings using the rescore command."
+)
+
+FLIPS_OUT_HELP = (
+    "Write every test case that flipped (new or fixed FPs/FNs) as a JSON line,\n"
+    "with its content hash and index in both runs."
+)
+
+RESPONSES_HELP = "Responses file written by a run with --responses-out (.jsonl or .jsonl.gz)."
+
+OUTPUT_JSONL_HELP = (
+    "Write one JSON verdict per test case as soon as it is scored (same fields as\n"
+    "--results-out, or index/error for cases that failed). Use '-' for stdout; all\n"
+    "other output then goes to stderr."
+)
+
+METRICS_PORT_HELP = (
+    "Serve live run metrics for Prometheus at http://127.0.0.1:<port>/metrics (OpenMetrics or\n"
+    "Prometheus text format): requests by status, in-flight requests, retries, rate-limit wait,\n"
+    "latency histogram, blocked count and TP/FP/FN/TN per detector."
+)
+
+TRACE_OUT_HELP = (
+    "Record a span tree per test case (queue wait, rate-limit wait, request, parse, score, write),\n"
+    "tagged with test index, payload size, recipe and AI Guard request_id. Paths ending in\n"
+    ".otlp.json write OTLP JSON (one trace per line, e.g. for Jaeger); anything else writes\n"
+    "Chrome trace-event JSON for Perfetto or chrome://tracing."
+)
+
+METRICS_JSON_HELP = (
+    "Write the summary metrics (overall, per detector, macro average) as JSON to this file,\n"
+    "with Wilson score confidence intervals, and bootstrap intervals when --bootstrap is set."
+)
+
+BOOTSTRAP_HELP = (
+    "Percentile-bootstrap confidence intervals from this many resamples of the test cases, shown\n"
+    "in the summary with Wilson score intervals (default: 0, off). NumPy, if installed, makes\n"
+    "10k replicates over 1M cases take seconds."
+)
+
+CONFIDENCE_HELP = (
+    f"Confidence level for --bootstrap and --metrics-json intervals (default: {defaults.confidence_level})"
+)
+
+PRESERVE_ORDER_HELP = "Emit --output-jsonl records in input order instead of completion order."
+
+ERROR_PAYLOADS_HELP = (
+    "Include the full request body in the error journal (<summary-report-file>.errors.jsonl).\n"
+    "By default only a SHA-256 hash of the payload is recorded."
+)
+
+LOOP_HELP = (
+    "Soak-test mode: keep cycling through the test cases at --rps until\n"
+    "--duration elapses (or until interrupted with Ctrl-C if no duration).\n"
+    f"Emits rolling {int(defaults.soak_window_seconds)}s windows of throughput, latency percentiles,\n"
+    "error classes, detection rates and verdict flips (same prompt, different\n"
+    "detections). Windows are also appended as JSON lines to\n"
+    "<summary-report-file>.soak.jsonl when --summary-report-file is set."
+)
+
+DURATION_HELP = (
+    "Maximum run time, e.g. 90s, 15m, 4h, 1h30m (bare numbers are seconds).\n"
+    "Combine with --loop for a fixed-length soak test. Default: None."
+)
+
+FAST_PARSE_HELP = (
+    "Decode responses as raw JSON and read only the fields the lab uses, instead of validating\n"
+    "the full response model. Falls back to the full model for errors, unexpected shapes and --debug."
+)
+
+PROFILE_HELP = (
+    "Profile the run. 'wall': print a per-stage time breakdown (load, rate-limit wait, request,\n"
+    "parse, score, write) after the summary. 'cpu': sample every thread's stack and write folded\n"
+    "stacks for a flame graph to <summary-report-file>.profile.folded\n"
+    f"(or {defaults.profile_file} without --summary-report-file)."
+)
+
+MANIFEST_HELP = (
+    "Incremental evaluation: keep the raw responses of the last run in this .jsonl or .jsonl.gz\n"
+    "file, keyed by test case content hash and request config (endpoint and AIDR metadata).\n"
+    "Test cases with a stored response are scored from it; only new or changed ones are sent.\n"
+    "The file is rewritten at the end of the run."
+)
+
+FULL_HELP = "With --manifest: send every test case again and rewrite the manifest (periodic verification)."
+
+WATCH_HELP = (
+    "Keep running and re-evaluate --input-file every time it is saved. Only added or edited test cases\n"
+    "are sent; unchanged ones are scored from the previous pass's responses. Ctrl-C to stop."
+)
+
+DATASET_CACHE_HELP = (
+    "Keep a binary snapshot of each loaded .json/.jsonl dataset, with its test cases fully normalized,\n"
+    "in this directory. Later runs on the same file contents with the same label options (detectors,\n"
+    "label synonyms, recipe, system prompt, --assume-*) memory-map it instead of parsing the file."
+)
+
+PARSE_WORKERS_HELP = (
+    "Processes that parse and normalize a .json/.jsonl --input-file in parallel. 0: one per CPU for\n"
+    f"files of {defaults.parallel_parse_min_bytes // (1024 * 1024)} MB or more. Default: 1 (parse in this process)."
+)
+
+SOCKET_HELP = "Unix socket of the warm server.\nDefault: <$XDG_RUNTIME_DIR or temp dir>/<uid>-aidr_aiguard_lab.sock"
+
 
 @app.default
 def main(
     # Input arguments
     prompt: Annotated[str | None, Parameter(group="Input arguments", help="A single prompt string to check")] = None,
-    input_file: Annotated[str | None, Parameter(group="Input arguments", help=INPUT_FILE_HELP)] = None,
+    input_file: Annotated[
+        str | None, Parameter(group="Input arguments", help=INPUT_FILE_HELP, allow_leading_hyphen=True)
+    ] = None,
     # Detection and evaluation configuration
     system_prompt: Annotated[
         str | None,
@@ -162,8 +305,8 @@ def main(
         bool, Parameter(group="Detection and evaluation configuration", help=REPORT_ANY_TOPIC_HELP)
     ] = False,
     topic_threshold: Annotated[
-        float, Parameter(group="Detection and evaluation configuration", help=TOPIC_THRESHOLD_HELP)
-    ] = defaults.topic_threshold,
+        float | None, Parameter(group="Detection and evaluation configuration", help=TOPIC_THRESHOLD_HELP)
+    ] = None,
     fail_fast: Annotated[bool, Parameter(group="Detection and evaluation configuration", help=FAIL_FAST_HELP)] = False,
     malicious_prompt_labels: Annotated[
         str, Parameter(group="Detection and evaluation configuration", help=MALICIOUS_PROMPT_LABELS_HELP)
@@ -180,6 +323,22 @@ def main(
     aidr_config: Annotated[
         str | None, Parameter(group="Detection and evaluation configuration", help=AIDR_CONFIG_HELP)
     ] = None,
+    compare: Annotated[
+        tuple[str, str] | None, Parameter(group="Detection and evaluation configuration", help=COMPARE_HELP)
+    ] = None,
+    matrix: Annotated[str | None, Parameter(group="Detection and evaluation configuration", help=MATRIX_HELP)] = None,
+    near_dup_policy: Annotated[
+        Literal["keep-one", "weight", "report"] | None,
+        Parameter(group="Detection and evaluation configuration", help=NEAR_DUP_POLICY_HELP),
+    ] = None,
+    near_dup_threshold: Annotated[
+        float,
+        Parameter(
+            group="Detection and evaluation configuration",
+            help=NEAR_DUP_THRESHOLD_HELP,
+            validator=cyclopts.validators.Number(gt=0, lte=1),
+        ),
+    ] = defaults.near_dup_threshold,
     # Output and reporting
     report_title: Annotated[
         str | None,
@@ -199,7 +358,7 @@ def main(
     ] = None,
     print_label_stats: Annotated[
         bool,
-        Parameter(group="Output and reporting", help="Display per-label stats (FP/FN counts)"),
+        Parameter(group="Output and reporting", help="Display per-label stats (FP/FN counts, precision/recall/F1)"),
     ] = False,
     print_fps: Annotated[
         bool,
@@ -209,6 +368,52 @@ def main(
         bool,
         Parameter(group="Output and reporting", help="Print false negatives after summary"),
     ] = False,
+    results_out: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=RESULTS_OUT_HELP),
+    ] = None,
+    flips_out: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=FLIPS_OUT_HELP + "\nWith --compare."),
+    ] = None,
+    responses_out: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=RESPONSES_OUT_HELP),
+    ] = None,
+    output_jsonl: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=OUTPUT_JSONL_HELP, allow_leading_hyphen=True),
+    ] = None,
+    preserve_order: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help=PRESERVE_ORDER_HELP),
+    ] = False,
+    error_payloads: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help=ERROR_PAYLOADS_HELP),
+    ] = False,
+    metrics_port: Annotated[
+        int | None,
+        Parameter(
+            group="Output and reporting", help=METRICS_PORT_HELP, validator=cyclopts.validators.Number(gte=0, lte=65535)
+        ),
+    ] = None,
+    trace_out: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=TRACE_OUT_HELP),
+    ] = None,
+    metrics_json: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=METRICS_JSON_HELP),
+    ] = None,
+    bootstrap: Annotated[
+        int,
+        Parameter(group="Output and reporting", help=BOOTSTRAP_HELP, validator=cyclopts.validators.Number(gte=0)),
+    ] = 0,
+    confidence: Annotated[
+        float,
+        Parameter(group="Output and reporting", help=CONFIDENCE_HELP, validator=cyclopts.validators.Number(gt=0, lt=1)),
+    ] = defaults.confidence_level,
     verbose: Annotated[
         bool,
         Parameter(group="Output and reporting", help="Enable verbose output (FPs, FNs as they occur, full errors)."),
@@ -239,6 +444,17 @@ def main(
     fp_check_only: Annotated[
         bool, Parameter(group="Performance", help="When passing JSON file, only check for false negatives")
     ] = False,
+    loop: Annotated[bool, Parameter(group="Performance", help=LOOP_HELP)] = False,
+    duration: Annotated[str | None, Parameter(group="Performance", help=DURATION_HELP)] = None,
+    fast_parse: Annotated[bool, Parameter(group="Performance", help=FAST_PARSE_HELP)] = False,
+    profile: Annotated[Literal["cpu", "wall"] | None, Parameter(group="Performance", help=PROFILE_HELP)] = None,
+    manifest: Annotated[str | None, Parameter(group="Performance", help=MANIFEST_HELP)] = None,
+    full: Annotated[bool, Parameter(group="Performance", help=FULL_HELP)] = False,
+    watch: Annotated[bool, Parameter(group="Performance", help=WATCH_HELP)] = False,
+    dataset_cache: Annotated[str | None, Parameter(group="Performance", help=DATASET_CACHE_HELP)] = None,
+    parse_workers: Annotated[
+        int, Parameter(group="Performance", help=PARSE_WORKERS_HELP, validator=cyclopts.validators.Number(gte=0))
+    ] = 1,
 ) -> None:
     # Manual mutually exclusive check for prompt/input_file
     if (prompt is None) == (input_file is None):
@@ -250,6 +466,83 @@ def main(
         print("Error: Argument --assume-tps is not allowed with --assume-tns")
         sys.exit(1)
 
+    if input_file == "-" and loop:
+        print("Error: --loop cannot be used with --input-file - (stdin can only be read once)")
+        sys.exit(1)
+
+    if preserve_order and not output_jsonl:
+        print("Error: --preserve-order requires --output-jsonl")
+        sys.exit(1)
+
+    if full and not manifest:
+        print("Error: --full requires --manifest")
+        sys.exit(1)
+
+    if manifest and (loop or input_file == "-"):
+        print("Error: --manifest cannot be used with --loop or --input-file -")
+        sys.exit(1)
+
+    if compare or matrix:
+        mode = "--compare" if compare else "--matrix"
+        incompatible = {
+            "--matrix": compare and matrix,
+            "--aidr-config": aidr_config,
+            "--input-file -": input_file == "-",
+            "--output-jsonl": output_jsonl,
+            "--manifest": manifest,
+            "--watch": watch,
+            "--loop": loop,
+            "--duration": duration,
+            "--metrics-port": metrics_port is not None,
+            "--trace-out": trace_out,
+            "--profile": profile,
+        }
+        used = [option for option, value in incompatible.items() if value]
+        if used:
+            print(f"Error: {mode} cannot be used with {', '.join(used)}")
+            sys.exit(1)
+    if flips_out and not compare:
+        print("Error: --flips-out requires --compare")
+        sys.exit(1)
+
+    if near_dup_policy and (input_file is None or input_file == "-"):
+        print("Error: --near-dup-policy requires an --input-file (not -)")
+        sys.exit(1)
+
+    if watch and (input_file is None or input_file == "-" or loop or duration):
+        print("Error: --watch requires an --input-file (not -) and cannot be used with --loop or --duration")
+        sys.exit(1)
+
+    # Heavy imports (pydantic, the AIDR SDK) are deferred until arguments are valid,
+    # so --help and usage errors return quickly.
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.config.settings import Settings
+    from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+    from aidr_aiguard_lab.output.results_store import check_responses_path, check_results_path
+
+    if results_out is not None:
+        try:
+            check_results_path(results_out)
+        except ValueError as e:
+            print(f"Error: --results-out: {e}")
+            sys.exit(1)
+
+    for option, path in (("--responses-out", responses_out), ("--manifest", manifest)):
+        if path is not None:
+            try:
+                check_responses_path(path)
+            except ValueError as e:
+                print(f"Error: {option}: {e}")
+                sys.exit(1)
+
+    duration_seconds: float | None = None
+    if duration is not None:
+        try:
+            duration_seconds = parse_duration(duration)
+        except ValueError as e:
+            print(f"Error: --duration: {e}")
+            sys.exit(1)
+
     args = AppArgs(
         prompt=prompt,
         input_file=input_file,
@@ -272,6 +565,16 @@ def main(
         print_label_stats=print_label_stats,
         print_fps=print_fps,
         print_fns=print_fns,
+        results_out=results_out,
+        responses_out=responses_out,
+        output_jsonl=output_jsonl,
+        preserve_order=preserve_order,
+        error_payloads=error_payloads,
+        metrics_port=metrics_port,
+        trace_out=trace_out,
+        metrics_json=metrics_json,
+        bootstrap=bootstrap,
+        confidence=confidence,
         verbose=verbose,
         debug=debug,
         assume_tps=assume_tps,
@@ -279,16 +582,295 @@ def main(
         rps=rps,
         max_poll_attempts=max_poll_attempts,
         fp_check_only=fp_check_only,
+        loop=loop,
+        duration=duration_seconds,
+        fast_parse=fast_parse,
+        dataset_cache=dataset_cache,
+        parse_workers=parse_workers,
+        profile=profile,
+        manifest=manifest,
+        full=full,
+        watch=watch,
+        compare=compare,
+        matrix=matrix,
+        near_dup_policy=near_dup_policy,
+        near_dup_threshold=near_dup_threshold,
     )
 
     if args.prompt:
         # If a single prompt, set rps to 1
         args.rps = 1
 
+    # With --output-jsonl -, stdout carries only verdict records; everything else is sent to stderr.
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr) if output_jsonl == "-" else contextlib.nullcontext():
+        if compare:
+            from aidr_aiguard_lab.manager.compare import PairedComparison
+
+            comparison = PairedComparison(args, compare, stdout=stdout)
+            if comparison.evaluate(flips_out=flips_out):
+                comparison.print_summaries()
+                if flips_out:
+                    print(f"\nDisagreeing test cases written to {flips_out}")
+            return
+        if matrix:
+            from aidr_aiguard_lab.manager.matrix import MatrixRun, load_matrix
+
+            try:
+                variants = load_matrix(matrix, args.rps)
+            except ValueError as e:
+                print(f"Error: --matrix: {e}")
+                sys.exit(1)
+            matrix_run = MatrixRun(args, variants, stdout=stdout)
+            if matrix_run.evaluate():
+                matrix_run.print_summaries()
+            return
+        if watch:
+            from aidr_aiguard_lab.manager.watch import watch_input_file
+
+            watch_input_file(args, stdout=stdout)
+            return
+        aig = AIGuardManager(args, stdout=stdout)
+        settings = Settings(system_prompt, recipe)
+        aig_test = AIGuardTests(settings, aig, args)
+        aig_test.process_all_prompts(args, aig)
+
+
+@app.command
+def serve(socket: Annotated[str | None, Parameter(help=SOCKET_HELP)] = None) -> None:
+    """
+    Keep a warm process (imports, .env, pooled API client) serving `check` requests on a Unix socket.
+    """
+    from aidr_aiguard_lab._types import AppArgs  # noqa: F401 - preloaded for the first check
+    from aidr_aiguard_lab.api.pangea_api import warm_up
+    from aidr_aiguard_lab.daemon.client import default_socket_path
+    from aidr_aiguard_lab.daemon.server import CheckServer
+    from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager  # noqa: F401 - preloaded for the first check
+
+    try:
+        warm_up()
+    except AssertionError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    def run(tokens: list[str]) -> None:
+        if tokens and tokens[0] in ("serve", "check"):
+            print(f"Error: '{tokens[0]}' cannot be run through the server")
+            sys.exit(1)
+        app(tokens, result_action="return_value")
+
+    socket_path = socket or default_socket_path()
+    try:
+        server = CheckServer(socket_path, run)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Serving checks on {socket_path} (Ctrl-C to stop)")
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server")
+
+
+@app.command
+def check(
+    *tokens: Annotated[
+        str, Parameter(allow_leading_hyphen=True, help="Arguments for the run, e.g. --prompt '...' or --input-file f")
+    ],
+    socket: Annotated[str | None, Parameter(help=SOCKET_HELP)] = None,
+) -> None:
+    """
+    Run a check on a warm `serve` process and print its output. Takes the same arguments as a regular run.
+    """
+    from aidr_aiguard_lab.daemon.client import default_socket_path, send_check
+
+    if "--input-file=-" in tokens or any(a == "--input-file" and b == "-" for a, b in zip(tokens, tokens[1:])):
+        print("Error: --input-file - (stdin) cannot be forwarded to the server; run it directly")
+        sys.exit(1)
+
+    try:
+        code = send_check(tokens, socket or default_socket_path())
+    except ConnectionError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    sys.exit(code)
+
+
+@app.command
+def rescore(
+    responses: Annotated[str, Parameter(help=RESPONSES_HELP)],
+    input_file: Annotated[str, Parameter(help="The .json or .jsonl dataset of the original run.")],
+    # Detection and evaluation configuration
+    system_prompt: Annotated[
+        str | None,
+        Parameter(
+            group="Detection and evaluation configuration",
+            help="The system prompt the original run used (default: None)",
+        ),
+    ] = None,
+    force_system_prompt: Annotated[
+        bool, Parameter(group="Detection and evaluation configuration", help=FORCE_SYSTEM_PROMPT_HELP)
+    ] = False,
+    detectors: Annotated[
+        str, Parameter(group="Detection and evaluation configuration", help=DETECTORS_HELP)
+    ] = defaults.default_detectors_str,
+    use_labels_as_detectors: Annotated[
+        bool, Parameter(group="Detection and evaluation configuration", help=USE_LABELS_AS_DETECTORS_HELP)
+    ] = False,
+    report_any_topic: Annotated[
+        bool, Parameter(group="Detection and evaluation configuration", help=REPORT_ANY_TOPIC_HELP)
+    ] = False,
+    topic_threshold: Annotated[
+        float | None, Parameter(group="Detection and evaluation configuration", help=TOPIC_THRESHOLD_HELP)
+    ] = None,
+    malicious_prompt_labels: Annotated[
+        str, Parameter(group="Detection and evaluation configuration", help=MALICIOUS_PROMPT_LABELS_HELP)
+    ] = defaults.malicious_prompt_labels_str,
+    benign_labels: Annotated[
+        str, Parameter(group="Detection and evaluation configuration", help=BENIGN_LABELS_HELP)
+    ] = defaults.benign_labels_str,
+    negative_labels: Annotated[
+        str, Parameter(group="Detection and evaluation configuration", help=NEGATIVE_LABELS_HELP)
+    ] = "not-topic:*",
+    recipe: Annotated[
+        str, Parameter(group="Detection and evaluation configuration", help=RECIPE_HELP)
+    ] = defaults.default_recipe,
+    # Output and reporting
+    report_title: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help="Optional title in report summary"),
+    ] = None,
+    summary_report_file: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help="Optional summary report file name"),
+    ] = None,
+    fps_out_csv: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help="Output CSV for false positives"),
+    ] = None,
+    fns_out_csv: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help="Output CSV for false negatives"),
+    ] = None,
+    print_label_stats: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help="Display per-label stats (FP/FN counts, precision/recall/F1)"),
+    ] = False,
+    print_fps: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help="Print false positives after summary"),
+    ] = False,
+    print_fns: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help="Print false negatives after summary"),
+    ] = False,
+    results_out: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=RESULTS_OUT_HELP),
+    ] = None,
+    metrics_json: Annotated[
+        str | None,
+        Parameter(group="Output and reporting", help=METRICS_JSON_HELP),
+    ] = None,
+    bootstrap: Annotated[
+        int,
+        Parameter(group="Output and reporting", help=BOOTSTRAP_HELP, validator=cyclopts.validators.Number(gte=0)),
+    ] = 0,
+    confidence: Annotated[
+        float,
+        Parameter(group="Output and reporting", help=CONFIDENCE_HELP, validator=cyclopts.validators.Number(gt=0, lt=1)),
+    ] = defaults.confidence_level,
+    verbose: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help="Enable verbose output (FPs, FNs as they occur, full errors)."),
+    ] = False,
+    debug: Annotated[
+        bool,
+        Parameter(group="Output and reporting", help="Enable debug output (default: False)"),
+    ] = False,
+) -> None:
+    """
+    Re-score the raw responses stored by a run with --responses-out against its dataset, with new
+    detector and label settings. No AI Guard calls are made.
+    """
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.config.settings import Settings
+    from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+    from aidr_aiguard_lab.output.results_store import check_results_path
+
+    if results_out is not None:
+        try:
+            check_results_path(results_out)
+        except ValueError as e:
+            print(f"Error: --results-out: {e}")
+            sys.exit(1)
+
+    args = AppArgs(
+        input_file=input_file,
+        system_prompt=system_prompt,
+        force_system_prompt=force_system_prompt,
+        detectors=detectors,
+        use_labels_as_detectors=use_labels_as_detectors,
+        report_any_topic=report_any_topic,
+        topic_threshold=topic_threshold,
+        malicious_prompt_labels=malicious_prompt_labels,
+        benign_labels=benign_labels,
+        negative_labels=negative_labels,
+        recipe=recipe,
+        report_title=report_title,
+        summary_report_file=summary_report_file,
+        fps_out_csv=fps_out_csv,
+        fns_out_csv=fns_out_csv,
+        print_label_stats=print_label_stats,
+        print_fps=print_fps,
+        print_fns=print_fns,
+        results_out=results_out,
+        metrics_json=metrics_json,
+        bootstrap=bootstrap,
+        confidence=confidence,
+        verbose=verbose,
+        debug=debug,
+    )
     aig = AIGuardManager(args)
-    settings = Settings(system_prompt, recipe)
-    aig_test = AIGuardTests(settings, aig, args)
-    aig_test.process_all_prompts(args, aig)
+    aig_test = AIGuardTests(Settings(system_prompt, recipe), aig, args)
+    aig_test.rescore(args, aig, responses)
+
+
+@app.command
+def diff(
+    baseline: Annotated[str, Parameter(help="Results file of the earlier run (--results-out).")],
+    candidate: Annotated[str, Parameter(help="Results file of the later run (--results-out).")],
+    flips_out: Annotated[str | None, Parameter(help=FLIPS_OUT_HELP)] = None,
+    examples: Annotated[
+        int,
+        Parameter(help="Flipped test cases to print per category.", validator=cyclopts.validators.Number(gte=0)),
+    ] = defaults.diff_examples,
+) -> None:
+    """
+    Compare two runs case by case, joined on the test case content hash (not the index, which changes
+    when a dataset is edited): new and fixed FPs/FNs, and metric deltas with McNemar p-values.
+    """
+    from aidr_aiguard_lab.manager.results_diff import RunDiff
+    from aidr_aiguard_lab.output.results_store import check_results_path
+
+    for path in (baseline, candidate):
+        try:
+            check_results_path(path)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    run_diff = RunDiff(baseline, candidate)
+    try:
+        run_diff.run(flips_out=flips_out, examples=examples)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    run_diff.print_report()
+    if flips_out:
+        print(f"\nFlipped test cases written to {flips_out}")
 
 
 if __name__ == "__main__":
@@ -1,23 +1,28 @@
 from __future__ import annotations
 
+import functools
 import getpass
+import hashlib
+import importlib.metadata
+import json
 import os
 import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal, TypedDict
 
+import httpx
 from crowdstrike_aidr import AIGuard, omit
-from dotenv import load_dotenv
+from crowdstrike_aidr.models.ai_guard import GuardChatCompletionsResponse
 
 from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.utils.profiling import stage
 
 if TYPE_CHECKING:
     from collections.abc import Mapping, Sequence
-
-    from crowdstrike_aidr.models.ai_guard import GuardChatCompletionsResponse
-
-
-load_dotenv(override=True)
+    from typing import TypeAlias
 
 
 class Message(TypedDict):
@@ -55,41 +60,271 @@ class GuardChatCompletionsParams(TypedDict, total=False):
     user_id: str | None
 
 
-# Default AIDR metadata
-DEFAULT_AIDR_METADATA: GuardChatCompletionsParams = {
-    "event_type": "input",
-    "app_id": "AIG-lab",
-    "llm_provider": "test",
-    "model": "GPT-6-super",
-    "model_version": "6s",
-    "source_ip": "74.244.51.54",
-    "extra_info": ExtraInfo(
-        actor_name=getpass.getuser(),  # Gets current username
-        app_name=Path(sys.argv[0]).stem if sys.argv else "aiguard_lab.py",
-    ),
-}
+@functools.cache
+def default_aidr_metadata() -> GuardChatCompletionsParams:
+    """Default AIDR metadata. Built on first use so importing this module doesn't look up the user."""
+    return {
+        "event_type": "input",
+        "app_id": "AIG-lab",
+        "llm_provider": "test",
+        "model": "GPT-6-super",
+        "model_version": "6s",
+        "source_ip": "74.244.51.54",
+        "extra_info": ExtraInfo(
+            actor_name=getpass.getuser(),  # Gets current username
+            app_name=Path(sys.argv[0]).stem if sys.argv else "aiguard_lab.py",
+        ),
+    }
 
 
-def guard_chat_completions(
-    guard_input: GuardInput, aidr_config: Mapping[str, Any] = {}
-) -> GuardChatCompletionsResponse:
+def __getattr__(name: str) -> Any:
+    # DEFAULT_AIDR_METADATA is kept as a (lazy) module attribute for existing importers
+    if name == "DEFAULT_AIDR_METADATA":
+        return default_aidr_metadata()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.cache
+def load_env() -> None:
+    """Load .env (overriding the environment) once, on first API use rather than at import."""
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+
+
+def _guard_chat_completions_params(guard_input: GuardInput, aidr_config: Mapping[str, Any]) -> dict[str, Any]:
+    metadata = default_aidr_metadata()
+    return {
+        "guard_input": guard_input,
+        "app_id": aidr_config.get("app_id", metadata["app_id"]),
+        "collector_instance_id": aidr_config.get("collector_instance_id", omit),
+        "event_type": aidr_config.get("event_type", metadata["event_type"]),
+        "extra_info": aidr_config.get("extra_info", metadata["extra_info"]),
+        "llm_provider": aidr_config.get("llm_provider", metadata["llm_provider"]),
+        "model": aidr_config.get("model", metadata["model"]),
+        "model_version": aidr_config.get("model_version", metadata["model_version"]),
+        "source_ip": aidr_config.get("source_ip", metadata["source_ip"]),
+        "source_location": aidr_config.get("source_location", omit),
+        "tenant_id": aidr_config.get("tenant_id", omit),
+        "user_id": aidr_config.get("user_id", omit),
+    }
+
+
+def request_config_hash(aidr_config: Mapping[str, Any] = {}) -> str:
+    """
+    SHA-256 of everything besides the test case itself that goes into a request: the endpoint, the token
+    (as its own SHA-256, never the token itself; another token can mean another tenant and policy) and the
+    request parameters other than guard_input. The default extra_info (local user and program name)
+    is left out, since it doesn't change how a request is evaluated.
+    """
+    load_env()
+    params = _guard_chat_completions_params(GuardInput(messages=[], tools=[]), aidr_config)
+    config = {k: v for k, v in params.items() if k != "guard_input" and v is not omit}
+    if "extra_info" not in aidr_config:
+        del config["extra_info"]
+    config["base_url_template"] = os.getenv(defaults.base_url_template)
+    config["token_sha256"] = hashlib.sha256(os.getenv(defaults.ai_guard_token, "").encode("utf-8")).hexdigest()
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# API calls made vs HTTP requests sent by the pooled client; every request beyond the first of a
+# call is an SDK retry. Updated under a lock by workers, read without it by retry_count().
+_request_counts = {"calls": 0, "http_requests": 0}
+_request_counts_lock = threading.Lock()
+
+
+def _count_request(key: str) -> None:
+    with _request_counts_lock:
+        _request_counts[key] += 1
+
+
+def retry_count() -> int:
+    """Requests the SDK has retried so far (timeouts, connection errors, retryable statuses)."""
+    return max(_request_counts["http_requests"] - _request_counts["calls"], 0)
+
+
+@functools.cache
+def _pooled_client(base_url_template: str, token: str) -> AIGuard:
+    # One client per endpoint/token, shared by all worker threads (httpx.Client is thread-safe),
+    # so connections and TLS sessions are reused instead of being set up for every call.
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(timeout=60, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=defaults.max_rps,
+            max_keepalive_connections=defaults.max_rps,
+            keepalive_expiry=defaults.keepalive_expiry,
+        ),
+        follow_redirects=True,
+        event_hooks={"request": [lambda _: _count_request("http_requests")]},
+    )
+    return AIGuard(base_url_template=base_url_template, token=token, http_client=http_client)
+
+
+def _ai_guard_client() -> AIGuard:
+    load_env()
     ai_guard_token = os.getenv(defaults.ai_guard_token)
     assert ai_guard_token, f"{defaults.ai_guard_token} environment variable not set"
     base_url_template = os.getenv(defaults.base_url_template)
     assert base_url_template, f"{defaults.base_url_template} environment variable not set"
 
-    ai_guard = AIGuard(base_url_template=base_url_template, token=ai_guard_token)
-    return ai_guard.guard_chat_completions(
-        guard_input=guard_input,
-        app_id=aidr_config.get("app_id", DEFAULT_AIDR_METADATA["app_id"]),
-        collector_instance_id=aidr_config.get("collector_instance_id", omit),
-        event_type=aidr_config.get("event_type", DEFAULT_AIDR_METADATA["event_type"]),
-        extra_info=aidr_config.get("extra_info", DEFAULT_AIDR_METADATA["extra_info"]),
-        llm_provider=aidr_config.get("llm_provider", DEFAULT_AIDR_METADATA["llm_provider"]),
-        model=aidr_config.get("model", DEFAULT_AIDR_METADATA["model"]),
-        model_version=aidr_config.get("model_version", DEFAULT_AIDR_METADATA["model_version"]),
-        source_ip=aidr_config.get("source_ip", DEFAULT_AIDR_METADATA["source_ip"]),
-        source_location=aidr_config.get("source_location", omit),
-        tenant_id=aidr_config.get("tenant_id", omit),
-        user_id=aidr_config.get("user_id", omit),
+    return _pooled_client(base_url_template, ai_guard_token)
+
+
+def warm_up() -> None:
+    """Load .env, build the default metadata and the pooled client ahead of the first request."""
+    default_aidr_metadata()
+    _ai_guard_client()
+
+
+def guard_chat_completions(
+    guard_input: GuardInput, aidr_config: Mapping[str, Any] = {}
+) -> GuardChatCompletionsResponse:
+    ai_guard = _ai_guard_client()
+    _count_request("calls")
+    return ai_guard.guard_chat_completions(**_guard_chat_completions_params(guard_input, aidr_config))
+
+
+@dataclass(slots=True)
+class FastGuardResult:
+    """The parts of GuardChatCompletionsResult the lab reads; detectors stay raw JSON dicts."""
+
+    blocked: bool | None
+    guard_output: dict[str, Any] | None
+    detectors: dict[str, Any] | None
+
+
+@dataclass(slots=True)
+class FastGuardResponse:
+    """
+    Lightweight stand-in for GuardChatCompletionsResponse, built straight from the decoded JSON
+    without pydantic validation. Only successful responses that match the expected shape are
+    represented this way; anything else goes through the full model (see parse_guard_response).
+    """
+
+    request_id: str
+    request_time: datetime
+    response_time: datetime
+    status: str
+    summary: str | None
+    result: FastGuardResult | None
+
+
+if TYPE_CHECKING:
+    GuardResponse: TypeAlias = GuardChatCompletionsResponse | FastGuardResponse
+
+
+def _parse_time(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _fast_view(raw: Mapping[str, Any]) -> FastGuardResponse | None:
+    """Return a FastGuardResponse, or None if raw doesn't look like a successful response."""
+    status = raw.get("status")
+    request_id = raw.get("request_id")
+    result = raw.get("result")
+    if status != "Success" or not isinstance(request_id, str) or not isinstance(result, dict):
+        return None
+    request_time = _parse_time(raw.get("request_time"))
+    response_time = _parse_time(raw.get("response_time"))
+    if request_time is None or response_time is None:
+        return None
+
+    blocked = result.get("blocked")
+    guard_output = result.get("guard_output")
+    detectors = result.get("detectors")
+    if blocked is not None and not isinstance(blocked, bool):
+        return None
+    if guard_output is not None and not isinstance(guard_output, dict):
+        return None
+    if detectors is not None:
+        if not isinstance(detectors, dict):
+            return None
+        for detector in detectors.values():
+            if detector is None:
+                continue
+            if not isinstance(detector, dict):
+                return None
+            detected = detector.get("detected")
+            data = detector.get("data")
+            if (detected is not None and not isinstance(detected, bool)) or (
+                data is not None and not isinstance(data, dict)
+            ):
+                return None
+
+    summary = raw.get("summary")
+    return FastGuardResponse(
+        request_id=request_id,
+        request_time=request_time,
+        response_time=response_time,
+        status=status,
+        summary=summary if isinstance(summary, str) else None,
+        result=FastGuardResult(blocked=blocked, guard_output=guard_output, detectors=detectors),
     )
+
+
+def parse_guard_response(raw: Mapping[str, Any]) -> GuardResponse:
+    """Fast view of a decoded response, falling back to full model validation on any mismatch."""
+    return _fast_view(raw) or GuardChatCompletionsResponse.model_validate(raw)
+
+
+def response_json(response: GuardResponse) -> dict[str, Any]:
+    """The response as API-shaped JSON, which parse_guard_response reads back (for --responses-out)."""
+    if isinstance(response, FastGuardResponse):
+        result = response.result
+        return {
+            "request_id": response.request_id,
+            "request_time": response.request_time.isoformat(),
+            "response_time": response.response_time.isoformat(),
+            "status": response.status,
+            "summary": response.summary,
+            "result": None
+            if result is None
+            else {"blocked": result.blocked, "guard_output": result.guard_output, "detectors": result.detectors},
+        }
+    return response.model_dump(mode="json", exclude_none=True)
+
+
+# The SDK version _post_json() was checked against. AIGuard only offers guard_chat_completions(), which
+# always validates the whole response into pydantic models, so the fast path goes through the client's
+# private _post() (still with its auth, retries and connection pool) to get the decoded JSON instead.
+# Any other SDK version uses the public method.
+_RAW_POST_SDK_VERSION = "0.6.0"
+
+
+@functools.cache
+def _raw_post_supported() -> bool:
+    try:
+        version = importlib.metadata.version("crowdstrike-aidr")
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    return version == _RAW_POST_SDK_VERSION and callable(getattr(AIGuard, "_post", None))
+
+
+def _post_json(ai_guard: AIGuard, path: str, body: Mapping[str, Any]) -> dict[str, Any]:
+    """POST body to the AIGuard API and return the decoded JSON response, without model validation."""
+    return ai_guard._post(path, body=body, cast_to=dict)
+
+
+def guard_chat_completions_fast(guard_input: GuardInput, aidr_config: Mapping[str, Any] = {}) -> GuardResponse:
+    """
+    Same call as guard_chat_completions, but the response JSON is decoded into a plain dict and
+    only the fields the lab uses are checked, skipping pydantic validation of the whole response.
+    Error responses and anything with an unexpected shape are validated with the full model.
+    """
+    if not _raw_post_supported():
+        return guard_chat_completions(guard_input, aidr_config)
+    ai_guard = _ai_guard_client()
+    _count_request("calls")
+    params = _guard_chat_completions_params(guard_input, aidr_config)
+    body = {k: v for k, v in params.items() if v is not omit}
+    raw = _post_json(ai_guard, "/v1/guard_chat_completions", body)
+    with stage("parse"):
+        return parse_guard_response(raw)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import TYPE_CHECKING, Any
 
 from .log_fields import LogFields
@@ -111,3 +111,21 @@ class Settings:
             if hasattr(LogFields, "from_dict")
             else data.get("log_fields"),
         )
+
+    def to_record(self) -> dict[str, Any]:
+        """All fields as plain JSON-compatible values, including unset ones (from_record() reverses it)."""
+        return asdict(self)
+
+    @classmethod
+    def from_record(cls, data: Mapping[str, Any]) -> Settings:
+        """
+        Rebuild the Settings a to_record() dict came from. Unlike from_dict(), unset overrides and log_fields
+        stay None.
+        """
+        overrides, log_fields = data.get("overrides"), data.get("log_fields")
+        return cls(
+            system_prompt=data["system_prompt"],
+            recipe=data["recipe"],
+            overrides=Overrides.from_dict(overrides) if overrides is not None else None,
+            log_fields=LogFields.from_dict(log_fields) if log_fields is not None else None,
+        )
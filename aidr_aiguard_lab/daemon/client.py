@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.defaults import defaults
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def default_socket_path() -> str:
+    """Per-user socket path, in $XDG_RUNTIME_DIR when set, else the temp directory."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return str(Path(runtime_dir) / f"{os.getuid()}-{defaults.serve_socket_name}")
+
+
+def send_check(tokens: Sequence[str], socket_path: str) -> int:
+    """
+    Forward command line arguments to a running `serve` process and relay its output.
+    Returns the exit code of the remote run. Raises ConnectionError if no server is listening.
+
+    Protocol: one JSON request line {"argv", "cwd", "columns"}, answered by JSON lines
+    {"stream": "stdout"|"stderr", "data": text} and a final {"exit": code}.
+    """
+    request = {
+        "argv": list(tokens),
+        "cwd": str(Path.cwd()),  # relative --input-file paths resolve against the caller's directory
+        "columns": shutil.get_terminal_size().columns,
+    }
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        raise ConnectionError(
+            f"No server listening on {socket_path} (start one with `aidr_aiguard_lab serve`)"
+        ) from None
+
+    with sock, sock.makefile("rwb") as f:
+        f.write(json.dumps(request).encode("utf-8") + b"\n")
+        f.flush()
+        for line in f:
+            message = json.loads(line)
+            if "exit" in message:
+                return int(message["exit"])
+            stream = sys.stderr if message.get("stream") == "stderr" else sys.stdout
+            stream.write(message.get("data", ""))
+            stream.flush()
+    raise ConnectionError("Server closed the connection before the check finished")
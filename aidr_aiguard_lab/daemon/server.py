@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.utils.colors import DARK_GREEN, DARK_RED, RESET
+from aidr_aiguard_lab.utils.utils import reset_rate_limits
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class _SocketStream(io.TextIOBase):
+    """Text stream that forwards every write to the client as a {"stream": name, "data": text} line."""
+
+    def __init__(self, wfile: io.BufferedIOBase, name: str, lock: threading.Lock) -> None:
+        self._wfile = wfile
+        self._name = name
+        self._lock = lock
+        self.disconnected = False
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, s: str) -> int:
+        if s and not self.disconnected:
+            line = json.dumps({"stream": self._name, "data": s}).encode("utf-8") + b"\n"
+            with self._lock:
+                try:
+                    self._wfile.write(line)
+                    self._wfile.flush()
+                except OSError:
+                    # Client went away; keep the run going so its outputs and journals still complete.
+                    self.disconnected = True
+        return len(s)
+
+
+class _CheckHandler(socketserver.StreamRequestHandler):
+    server: CheckServer
+
+    def handle(self) -> None:
+        lock = threading.Lock()
+        stdout = _SocketStream(self.wfile, "stdout", lock)
+        stderr = _SocketStream(self.wfile, "stderr", lock)
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(token) for token in request["argv"]]
+        except (ValueError, KeyError, TypeError) as e:
+            stderr.write(f"Error: malformed request: {e}\n")
+            code = 2
+        else:
+            code = self.server.run_check(argv, request.get("cwd"), request.get("columns"), stdout, stderr)
+        with lock, contextlib.suppress(OSError):
+            self.wfile.write(json.dumps({"exit": code}).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class CheckServer(socketserver.UnixStreamServer):
+    """
+    Runs checks forwarded by `aidr_aiguard_lab check` inside one long-lived process, so imports,
+    .env loading and the pooled API client (with its open connections) are paid for once.
+
+    Requests are handled one at a time: each run redirects the process-wide stdout/stderr and
+    working directory to the requesting client.
+    """
+
+    def __init__(self, socket_path: str, run: Callable[[list[str]], Any]) -> None:
+        self.socket_path = socket_path
+        self.run = run
+        self.checks = 0
+        _remove_stale_socket(socket_path)
+        old_umask = os.umask(0o177)  # socket is only usable by the current user
+        try:
+            super().__init__(socket_path, _CheckHandler)
+        finally:
+            os.umask(old_umask)
+
+    def run_check(
+        self, argv: list[str], cwd: str | None, columns: int | None, stdout: _SocketStream, stderr: _SocketStream
+    ) -> int:
+        """Run argv as a regular command line with output sent to the client. Returns the exit code."""
+        start = time.perf_counter()
+        saved_cwd = Path.cwd()
+        saved_columns = os.environ.get("COLUMNS")
+        saved_argv = sys.argv
+        code = 0
+        # Each check behaves like its own process: the report's CMD line shows the forwarded
+        # arguments, and rate limiting doesn't carry over from the previous check.
+        sys.argv = [saved_argv[0], *argv]
+        reset_rate_limits()
+        try:
+            if cwd:
+                os.chdir(cwd)
+            if columns:
+                os.environ["COLUMNS"] = str(columns)  # help and error panels wrap to the client's terminal
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    self.run(argv)
+                except SystemExit as e:
+                    if e.code is None or isinstance(e.code, int):
+                        code = e.code or 0
+                    else:
+                        print(e.code, file=stderr)
+                        code = 1
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+            if saved_columns is None:
+                os.environ.pop("COLUMNS", None)
+            else:
+                os.environ["COLUMNS"] = saved_columns
+        self.checks += 1
+        color = DARK_GREEN if code == 0 else DARK_RED
+        print(f"{color}check {self.checks}: exit {code} in {time.perf_counter() - start:.3f}s {argv}{RESET}")
+        return code
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            Path(self.socket_path).unlink()
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove a socket file left behind by a server that is gone; refuse to replace a live one or any other file."""
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{socket_path} exists and is not a socket; remove it or pass a different --socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        Path(socket_path).unlink()
+    else:
+        raise ValueError(f"A server is already listening on {socket_path}")
+    finally:
+        probe.close()
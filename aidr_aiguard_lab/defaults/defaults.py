@@ -118,6 +118,30 @@ default_system_prompt = (
 default_rps = 15
 max_rps = 100
 max_poll_attempts = 12
+soak_window_seconds = 60.0
+progress_interval = 0.25  # seconds between progress redraws on a TTY
+progress_log_interval = 10.0  # seconds between plain progress lines when stdout is not a TTY
+max_saved_error_responses = 1000
+writer_flush_interval = 1.0  # seconds between flushes of streamed output files
+writer_fsync_interval = 5.0  # seconds between fsyncs of streamed output files
+keepalive_expiry = 120.0  # seconds an idle pooled API connection is kept open
+serve_socket_name = "aidr_aiguard_lab.sock"
+profile_sample_interval = 0.005  # seconds between stack samples with --profile cpu
+profile_file = "aidr_aiguard_lab.profile.folded"  # --profile cpu output without --summary-report-file
+confidence_level = 0.95  # --confidence
+bootstrap_seed = 0  # fixed, so --bootstrap intervals are reproducible
+diff_partitions = 64  # spill files per input when joining two result stores (diff command)
+diff_examples = 10  # flipped cases printed per category by the diff command
+diff_significance_level = 0.05  # McNemar p-values below this are marked significant
+watch_poll_interval = 0.25  # seconds between checks of the input file with --watch
+near_dup_threshold = 0.8  # estimated Jaccard similarity above which two test cases are near-duplicates
+near_dup_shingle = 3  # words per shingle
+near_dup_permutations = 128  # MinHash signature length
+near_dup_bands = 16  # LSH bands (of near_dup_permutations / near_dup_bands rows each)
+near_dup_examples = 5  # largest clusters printed with --near-dup-policy report
+parallel_parse_min_bytes = 8 * 1024 * 1024  # smallest .json/.jsonl input parsed by a process pool by default
+parallel_parse_chunk_bytes = 1024 * 1024  # .jsonl bytes per chunk handed to a parsing process
+parallel_parse_chunk_records = 2000  # .json records per chunk handed to a parsing process
 ai_guard_token = "CS_AIDR_TOKEN"
 base_url_template = "CS_AIDR_BASE_URL_TEMPLATE"
 ai_guard_skip_cache = False
@@ -2,21 +2,51 @@ from __future__ import annotations
 
 import csv
 import json
+import sys
 import threading
-from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 from threading import Semaphore
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TextIO
 
 from crowdstrike_aidr.models import PangeaResponse
-from pydantic import AwareDatetime, BaseModel
+from pydantic import BaseModel
 
 from aidr_aiguard_lab._exceptions import RequestError
-from aidr_aiguard_lab.api.pangea_api import GuardChatCompletionsParams, GuardInput, Message, guard_chat_completions
+from aidr_aiguard_lab.api.pangea_api import (
+    GuardChatCompletionsParams,
+    GuardInput,
+    Message,
+    guard_chat_completions,
+    guard_chat_completions_fast,
+    parse_guard_response,
+    request_config_hash,
+    response_json,
+)
 from aidr_aiguard_lab.config.settings import Settings
 from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.detector_extraction import (
+    DETECTOR_NAME_MAPPING,  # noqa: F401 - re-exported for existing importers
+    DetectorExtraction,
+    extract_detectors,
+)
 from aidr_aiguard_lab.manager.efficacy_tracker import EfficacyTracker
+from aidr_aiguard_lab.manager.soak_tracker import SoakTracker
+from aidr_aiguard_lab.output.manifest import RunManifest
+from aidr_aiguard_lab.output.results_store import (
+    error_record,
+    load_responses,
+    open_responses_writer,
+    open_results_writer,
+    response_record,
+    result_record,
+)
+from aidr_aiguard_lab.output.traces import CaseTracer
+from aidr_aiguard_lab.output.verdicts import VerdictWriter
 from aidr_aiguard_lab.testcase.testcase import TestCase
 from aidr_aiguard_lab.utils.colors import (
     DARK_GREEN,
@@ -24,6 +54,8 @@ from aidr_aiguard_lab.utils.colors import (
     DARK_YELLOW,
     RESET,
 )
+from aidr_aiguard_lab.utils.profiling import record_stage, set_case_tracer, set_stage_timers, stage, start_profile
+from aidr_aiguard_lab.utils.progress import ProgressRenderer
 from aidr_aiguard_lab.utils.utils import (
     apply_synonyms,
     formatted_json_str,
@@ -36,21 +68,13 @@ from aidr_aiguard_lab.utils.utils import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping, Sequence
+    from collections.abc import Callable, Iterator, Mapping, MutableSequence, Sequence
 
-    from crowdstrike_aidr.models.ai_guard import Detectors, GuardChatCompletionsResponse
+    from crowdstrike_aidr.models.ai_guard import Detectors
 
     from aidr_aiguard_lab._types import AppArgs
-
-DETECTOR_NAME_MAPPING = {
-    "malicious_prompt": "malicious-prompt",
-    "topic": "topic",
-    "confidential_and_pii_entity": "confidential-and-pii-entity",
-    "malicious_entity": "malicious-entity",
-    "mcp_validation": "mcp-validation",
-    "secret_and_key_entity": "secret-and-key-entity",
-}
-"""Detector name mapping"""
+    from aidr_aiguard_lab.api.pangea_api import FastGuardResponse, GuardResponse
+    from aidr_aiguard_lab.output.metrics import MetricsServer
 
 
 class AIGuardManager:
@@ -60,24 +84,65 @@ class AIGuardManager:
         self,
         args: AppArgs,
         skip_cache: bool = defaults.ai_guard_skip_cache,
+        stdout: TextIO | None = None,
+        previous_run: RunManifest | None = None,
     ):
         self._lock = threading.Lock()
+        self.in_flight = 0  # requests currently waiting on AI Guard
 
         # Parse AIDR config if provided
         if args.aidr_config:
             self.aidr_config = self._parse_aidr_config(args.aidr_config)
 
         self.efficacy = EfficacyTracker(args=args)
+        # Every scored case is streamed to --results-out for post-hoc analysis.
+        self.results_writer = open_results_writer(args.results_out) if args.results_out else None
+        # Raw responses are kept with --responses-out so the run can be re-scored offline (rescore command).
+        self.responses_writer = open_responses_writer(args.responses_out) if args.responses_out else None
+        # One verdict per case for pipelines; stdout is the real stdout when --output-jsonl is "-".
+        self.verdict_writer = (
+            VerdictWriter(args.output_jsonl, preserve_order=args.preserve_order, stdout=stdout or sys.stdout)
+            if args.output_jsonl
+            else None
+        )
         self.verbose = args.verbose
         self.debug = args.debug
         self.max_poll_attempts = args.max_poll_attempts
+        # --debug prints the full response model, so it always takes the validated path
+        self.fast_parse = args.fast_parse and not args.debug
+        # --profile wall times the stages of every call; --profile cpu samples stacks for a flame graph
+        self.stage_timers, self.stack_sampler = start_profile(
+            args.profile,
+            f"{args.summary_report_file}.profile.folded" if args.summary_report_file else defaults.profile_file,
+            defaults.profile_sample_interval,
+        )
+        # Called with the results record of every scored case (--compare pairs them up)
+        self.result_hook: Callable[[dict[str, Any]], None] | None = None
+        # --trace-out records a span tree per test case
+        self.tracer = set_case_tracer(CaseTracer(args.trace_out) if args.trace_out else None)
 
         self.skip_cache = skip_cache
 
+        # --manifest: cases scored in the last run with the same request config are not sent again.
+        # --watch passes the previous pass's manifest so only edited cases are sent.
+        self.manifest = (
+            RunManifest(
+                args.manifest,
+                request_config_hash(self.aidr_config or {}),
+                full=args.full,
+                previous=previous_run,
+                keep=args.watch,
+            )
+            if args.manifest or args.watch
+            else None
+        )
+
         self.use_labels_as_detectors = args.use_labels_as_detectors
         self.report_any_topic = args.report_any_topic
         self.valid_detectors = defaults.valid_detectors
         self.valid_topics = defaults.valid_topics
+        self._valid_detectors_set = frozenset(self.valid_detectors)
+        self._valid_topics_set = frozenset(self.valid_topics)
 
         ## Whenever there is an enabled_topic, we must put "topic" into the detectors list.
         ## TODO: NOT SURE THAT'S THE RIGHT APPROACH - LET'S ENSURE WE INTERNALLY ALWAYS USE A
@@ -123,7 +188,8 @@ class AIGuardManager:
                 print(f"{DARK_GREEN}Enabled topics: {', '.join(self.enabled_topics)}{RESET}")
 
         self.fail_fast = args.fail_fast
-        self.topic_threshold = args.topic_threshold if args.topic_threshold else defaults.topic_threshold
+        # None: every reported topic counts as detected
+        self.topic_threshold = args.topic_threshold
 
         self.malicious_prompt_labels: list[str] = []
         self.malicious_prompt_labels = (
@@ -141,6 +207,8 @@ class AIGuardManager:
         if not self.benign_labels:
             self.benign_labels = defaults.benign_labels
 
+        self.negative_labels = [label.strip().lower() for label in args.negative_labels.split(",") if label.strip()]
+
         # Ensure that there's no overlap between benign_labels and malicious_prompt_labels
         # TODO: This should be done when we receive the command line arguments, so we can validate.
         if set(self.benign_labels) & set(self.malicious_prompt_labels):
@@ -156,6 +224,17 @@ class AIGuardManager:
         self.detected_confidential_and_pii_entities = Counter[str]()
         self.detected_mcp_validations = Counter[str]()
         self.detected_secrets = Counter[str]()
+        # Counter names used by DetectorExtraction.counts
+        self._detail_counters = {
+            "analyzers": self.detected_analyzers,
+            "malicious_entities": self.detected_malicious_entities,
+            "topics": self.detected_topics,
+            "languages": self.detected_languages,
+            "code_languages": self.detected_code_languages,
+            "confidential_and_pii_entities": self.detected_confidential_and_pii_entities,
+            "mcp_validations": self.detected_mcp_validations,
+            "secrets": self.detected_secrets,
+        }
 
     def _parse_aidr_config(self, aidr_config_arg: str) -> GuardChatCompletionsParams | None:
         """
@@ -185,17 +264,47 @@ class AIGuardManager:
             print(f"{DARK_RED}Error parsing AIDR config JSON: {e}{RESET}")
             return None
 
-    def add_error_response(self, request_id: str, request: Mapping[str, Any], response: PangeaResponse) -> None:
-        with self.efficacy._lock:
-            self.efficacy.errors[response.status] += 1
-            self.efficacy.error_responses.append(
-                RequestError(
-                    message="Error calling AI Guard",
-                    request_id=request_id,
-                    request_body=request,
-                    response_body=response,
-                )
-            )
+    def add_error_response(
+        self,
+        request_id: str,
+        request: Mapping[str, Any],
+        response: PangeaResponse | FastGuardResponse,
+        error_class: str | None = None,
+        test_index: int | None = None,
+        message: str = "Error calling AI Guard",
+    ) -> None:
+        """Journal a failed call. error_class defaults to the response status (e.g. for API errors)."""
+        self.efficacy.error_journal.record(
+            RequestError(
+                message=message,
+                request_id=request_id,
+                request_body=request,
+                response_body=response,
+            ),
+            status=response.status,
+            error_class=error_class or response.status,
+            test_index=test_index,
+        )
+
+    def add_exception(self, test: TestCase, error: Exception, position: str) -> str:
+        """Print and record a call that raised instead of returning a response; returns the error class."""
+        error_class = type(error).__name__
+        print(f"\n{DARK_RED}Error processing prompt {position}: {error}{RESET}")
+        now = datetime.now(timezone.utc)
+        self.add_error_response(
+            "unavailable",
+            {"messages": test.messages, "index": test.index, "label": test.label},
+            PangeaResponse(
+                request_id="unavailable",
+                request_time=now,
+                response_time=now,
+                status="Error",
+            ),
+            error_class=error_class,
+            test_index=test.index,
+            message=str(error),
+        )
+        return error_class
 
     def add_duration(self, duration: float) -> None:
         with self.efficacy._lock:
@@ -328,78 +437,29 @@ class AIGuardManager:
             }
         }
         """
-        detected_with_details: dict[str, list[str]] = defaultdict(list)
-
-        if "result" in api_response and "detectors" in api_response["result"]:
-            for detector, details in api_response["result"]["detectors"].items():
-                if details is not None and details.get("detected", False):
-                    # Handle prompt_injection separately to extract analyzer and confidence
-                    if detector == "prompt_injection":
-                        for analyzer_response in details["data"].get("analyzer_responses", []):
-                            analyzer = analyzer_response.get("analyzer", "Unknown")
-                            confidence = analyzer_response.get("confidence", "Unknown")
-                            detected_with_details[detector].append(f"analyzer: {analyzer}, confidence: {confidence}")
-                    elif detector == "malicious_entity":
-                        entities = details["data"].get("entities", [])
-                        for entity in entities:
-                            entity_str = f"{entity['type']}: {entity['value']}"
-                            if "action" in entity:
-                                entity_str += f" (action: {entity['action']})"
-                            detected_with_details[detector].append(entity_str)
-                    elif detector == "topic":
-                        topics = details["data"].get("topics", [])
-                        for topic in topics:
-                            topic_name = topic.get("topic")
-                            if topic_name:
-                                detected_with_details[detector].append(topic_name)
-                    elif detector == "language" or detector == "code":
-                        language = details["data"].get("language")
-                        if language:
-                            detected_with_details[detector].append(language)
-                    else:
-                        # For other detectors, just append the data as a string
-                        detected_with_details[detector].append(str(details["data"]))
-        return detected_with_details
+        result = api_response.get("result") or {}
+        return self.extract_detectors(result.get("detectors")).details
 
-    def update_detected_counts(self, detected_detectors: Mapping[str, list[str]]) -> None:
-        # TODO: May want to replace the "prompt_injection" key with "malicious-prompt"
+    def extract_detectors(self, detectors: Detectors | Mapping[str, Any] | None) -> DetectorExtraction:
+        """
+        Extract details, canonical labels, confidences and counter items from a response's detectors
+        in a single pass (see detector_extraction.py for the per-detector extractors).
+        """
+        extraction = extract_detectors(
+            detectors, self._valid_detectors_set, self._valid_topics_set, topic_threshold=self.topic_threshold
+        )
+        for topic_name in extraction.invalid_topics:
+            print(
+                f"{DARK_RED}Invalid topic '{topic_name}' detected. "
+                f"Valid topics are: {', '.join(self.valid_topics)}{RESET}"
+            )
+        return extraction
+
+    def update_detected_counts(self, extraction: DetectorExtraction) -> None:
         with self._lock:
-            self.detected_detectors.update(detected_detectors.keys())
-            for detector in detected_detectors:
-                value = detected_detectors.get(detector, [])
-                if detector == "prompt_injection":
-                    analyzers = value
-                    if analyzers:
-                        for analyzer in analyzers:
-                            # Extract analyzer name and confidence if available
-                            if isinstance(analyzer, str):
-                                self.detected_analyzers[analyzer] += 1
-                            elif isinstance(analyzer, dict):
-                                analyzer_name = analyzer.get("analyzer", "Unknown")
-                                self.detected_analyzers[analyzer_name] += 1
-                            else:
-                                print(f"{DARK_RED}Unexpected format for prompt_injection: {analyzer}{RESET}")
-                elif detector == "malicious_entity":
-                    for entity in value:
-                        self.detected_malicious_entities[entity] += 1
-                elif detector == "topic":
-                    for topic in value:
-                        self.detected_topics[topic] += 1
-                elif detector == "language":
-                    for language in value:
-                        self.detected_languages[language] += 1
-                elif detector == "code":
-                    for language in value:
-                        self.detected_code_languages[language] += 1
-                elif detector == "confidential_and_pii_entity":
-                    for entity in value:
-                        self.detected_confidential_and_pii_entities[entity] += 1
-                elif detector == "mcp_validation":
-                    for entity in value:
-                        self.detected_mcp_validations[entity] += 1
-                elif detector == "secret_and_key_entity":
-                    for entity in value:
-                        self.detected_secrets[entity] += 1
+            self.detected_detectors.update(extraction.details.keys())
+            for counter_name, items in extraction.counts.items():
+                self._detail_counters[counter_name].update(items)
 
     def update_test_labels(self, test: TestCase, label: str) -> None:
         """
@@ -476,48 +536,12 @@ class AIGuardManager:
         For example, if "prompt_injection" or "malicious_prompt" is detected, it will return ["malicious-prompt"].
         For "topic", it will return a list of topics detected, such as ["negative-sentiment"].
         """
-        labels: list[str] = []
-        try:
-            if not actual_detectors:
-                print(f"{DARK_RED}No actual detectors found in response.{RESET}")
-                return labels
-
-            for detector, details in actual_detectors.model_dump().items():
-                if details is not None and details.get("detected", False):
-                    # Map the detector name to the standard label
-                    mapped_label = DETECTOR_NAME_MAPPING.get(detector, detector)
-
-                    if self.debug:
-                        print(f"{DARK_YELLOW}Detector: {detector}, Mapped label: {mapped_label}{RESET}")
-
-                    if detector == "topic":
-                        topics = details.get("data", {}).get("topics", [])
-                        for topic in topics:
-                            topic_name = topic.get("topic")
-                            if topic_name:
-                                if topic_name in self.valid_topics:
-                                    # Normalize topic name to "topic:<topic-name>" format
-                                    topic_name = f"{defaults.topic_prefix}{topic_name}"
-                                    if topic_name not in labels:
-                                        labels.append(topic_name)
-                                else:
-                                    print(
-                                        f"{DARK_RED}Invalid topic '{topic_name}' detected. "
-                                        f"Valid topics are: {', '.join(self.valid_topics)}{RESET}"
-                                    )
-                    else:
-                        labels.append(mapped_label)
-
-        except KeyError as e:
-            print(f"{DARK_RED}KeyError extracting labels from actual detectors: {e}{RESET}")
-        except Exception as e:
-            print(f"{DARK_RED}Error extracting labels from actual detectors: {e}{RESET}")
-
+        if not actual_detectors:
+            print(f"{DARK_RED}No actual detectors found in response.{RESET}")
+            return []
+        labels = self.extract_detectors(actual_detectors).labels
         if self.debug:
             print(f"{DARK_YELLOW}Extracted labels from actual detectors: {labels}{RESET}")
-
-        labels, _ = normalize_topics_and_detectors(labels, defaults.valid_detectors, defaults.valid_topics)
-
         return labels
 
     # TODO: Compare behavior with process_response and PromptDetectionManager._process_prompt_guard_response
@@ -533,11 +557,17 @@ class AIGuardManager:
         test: TestCase,
         messages: Sequence[object],
         tools: Sequence[object],
-        response: GuardChatCompletionsResponse,
-    ) -> None:
+        response: GuardResponse,
+        latency: float | None = None,
+        seq: int | None = None,
+    ) -> list[str] | None:
+        """
+        Score a response against the test case and return the detected labels,
+        or None if the call did not succeed. seq orders the case's --output-jsonl record.
+        """
         if response.status != "Success":
             print(f"\n\t{DARK_YELLOW}Service failed with status: {response.status}.{RESET}")
-            return
+            return None
 
         summary = response.summary
         result = response.result
@@ -561,60 +591,129 @@ class AIGuardManager:
             print(f"\tResponse.status: {response.status}")
             print(f"\tResponse:\n{formatted_json_str(response)}{RESET}")
 
-        # Extract info on detected detectors and their sub-details
-        # This will return a list of dictionaries with the detector name and its details.
-        # For example, if "prompt_injection" is detected, it might look like:
-        # [
-        #     {"detector": "prompt_injection", "details": {"detected": True, "data": {...}}}
-        # ]
-        # For "topic", it might look like:
-        # [
-        #     {"detector": "topic", "details": {"detected": True, "data": {"topics": [{"topic": "negative-sentiment", "confidence": 1.0}]}}}]
-        # ]
-        detected_detectors = self.get_detected_with_detail(response.model_dump())
-        # Also grab the raw detectors dict from the API response for label extraction
+        # Extract info on detected detectors and their sub-details in one pass over the typed detectors.
+        # extraction.details maps detector name to detail strings, for example:
+        #     {"malicious_prompt": ["analyzer: PA4002, confidence: 1.0"], "topic": ["negative-sentiment"]}
+        # extraction.labels are the canonical labels used for scoring, e.g. ["malicious-prompt", "topic:toxicity"].
         assert response.result is not None
         raw_detectors = response.result.detectors
         assert raw_detectors is not None
+        extraction = self.extract_detectors(raw_detectors)
+        detected_detectors = extraction.details
         if self.debug:
             print(f"\t{DARK_YELLOW}Detected Detectors: {formatted_json_str(detected_detectors)}{RESET}")
             print(f"\t{DARK_YELLOW}Raw Detectors: {formatted_json_str(raw_detectors)}{RESET}")
 
-        self.update_detected_counts(detected_detectors)
+        self.update_detected_counts(extraction)
 
         # This will update the labels so that they contain whatever was in
         # test.labels, but also whatever was in test.expected_detectors (union).
         self.update_test_labels_from_expected_detectors(test)
 
         expected_detectors_labels = test.label
-        actual_detectors_labels = self.labels_from_actual_detectors(raw_detectors)
+        actual_detectors_labels = extraction.labels
+        if self.debug:
+            print(f"{DARK_YELLOW}Extracted labels from actual detectors: {actual_detectors_labels}{RESET}")
 
+        outcomes: dict[str, set[str]] = {}
         fp_detected, fn_detected, fp_names, fn_names = self.efficacy.update(
             test,
             expected_labels=expected_detectors_labels,
             detected_detectors_labels=actual_detectors_labels,
             benign_labels=self.benign_labels,
             malicious_prompt_labels=self.malicious_prompt_labels,
+            negative_labels=self.negative_labels or None,
+            outcomes=outcomes,
         )
 
-        if fp_detected or fn_detected:
-            index = test.index if hasattr(test, "index") else "N/A"
-            # Only print FPs if no true positives (no intersection between expected and actual labels)
-            if not set(expected_detectors_labels).intersection(set(actual_detectors_labels)) and fp_detected:
-                print(f"\t{DARK_RED}Test:{index}:False Positives: {fp_names}{RESET}")
-            if fn_detected:
-                print(f"\t{DARK_RED}Test:{index}:False Negatives: {fn_names}{RESET}")
+        with stage("write"):
+            if fp_detected or fn_detected:
+                index = test.index if hasattr(test, "index") else "N/A"
+                # Only print FPs if no true positives (no intersection between expected and actual labels)
+                if not set(expected_detectors_labels).intersection(set(actual_detectors_labels)) and fp_detected:
+                    print(f"\t{DARK_RED}Test:{index}:False Positives: {fp_names}{RESET}")
+                if fn_detected:
+                    print(f"\t{DARK_RED}Test:{index}:False Negatives: {fn_names}{RESET}")
+
+                if self.verbose:
+                    # Show only the first 2 messages for brevity
+                    print(
+                        f"\t{DARK_YELLOW}Messages:\n{DARK_RED}{formatted_json_str(messages[:2])}{RESET}"
+                        f"\t{DARK_YELLOW}Tools:\n{DARK_RED}{len(tools)}{RESET}"
+                    )
 
-            if self.verbose:
-                # Show only the first 2 messages for brevity
-                print(
-                    f"\t{DARK_YELLOW}Messages:\n{DARK_RED}{formatted_json_str(messages[:2])}{RESET}"
-                    f"\t{DARK_YELLOW}Tools:\n{DARK_RED}{len(tools)}{RESET}"
+            if self.results_writer or self.verdict_writer or self.result_hook:
+                record = result_record(
+                    test,
+                    request_id=response.request_id,
+                    blocked=bool(blocked),
+                    extraction=extraction,
+                    expected_labels=expected_detectors_labels,
+                    false_positives=fp_names,
+                    false_negatives=fn_names,
+                    true_positives=sorted(outcomes["tp"]),
+                    true_negatives=sorted(outcomes["tn"]),
+                    latency=latency,
                 )
+                if self.results_writer:
+                    self.results_writer.write(record)
+                if self.verdict_writer:
+                    self.verdict_writer.write(seq if seq is not None else test.index or 0, record)
+                if self.result_hook:
+                    self.result_hook(record)
+            if self.responses_writer or self.manifest:
+                raw = response_json(response)
+                if self.responses_writer:
+                    self.responses_writer.write(response_record(test, raw, latency))
+                if self.manifest:
+                    self.manifest.record(test, raw, latency)
+
+        return actual_detectors_labels
+
+    def write_error_verdict(self, test: TestCase, seq: int, error: str, latency: float | None) -> None:
+        """Emit the --output-jsonl record for a case that could not be scored."""
+        if self.verdict_writer:
+            self.verdict_writer.write(seq, error_record(test, error, latency))
+
+    def close_outputs(self) -> None:
+        """Flush and close every streaming output file."""
+        if self.verdict_writer and not self.verdict_writer.closed:
+            self.verdict_writer.close()
+            if self.verdict_writer.path != "-":
+                print(f"{DARK_GREEN}Verdicts written to {self.verdict_writer.path}{RESET}")
+        self.efficacy.close_writers()
+        if self.tracer is not None:
+            self.tracer.close()
+            set_case_tracer(None)
+            print(f"{DARK_GREEN}Trace written to {self.tracer.path}{RESET}")
+            self.tracer = None
+        if self.results_writer and not self.results_writer.closed:
+            self.results_writer.close()
+            print(f"{DARK_GREEN}Results written to {self.results_writer.path}{RESET}")
+        if self.responses_writer and not self.responses_writer.closed:
+            self.responses_writer.close()
+            print(f"{DARK_GREEN}Responses written to {self.responses_writer.path}{RESET}")
+        if self.manifest and not self.manifest.closed:
+            if self.manifest.close():
+                print(f"{DARK_GREEN}Manifest written to {self.manifest.path}{RESET}")
+            else:
+                print(f"{DARK_YELLOW}No responses recorded, manifest {self.manifest.path} left unchanged{RESET}")
+
+    def finish_profile(self) -> None:
+        """Print the --profile wall stage table / write the --profile cpu samples, and stop profiling."""
+        if self.stage_timers is not None:
+            self.stage_timers.print_table()
+            set_stage_timers(None)
+            self.stage_timers = None
+        if self.stack_sampler is not None:
+            self.stack_sampler.stop()
+            self.stack_sampler = None
 
     def print_summary(self) -> None:
         if not self.efficacy.total_calls:
             print(f"{DARK_YELLOW}No AI Guard calls made.{RESET}")
+            self.finish_profile()
+            self.close_outputs()
             return
 
         # TODO: Output the elements of this detectors to report in a more readable format.
@@ -664,15 +763,27 @@ class AIGuardManager:
         if self.detected_code_languages:
             print(f"{DARK_YELLOW}Detected Code Languages: {dict(self.detected_code_languages)}{RESET}")
 
-        self.efficacy.print_errors()
+        self.finish_profile()
+        self.close_outputs()
 
-    def _ai_guard_data(self, guard_input: GuardInput) -> GuardChatCompletionsResponse:
+    def _ai_guard_data(self, guard_input: GuardInput, test_index: int | None = None) -> GuardResponse:
         if self.debug:
             print(f"\nCalling AI Guard with Data: {formatted_json_str(guard_input)}")
             if self.aidr_config:
                 print(f"{DARK_YELLOW}AIDR Config Override: {formatted_json_str(self.aidr_config)}{RESET}")
 
-        response = guard_chat_completions(guard_input, aidr_config=self.aidr_config or {})
+        response: GuardResponse
+        with self._lock:
+            self.in_flight += 1
+        try:
+            with stage("request"):
+                if self.fast_parse:
+                    response = guard_chat_completions_fast(guard_input, aidr_config=self.aidr_config or {})
+                else:
+                    response = guard_chat_completions(guard_input, aidr_config=self.aidr_config or {})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
 
         duration = get_duration(response, verbose=self.verbose)
         if duration > 0:
@@ -681,7 +792,10 @@ class AIGuardManager:
 
         if response.status != "Success":
             self.add_error_response(
-                response.request_id, {"guard_input": guard_input, **(self.aidr_config or {})}, response
+                response.request_id,
+                {"guard_input": guard_input, **(self.aidr_config or {})},
+                response,
+                test_index=test_index,
             )
 
         return response
@@ -696,10 +810,12 @@ class AIGuardManager:
             return {k: v for k, v in vars(obj).items() if v not in (None, {}, [], "")}
         return {}
 
-    def aidr_service(self, messages: Sequence[Message], tools: Sequence[object]) -> GuardChatCompletionsResponse:
-        return self._ai_guard_data(GuardInput(messages=messages, tools=tools))
+    def aidr_service(
+        self, messages: Sequence[Message], tools: Sequence[object], test_index: int | None = None
+    ) -> GuardResponse:
+        return self._ai_guard_data(GuardInput(messages=messages, tools=tools), test_index=test_index)
 
-    def ai_guard_test(self, test: TestCase) -> GuardChatCompletionsResponse:
+    def ai_guard_test(self, test: TestCase) -> GuardResponse:
         """
         Prepare the data for AI Guard API call based on the test case.
         This includes setting overrides, messages, and recipe.
@@ -733,14 +849,25 @@ class AIGuardManager:
                     enabled_topics.append(t)
             enabled_topics = remove_topic_prefix(enabled_topics)
 
-        return self.aidr_service(test.messages, test.tools)
+        return self.aidr_service(test.messages, test.tools, test_index=test.index)
+
+
+@dataclass(slots=True)
+class SkippedTestCase:
+    """A .json/.jsonl record that is not a valid test case: its warning, around the record's number."""
+
+    head: str
+    tail: str
+
+    def warning(self, idx: int) -> str:
+        return f"{DARK_RED}{self.head}{idx}{self.tail}{RESET}"
 
 
 class AIGuardTests:
     """Class to handle loading and storing settings and test cases."""
 
     settings: Settings
-    tests: list[TestCase]
+    tests: MutableSequence[TestCase]
 
     def __init__(
         self, settings: Settings, aig: AIGuardManager, args: AppArgs, tests: list[TestCase] | None = None
@@ -750,8 +877,11 @@ class AIGuardTests:
         self.tests = tests if tests else []
         self.args = args
 
-    def load_from_file(self, filename: str) -> None:
-        """Load the test file and return an instance of AIGuardTestFile."""
+    def load_from_file(self, filename: str) -> bool:
+        """
+        Load the test cases of a .json/.jsonl test file into self.tests.
+        Returns False (after printing why) if the file could not be read or parsed.
+        """
 
         # If the system_prompt and/or recipe is given on the command line, use it.
         ## NOTE: DON'T force the system prompt unless --force-system-prompt is set.
@@ -761,7 +891,14 @@ class AIGuardTests:
 
         data_tests = []
         file_extension = Path(filename).suffix.lower()
-        if file_extension == ".jsonl":
+        workers = 1
+        if self.args.parse_workers != 1:
+            from aidr_aiguard_lab.manager.parallel_load import load_parallel, parse_workers
+
+            workers = parse_workers(self.args.parse_workers, filename)
+        if file_extension == ".jsonl" and workers > 1:
+            return load_parallel(self, filename, system_prompt, workers)
+        elif file_extension == ".jsonl":
             # --------------------------------------------------------------
             # JSON Lines input: one JSON object per line
             # --------------------------------------------------------------
@@ -779,23 +916,23 @@ class AIGuardTests:
                         data_tests.append(line_data)
             except FileNotFoundError:
                 print(f"Error: File '{filename}' not found.")
-                return
+                return False
             except json.JSONDecodeError as e:
                 print(f"Error: Failed to parse JSON file '{filename}'. {e}")
-                return
+                return False
             except Exception as e:
                 print(f"Error: Unexpected error while reading file '{filename}': {e}")
-                return
+                return False
         else:
             try:
                 with Path(filename).open(encoding="utf-8") as file:
                     data = json.load(file)
             except FileNotFoundError:
                 print(f"Error: File '{filename}' not found.")
-                return
+                return False
             except json.JSONDecodeError as e:
                 print(f"Error: Failed to parse JSON file '{filename}'. {e}")
-                return
+                return False
 
             # Load test cases - if using json format with a "tests" key, use that; otherwise, use the root data
             if isinstance(data, dict):
@@ -807,7 +944,7 @@ class AIGuardTests:
                 data_tests = data
             else:
                 print(f"Error: Unexpected data type in test file: {type(data)}")
-                self.settings = Settings()
+                return False
 
             ## NOTE we could have loaded new settings from the file, so re-check system_prompt and recipe
             if self.args.system_prompt:
@@ -815,172 +952,283 @@ class AIGuardTests:
             if self.args.recipe:
                 self.settings.recipe = self.args.recipe
 
+        if workers > 1:
+            return load_parallel(self, filename, system_prompt, workers, records=data_tests)
         for idx, test_data in enumerate(data_tests, start=1):
-            # Normalize label field for both JSONL and JSON inputs
-            # Extract labels from the input line:
-            # If the label is a dict with "kind" and "tag", combine them into the expected format,
-            # for example "topic:toxicity" or "not-topic:toxicity".
-            # Otherwise, support simple list or string formats for legacy or simple test cases.
-            label_field = test_data.get("label")
-            labels = []
-            if isinstance(label_field, dict) and "kind" in label_field and "tag" in label_field:
-                kind = label_field["kind"].strip().lower()
-                tag = label_field["tag"].strip().lower()
-                if kind == defaults.topic_str:
-                    labels.append(f"{defaults.topic_prefix}{tag}")
-                elif kind == defaults.not_topic_str:
-                    labels.append(f"{defaults.not_topic_prefix}{tag}")
-                elif kind in [defaults.not_malicious_prompt_str, defaults.not_malicious_prompt_str.replace("-", "")]:
-                    # Negative expectation for the malicious-prompt detector.
-                    # Store BOTH the detector label (for per-detector stats)
-                    # *and* the negative-expectation marker so the efficacy tracker
-                    # knows this is a TN/FP scenario.
-                    labels.append(defaults.malicious_prompt_str)
-                    labels.append(defaults.not_malicious_prompt_str)
-                else:
-                    if kind:
-                        labels.append(kind)
-            elif isinstance(label_field, list):
-                labels = label_field
-            elif isinstance(label_field, str):
-                labels = [label_field]
-            messages = test_data.get("messages")
-            tools = test_data.get("tools", [])
-            if not isinstance(messages, list) or not all(isinstance(msg, dict) for msg in messages):
-                print(
-                    f"{DARK_RED}Test Case:{idx}:Warning: Invalid messages format "
-                    f"in test case. Skipping test case: {test_data}{RESET}"
-                )
-                continue
+            testcase = self._test_case_from_dict(idx, test_data, system_prompt, position=len(self.tests) + 1)
+            if testcase is not None:
+                self.tests.append(testcase)
+        return True
 
-            # Hydrate TestCase from raw dict (leveraging from_dict on each class)
-            raw_tc = {
-                "index": idx,
-                "label": labels,
-                "messages": messages,
-                "tools": tools,
-                "settings": test_data.get("settings") or self.settings,
-                "expected_detectors": test_data.get("expected_detectors") or None,
-            }
-            try:
-                testcase = TestCase.from_dict(raw_tc)
-            except Exception as e:
-                print(f"{DARK_RED}Test Case: {idx}: Skipping invalid test case ({e}): {test_data}{RESET}")
-                continue
+    def load_from_file_cached(self, filename: str, cache_dir: str) -> bool:
+        """
+        load_from_file() through a --dataset-cache snapshot: memory-map the test cases of an earlier run
+        with the same file contents and label options, or load the file and write its snapshot.
+        Returns False if the file could not be loaded.
+        """
+        from aidr_aiguard_lab.testcase.dataset_cache import DatasetCache, dataset_cache_key
+
+        options = {
+            "system_prompt": self.settings.system_prompt,
+            "recipe": self.args.recipe,
+            "enabled_detectors": self.aig.enabled_detectors,
+            "use_labels_as_detectors": self.aig.use_labels_as_detectors,
+            "malicious_prompt_labels": self.args.malicious_prompt_labels,
+            "benign_labels": self.args.benign_labels,
+            "assume_tps": self.args.assume_tps,
+            "assume_tns": self.args.assume_tns,
+        }
+        try:
+            cache = DatasetCache(cache_dir, filename, dataset_cache_key(filename, options))
+        except OSError:
+            # Unreadable input: load_from_file() reports it
+            return self.load_from_file(filename)
+        cached = cache.load()
+        if cached is not None:
+            self.tests, self.settings, self.aig.enabled_topics = cached
+            print(f"Loaded {len(self.tests)} test cases from dataset cache {cache.path}")
+            return True
+        if not self.load_from_file(filename):
+            return False
+        if not self.tests:
+            return True
+        try:
+            cache.save(self.tests, self.settings, self.aig.enabled_topics)
+        except OSError as e:
+            print(f"{DARK_YELLOW}Could not write dataset cache {cache.path}: {e}{RESET}")
+        else:
+            print(f"Wrote dataset cache {cache.path}")
+        return True
 
-            # Ensure system message and recipe
-            # If system_prompt or recipe is specified on the command line, it should take precedence
-            if system_prompt and system_prompt != "":
-                testcase.force_system_message(system_prompt)
-            if self.args.recipe:
-                self.settings.recipe = self.args.recipe
-                testcase.ensure_recipe(self.args.recipe)
-            else:
-                recipe = self.settings.recipe if self.settings else defaults.default_recipe  # "pangea_prompt_guard"
-                assert recipe is not None
-                testcase.ensure_recipe(recipe)
-
-            # Ensure we have a labels list
-            testcase.label = testcase.label or []
-            if self.args.assume_tps or self.args.assume_tns:
-                if self.args.assume_tps:
-                    ## NOTE: If assume_tps is on, then we assume that the test case is a true positive
-                    ## and we add the enabled detectors to the labels.
-                    for detector in self.aig.enabled_detectors:
-                        if detector not in testcase.label:
-                            testcase.label.append(detector)
-
-                if self.args.assume_tns:
-                    ## NOTE: If assume_tns is on, then we assume that the test case is a true negative
-                    ## and we remove all labels.
-                    testcase.label = []  # Clear labels for true negatives
+    def _test_case_from_dict(
+        self, idx: int, test_data: dict[str, Any], system_prompt: str | None, position: int
+    ) -> TestCase | None:
+        """
+        Build a TestCase from one .json/.jsonl record: normalize its labels, apply settings, synonyms and
+        the enabled detectors. Returns None (after printing why) if the record is not a valid test case.
+        """
+        testcase = self._normalize_test_case(test_data, system_prompt)
+        if isinstance(testcase, SkippedTestCase):
+            print(testcase.warning(idx))
+            return None
+        self._place_test_case(testcase, position)
+        return testcase
+
+    def _place_test_case(self, testcase: TestCase, position: int) -> None:
+        if not (self.args.assume_tps or self.args.assume_tns):
+            testcase.index = position  # Index among the successfully loaded test cases
+
+    def _normalize_test_case(self, test_data: dict[str, Any], system_prompt: str | None) -> TestCase | SkippedTestCase:
+        """The work of _test_case_from_dict() that does not depend on the record's place in the input."""
+        # Normalize label field for both JSONL and JSON inputs
+        # Extract labels from the input line:
+        # If the label is a dict with "kind" and "tag", combine them into the expected format,
+        # for example "topic:toxicity" or "not-topic:toxicity".
+        # Otherwise, support simple list or string formats for legacy or simple test cases.
+        label_field = test_data.get("label")
+        labels = []
+        if isinstance(label_field, dict) and "kind" in label_field and "tag" in label_field:
+            kind = label_field["kind"].strip().lower()
+            tag = label_field["tag"].strip().lower()
+            if kind == defaults.topic_str:
+                labels.append(f"{defaults.topic_prefix}{tag}")
+            elif kind == defaults.not_topic_str:
+                labels.append(f"{defaults.not_topic_prefix}{tag}")
+            elif kind in [defaults.not_malicious_prompt_str, defaults.not_malicious_prompt_str.replace("-", "")]:
+                # Negative expectation for the malicious-prompt detector.
+                # Store BOTH the detector label (for per-detector stats)
+                # *and* the negative-expectation marker so the efficacy tracker
+                # knows this is a TN/FP scenario.
+                labels.append(defaults.malicious_prompt_str)
+                labels.append(defaults.not_malicious_prompt_str)
             else:
-                # The test case can have labels and expected_detectors.
-                expected_detectors_labels = []
-                if testcase.expected_detectors:
-                    expected_detectors_labels = testcase.expected_detectors.get_expected_detector_labels()
-                testcase.label.extend(expected_detectors_labels)
-
-                # Then need to apply synonyms to the labels based on benign_labels and malicious_prompt_labels
-                # from the command line arguments.
-
-                # Need to make labels be restricted to the detectors enabled in the overrides
-                # and the labels it started with, and the lables in the expected_detectors.
-
-                # Apply synonyms to expected_labels for "malicious-prompt"
-                ## TODO: Use defauls.malicious_prompt_str in place of literal to avoid typos.
-                malicious_prompt_labels: list[str] = (
-                    [label.strip().lower() for label in self.args.malicious_prompt_labels.split(",")]
-                    if self.args.malicious_prompt_labels
-                    else []
+                if kind:
+                    labels.append(kind)
+        elif isinstance(label_field, list):
+            labels = label_field
+        elif isinstance(label_field, str):
+            labels = [label_field]
+        messages = test_data.get("messages")
+        tools = test_data.get("tools", [])
+        if not isinstance(messages, list) or not all(isinstance(msg, dict) for msg in messages):
+            return SkippedTestCase(
+                "Test Case:", f":Warning: Invalid messages format in test case. Skipping test case: {test_data}"
+            )
+
+        # Hydrate TestCase from raw dict (leveraging from_dict on each class)
+        raw_tc = {
+            "label": labels,
+            "messages": messages,
+            "tools": tools,
+            "settings": test_data.get("settings") or self.settings,
+            "expected_detectors": test_data.get("expected_detectors") or None,
+        }
+        try:
+            testcase = TestCase.from_dict(raw_tc)
+        except Exception as e:
+            return SkippedTestCase("Test Case: ", f": Skipping invalid test case ({e}): {test_data}")
+
+        # Ensure system message and recipe
+        # If system_prompt or recipe is specified on the command line, it should take precedence
+        if system_prompt and system_prompt != "":
+            testcase.force_system_message(system_prompt)
+        if self.args.recipe:
+            self.settings.recipe = self.args.recipe
+            testcase.ensure_recipe(self.args.recipe)
+        else:
+            recipe = self.settings.recipe if self.settings else defaults.default_recipe  # "pangea_prompt_guard"
+            assert recipe is not None
+            testcase.ensure_recipe(recipe)
+
+        # Ensure we have a labels list
+        testcase.label = testcase.label or []
+        if self.args.assume_tps or self.args.assume_tns:
+            if self.args.assume_tps:
+                ## NOTE: If assume_tps is on, then we assume that the test case is a true positive
+                ## and we add the enabled detectors to the labels.
+                for detector in self.aig.enabled_detectors:
+                    if detector not in testcase.label:
+                        testcase.label.append(detector)
+
+            if self.args.assume_tns:
+                ## NOTE: If assume_tns is on, then we assume that the test case is a true negative
+                ## and we remove all labels.
+                testcase.label = []  # Clear labels for true negatives
+        else:
+            # The test case can have labels and expected_detectors.
+            expected_detectors_labels = []
+            if testcase.expected_detectors:
+                expected_detectors_labels = testcase.expected_detectors.get_expected_detector_labels()
+            testcase.label.extend(expected_detectors_labels)
+
+            # Then need to apply synonyms to the labels based on benign_labels and malicious_prompt_labels
+            # from the command line arguments.
+
+            # Need to make labels be restricted to the detectors enabled in the overrides
+            # and the labels it started with, and the lables in the expected_detectors.
+
+            # Apply synonyms to expected_labels for "malicious-prompt"
+            ## TODO: Use defauls.malicious_prompt_str in place of literal to avoid typos.
+            malicious_prompt_labels: list[str] = (
+                [label.strip().lower() for label in self.args.malicious_prompt_labels.split(",")]
+                if self.args.malicious_prompt_labels
+                else []
+            )
+            if malicious_prompt_labels:
+                testcase.label = apply_synonyms(testcase.label, malicious_prompt_labels, "malicious-prompt")
+
+            # Apply synonyms to expected_labels for "benign", and then remove any
+            # "benign" label because "benign" means "label not present", so nothing
+            # expected.
+            ## TODO: Use defaults.benign_str in place of literal to avoid typos.
+            benign_labels: list[str] = (
+                [label.strip().lower() for label in self.args.benign_labels.split(",")]
+                if self.args.benign_labels
+                else []
+            )
+            if benign_labels:
+                testcase.label = apply_synonyms(testcase.label, benign_labels, "benign")
+                if "benign" in testcase.label:
+                    testcase.label.remove("benign")  # Remove "benign" if it was added by synonyms
+            # Now we have labels that are the union of expected_detectors_labels and the labels
+            # from the test case, with synonyms applied.
+
+            # If the test case has settings.overrides use those
+            #    (and cache the enabled detectors from the settings.overrides in test.enabled_override_detectors)
+            # else if there are global settings.overrides, then use those
+            # else use cmd_line_enabled_detectors.
+            # If not using the test case's settings.overrides, then update the self.aig.enabled_topics
+            cmd_line_enabled_detectors: list[str] = self.aig.enabled_detectors
+            effective_enabled_detectors: list[str] = cmd_line_enabled_detectors
+            if self.aig.use_labels_as_detectors:
+                # If using labels as topics, we will use the test case's labels as topics.
+                # This means we will not use the recipe's topics, but rather the labels.
+                effective_enabled_detectors = remove_topic_prefix(
+                    list({t for t in testcase.label if t.startswith(defaults.topic_prefix)})
                 )
-                if malicious_prompt_labels:
-                    testcase.label = apply_synonyms(testcase.label, malicious_prompt_labels, "malicious-prompt")
-
-                # Apply synonyms to expected_labels for "benign", and then remove any
-                # "benign" label because "benign" means "label not present", so nothing
-                # expected.
-                ## TODO: Use defaults.benign_str in place of literal to avoid typos.
-                benign_labels: list[str] = (
-                    [label.strip().lower() for label in self.args.benign_labels.split(",")]
-                    if self.args.benign_labels
-                    else []
+            test_case_enabled_detectors: list[str] = []
+            global_settings_enabled_detectors: list[str] = []
+            if testcase.settings and testcase.settings.overrides:
+                test_case_enabled_detectors = testcase.settings.overrides.get_enabled_detector_labels() or []
+                # TODO: Check this attribute in ai_guard_test and use it for enabled detectors/topics if present.
+                # TODO: Move setting of testcase.enabled_override_detectors into TestCase::__init__
+                testcase.enabled_override_detectors = test_case_enabled_detectors
+                effective_enabled_detectors = test_case_enabled_detectors
+            elif self.settings and self.settings.overrides:
+                global_settings_enabled_detectors = self.settings.overrides.get_enabled_detector_labels() or []
+                if global_settings_enabled_detectors:
+                    effective_enabled_detectors = global_settings_enabled_detectors
+
+            if not test_case_enabled_detectors:  # Only if we're not overriding for a single test case
+                self.aig.enabled_topics = remove_topic_prefix(
+                    list({t for t in effective_enabled_detectors if t.startswith(defaults.topic_prefix)})
                 )
-                if benign_labels:
-                    testcase.label = apply_synonyms(testcase.label, benign_labels, "benign")
-                    if "benign" in testcase.label:
-                        testcase.label.remove("benign")  # Remove "benign" if it was added by synonyms
-                # Now we have labels that are the union of expected_detectors_labels and the labels
-                # from the test case, with synonyms applied.
-
-                # If the test case has settings.overrides use those
-                #    (and cache the enabled detectors from the settings.overrides in test.enabled_override_detectors)
-                # else if there are global settings.overrides, then use those
-                # else use cmd_line_enabled_detectors.
-                # If not using the test case's settings.overrides, then update the self.aig.enabled_topics
-                cmd_line_enabled_detectors: list[str] = self.aig.enabled_detectors
-                effective_enabled_detectors: list[str] = cmd_line_enabled_detectors
-                if self.aig.use_labels_as_detectors:
-                    # If using labels as topics, we will use the test case's labels as topics.
-                    # This means we will not use the recipe's topics, but rather the labels.
-                    effective_enabled_detectors = remove_topic_prefix(
-                        list({t for t in testcase.label if t.startswith(defaults.topic_prefix)})
-                    )
-                test_case_enabled_detectors: list[str] = []
-                global_settings_enabled_detectors: list[str] = []
-                if testcase.settings and testcase.settings.overrides:
-                    test_case_enabled_detectors = testcase.settings.overrides.get_enabled_detector_labels() or []
-                    # TODO: Check this attribute in ai_guard_test and use it for enabled detectors/topics if present.
-                    # TODO: Move setting of testcase.enabled_override_detectors into TestCase::__init__
-                    testcase.enabled_override_detectors = test_case_enabled_detectors
-                    effective_enabled_detectors = test_case_enabled_detectors
-                elif self.settings and self.settings.overrides:
-                    global_settings_enabled_detectors = self.settings.overrides.get_enabled_detector_labels() or []
-                    if global_settings_enabled_detectors:
-                        effective_enabled_detectors = global_settings_enabled_detectors
-
-                if not test_case_enabled_detectors:  # Only if we're not overriding for a single test case
-                    self.aig.enabled_topics = remove_topic_prefix(
-                        list({t for t in effective_enabled_detectors if t.startswith(defaults.topic_prefix)})
-                    )
 
-                # Use TestCase::ensure_valid_labels(effective_enabled_detectors) to ensure that the labels
-                # are valid and only those that are for enabled and supported detectors.
-                testcase.ensure_valid_labels(effective_enabled_detectors)
-                # ------------------------------------------------------------------
-                # Preserve explicit negative‑expectation labels (e.g.  "not‑topic:*").
-                # These get stripped out by ensure_valid_labels() because they aren’t
-                # themselves valid detectors, but the efficacy calculator needs them
-                # so it can score true‑negatives / false‑positives correctly.
-                # Re‑add any label that begins with "not-" and wasn’t kept above.
-                # ------------------------------------------------------------------
-                original_raw_labels = test_data.get("label") or []
-                for lbl in original_raw_labels:
-                    if lbl.startswith("not-") and lbl not in testcase.label:
-                        testcase.label.append(lbl)
-                testcase.index = len(self.tests) + 1  # Set index based on current length of tests
-
-            self.tests.append(testcase)
+            # Use TestCase::ensure_valid_labels(effective_enabled_detectors) to ensure that the labels
+            # are valid and only those that are for enabled and supported detectors.
+            testcase.ensure_valid_labels(effective_enabled_detectors)
+            # ------------------------------------------------------------------
+            # Preserve explicit negative‑expectation labels (e.g.  "not‑topic:*").
+            # These get stripped out by ensure_valid_labels() because they aren’t
+            # themselves valid detectors, but the efficacy calculator needs them
+            # so it can score true‑negatives / false‑positives correctly.
+            # Re‑add any label that begins with "not-" and wasn’t kept above.
+            # ------------------------------------------------------------------
+            original_raw_labels = test_data.get("label") or []
+            for lbl in original_raw_labels:
+                if lbl.startswith("not-") and lbl not in testcase.label:
+                    testcase.label.append(lbl)
+
+        return testcase
+
+    def _test_case_from_text(self, prompt: str, recipe: str, system_prompt: str | None) -> TestCase:
+        """Build a TestCase from one line of plain text input."""
+        test = TestCase(messages=[{"role": "user", "content": prompt.strip().replace("\n", "").replace("\r", " ")}])
+        if system_prompt and system_prompt != "":
+            test.ensure_system_message(system_prompt)
+        if self.args.assume_tps:
+            # If assume_tps is on, then we assume that the test case is a true positive
+            # and we add the enabled detectors to the labels.
+            for detector in self.aig.enabled_detectors:
+                if detector not in test.label:
+                    test.label.append(detector)
+        if self.args.assume_tns:
+            # If assume_tns is on, then we assume that the test case is a true negative
+            # and we remove all labels.
+            test.label = []
+        test.ensure_recipe(recipe)
+        return test
+
+    def iter_test_cases(self, stream: TextIO, recipe: str, system_prompt: str | None) -> Iterator[TestCase]:
+        """
+        Yield test cases from a stream (e.g. stdin) as lines arrive, without reading it to the end.
+        Lines are JSONL test case records if the first non-blank line starts with "{", otherwise plain text
+        prompts, one per line.
+        """
+        is_jsonl: bool | None = None
+        count = 0
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if is_jsonl is None:
+                is_jsonl = line.startswith("{")
+            testcase: TestCase | None
+            if is_jsonl:
+                try:
+                    test_data = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping invalid JSON line {line_number}: {line}")
+                    continue
+                if not isinstance(test_data, dict):
+                    print(f"Skipping non-object JSON line {line_number}: {line}")
+                    continue
+                testcase = self._test_case_from_dict(line_number, test_data, system_prompt, position=count + 1)
+            else:
+                testcase = self._test_case_from_text(line, recipe, system_prompt)
+            if testcase is not None:
+                count += 1
+                yield testcase
 
     def process_all_prompts(self, args: AppArgs, aig: AIGuardManager) -> None:
         """
@@ -991,45 +1239,186 @@ class AIGuardTests:
         max_workers = int(args.rps) if args.rps >= 1 else 1
         semaphore = Semaphore(max_workers)
 
+        soak: SoakTracker | None = None
+        if args.loop or args.duration:
+            soak = SoakTracker(
+                window_seconds=defaults.soak_window_seconds,
+                report_file=f"{args.summary_report_file}.soak.jsonl" if args.summary_report_file else None,
+            )
+        progress: ProgressRenderer | None = None
+
         @rate_limited(args.rps)
-        def process_prompt(aig: AIGuardManager, test: TestCase, index: int, total_rows: int) -> None:
+        def process_prompt(
+            aig: AIGuardManager, test: TestCase, index: int, total_rows: int | None, seq: int, submitted: float
+        ) -> None:
             with semaphore:
+                latency: float | None = None
+                error_class: str | None = None
+                detected_labels: list[str] | None = None
+                request_id: str | None = None
                 try:
-                    progress = (index + 1) / total_rows * 100
-                    print("\r\033[2K", end="")
-                    print(f"{progress:.2f}%", end="\r", flush=True)
                     # TODO: Note that AIGuardManager that loads json and jsonl files already sets the index,
                     # but not sure if other methods will do so.
                     test.index = index + 1
+                    start = time.perf_counter()
                     response = aig.ai_guard_test(test)
+                    latency = time.perf_counter() - start
+                    request_id = response.request_id
+                    if response.status != "Success":
+                        error_class = response.status
                     if response.status != "Success" and aig.verbose:
                         print_response(test.messages, response)
                     else:
-                        aig.report_call_results(test, test.messages, test.tools, response)
+                        with stage("score"):
+                            detected_labels = aig.report_call_results(
+                                test, test.messages, test.tools, response, latency=latency, seq=seq
+                            )
                 except Exception as e:
-                    print(f"\n{DARK_RED}Error processing prompt {index + 1}/{total_rows}: {e}{RESET}")
-                    aig.add_error_response(
-                        "unavailable",
-                        {"messages": test.messages, "index": test.index, "label": test.label},
-                        PangeaResponse(
-                            request_id="unavailable",
-                            request_time=AwareDatetime.now(),
-                            response_time=AwareDatetime.now(),
-                            status="Error",
-                        ),
+                    error_class = aig.add_exception(
+                        test, e, f"{index + 1}/{total_rows}" if total_rows else f"{index + 1}"
                     )
+                finally:
+                    if detected_labels is None:
+                        aig.write_error_verdict(test, seq, error_class or "Unknown", latency)
+                    if progress is not None:
+                        progress.record(latency)
+                    if soak is not None:
+                        soak.record(index + 1, latency, error_class, detected_labels)
+                    if aig.tracer is not None:
+                        aig.tracer.finish_case(
+                            submitted,
+                            {
+                                "index": test.index,
+                                "seq": seq,
+                                "payload_bytes": len(json.dumps(test.messages, default=str)),
+                                "recipe": test.get_recipe(),
+                                "request_id": request_id,
+                                "latency_s": latency,
+                                "error": error_class,
+                            },
+                        )
+
+        def schedule(
+            deadline: float | None, stream: Iterator[TestCase] | None, skip: set[int]
+        ) -> Iterator[tuple[int, TestCase]]:
+            """
+            Yield (index, test) pairs: one pass, or repeated passes with --loop, until the deadline.
+            A stream is consumed as it is read; the caller's in-flight bound keeps read-ahead small.
+            Indexes in skip (cases carried over from the manifest) are left out.
+            """
+            if stream is not None:
+                for index, test in enumerate(stream):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return
+                    yield index, test
+                return
+            while self.tests:
+                for index, test in enumerate(self.tests):
+                    if index in skip:
+                        continue
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return
+                    yield index, test
+                if not args.loop:
+                    return
 
-        def process_prompts() -> None:
-            print(f"\nProcessing {len(self.tests)} prompts with {max_workers} workers")
-            total_rows = len(self.tests)
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(process_prompt, aig, test, index, total_rows)
-                    for index, test in enumerate(self.tests)
-                ]
-                for future in as_completed(futures):
-                    pass
+        def carry_over() -> set[int]:
+            """Score the cases the manifest has a response for; return their indexes."""
+            assert aig.manifest is not None
+            carried: set[int] = set()
+            for index, test in enumerate(self.tests):
+                record = aig.manifest.lookup(test)
+                if record is not None:
+                    test.index = index + 1
+                    self.score_stored_response(aig, test, record, seq=index)
+                    carried.add(index)
+            if aig.manifest.source is not None:
+                print(
+                    f"\nIncremental run: {len(carried)} of {len(self.tests)} test cases carried over from "
+                    f"{aig.manifest.source}, {len(self.tests) - len(carried)} to send"
+                )
+            return carried
+
+        def process_prompts(stream: Iterator[TestCase] | None = None) -> None:
+            nonlocal progress
+            total_rows = None if stream is not None else len(self.tests)
+            deadline = time.monotonic() + args.duration if args.duration else None
+            carried = carry_over() if aig.manifest is not None and stream is None else set()
+            to_send = None if total_rows is None else total_rows - len(carried)
+            if stream is not None:
+                print(f"\nStreaming prompts from stdin with {max_workers} workers")
+            elif args.loop:
+                print(
+                    f"\nLooping over {total_rows} prompts with {max_workers} workers"
+                    + (f" for {args.duration:.0f} seconds" if args.duration else " (Ctrl-C to stop)")
+                )
+            else:
+                print(f"\nProcessing {to_send} prompts with {max_workers} workers")
+            # Bound the number of queued requests so a long --loop run never builds up an unbounded backlog
+            in_flight = threading.BoundedSemaphore(max_workers * 2)
+            progress = ProgressRenderer(
+                total=None if args.loop else to_send,
+                efficacy=aig.efficacy,
+                deadline=deadline,
+                interval=defaults.progress_interval,
+                log_interval=defaults.progress_log_interval,
+            )
+            progress.start()
+            if soak is not None:
+                soak.start()
+            metrics: MetricsServer | None = None
+            if args.metrics_port is not None:
+                from aidr_aiguard_lab.output.metrics import MetricsServer
 
+                try:
+                    metrics = MetricsServer(aig, args.metrics_port)
+                except OSError as e:
+                    print(f"{DARK_RED}Error starting metrics endpoint on port {args.metrics_port}: {e}{RESET}")
+                else:
+                    metrics.progress = progress
+                    metrics.total_cases = progress.total
+                    metrics.start()
+            try:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    try:
+                        for seq, (index, test) in enumerate(schedule(deadline, stream, carried)):
+                            in_flight.acquire()
+                            # Carried-over cases took their own positions in the --output-jsonl order
+                            future = executor.submit(
+                                process_prompt,
+                                aig,
+                                test,
+                                index,
+                                total_rows,
+                                index if carried else seq,
+                                time.perf_counter(),
+                            )
+                            future.add_done_callback(lambda _: in_flight.release())
+                    except KeyboardInterrupt:
+                        print(f"\n{DARK_YELLOW}Interrupted, waiting for in-flight requests to finish...{RESET}")
+            finally:
+                progress.stop()
+                if metrics is not None:
+                    metrics.stop()
+                if soak is not None:
+                    soak.stop()
+                    soak.print_summary()
+
+        if args.input_file == "-":
+            # Test cases are scored as they arrive on stdin
+            system_prompt, recipe = self.apply_args_settings(args)
+            process_prompts(self.iter_test_cases(sys.stdin, recipe or defaults.default_recipe, system_prompt))
+        elif self.load_tests(args, aig):
+            process_prompts()
+        else:
+            if aig.manifest is not None:
+                aig.manifest.close()  # nothing recorded: the previous manifest is kept
+            return
+        aig.efficacy.print_errors()
+        aig.print_summary()
+
+    def apply_args_settings(self, args: AppArgs) -> tuple[str | None, str]:
+        """Apply the command line system prompt and recipe to self.settings; return both."""
         # If the system_prompt and/or recipe is given on the command line, use it.
         ## NOTE: DON'T force the system prompt unless --force-system-prompt is set.
         system_prompt = args.system_prompt
@@ -1045,6 +1434,14 @@ class AIGuardTests:
             self.settings.system_prompt = system_prompt
         if recipe:
             self.settings.recipe = recipe
+        return system_prompt, recipe
+
+    def load_tests(self, args: AppArgs, aig: AIGuardManager) -> bool:
+        """
+        Load the test cases of --prompt or --input-file (not stdin) into self.tests.
+        Returns False if the input could not be read.
+        """
+        system_prompt, recipe = self.apply_args_settings(args)
 
         # Single prompt
         if args.prompt:
@@ -1071,19 +1468,22 @@ class AIGuardTests:
                         # and we remove all labels.
                         test.label = []
                 self.tests.append(test)
-
-            process_prompts()
-            aig.efficacy.print_errors()
-            aig.print_summary()
-            return
+            return True
 
         # Otherwise, we read from input_file
         assert args.input_file is not None
         input_file = args.input_file
         file_extension = Path(input_file).suffix.lower()
+        load_start = time.perf_counter()
 
         if file_extension == ".json" or file_extension == ".jsonl":
-            self.load_from_file(input_file)
+            loaded = (
+                self.load_from_file_cached(input_file, args.dataset_cache)
+                if args.dataset_cache
+                else self.load_from_file(input_file)
+            )
+            if not loaded:
+                return False
             if args.debug:
                 print(f"Loaded {len(self.tests)} tests from {input_file}\n  Global Settings: {self.settings}")
 
@@ -1102,13 +1502,13 @@ class AIGuardTests:
                     }
                 else:
                     print("Error: CSV file does not contain headers.")
-                    return
+                    return False
                 system_prompt_field = normalized_fieldnames.get("system prompt")
                 prompt_field = normalized_fieldnames.get("user prompt")
                 injection_field = normalized_fieldnames.get("prompt injection")
                 if not prompt_field or not injection_field:
                     print(f"Error: Required columns not found. Available columns: {list(normalized_fieldnames.keys())}")
-                    return
+                    return False
                 prompts: list[tuple[str, str, bool | Any, list[object]]] = [
                     (
                         remove_outer_quotes(json.dumps(row[system_prompt_field].replace("\n", " ").replace("\r", " "))),
@@ -1141,28 +1541,97 @@ class AIGuardTests:
                 recipe = defaults.default_recipe
 
             print(f"Assuming text file input: {input_file}")
-            prompts = []
             with Path(input_file).open() as file:
                 for prompt in file:
-                    test = TestCase(
-                        messages=[{"role": "user", "content": prompt.strip().replace("\n", "").replace("\r", " ")}]
-                    )
-                    if system_prompt and system_prompt != "":
-                        test.ensure_system_message(system_prompt)
-                if self.args.assume_tps or self.args.assume_tns:
-                    if self.args.assume_tps:
-                        # If assume_tps is on, then we assume that the test case is a true positive
-                        # and we add the enabled detectors to the labels.
-                        for detector in aig.enabled_detectors:
-                            if detector not in test.label:
-                                test.label.append(detector)
-                    if self.args.assume_tns:
-                        # If assume_tns is on, then we assume that the test case is a true negative
-                        # and we remove all labels.
-                        test.label = []
-                    test.ensure_recipe(recipe)
-                    self.tests.append(test)
+                    self.tests.append(self._test_case_from_text(prompt, recipe, system_prompt))
 
-        process_prompts()
-        aig.efficacy.print_errors()
+        record_stage("load", load_start)
+        if args.near_dup_policy:
+            self.apply_near_dup_policy(args.near_dup_policy, args.near_dup_threshold)
+        return True
+
+    def apply_near_dup_policy(self, policy: str, threshold: float) -> None:
+        """
+        --near-dup-policy: cluster the loaded test cases into near-duplicates (see near_duplicate_clusters)
+        and print the clusters found. keep-one leaves only the first case of each cluster in self.tests;
+        weight gives each case 1 / its cluster size in the cluster-weighted metrics; report only reports.
+        """
+        from aidr_aiguard_lab.testcase.near_dup import case_text, near_duplicate_clusters
+
+        start = time.perf_counter()
+        clusters = near_duplicate_clusters(self.tests, threshold)
+        covered = sum(len(cluster) for cluster in clusters)
+        print(
+            f"\nNear-duplicates: {len(clusters)} clusters covering {covered} of {len(self.tests)} test cases "
+            f"(Jaccard >= {threshold:.2f}, {time.perf_counter() - start:.2f}s)"
+        )
+        if policy == "report":
+            for cluster in sorted(clusters, key=len, reverse=True)[: defaults.near_dup_examples]:
+                positions = ", ".join(str(i + 1) for i in cluster[:10]) + (", ..." if len(cluster) > 10 else "")
+                text = " ".join(case_text(self.tests[cluster[0]]).split())
+                print(f"\t{len(cluster)} test cases ({positions}): {text[:80]}")
+        elif policy == "weight":
+            for cluster in clusters:
+                for i in cluster:
+                    self.tests[i].weight = 1 / len(cluster)
+        elif policy == "keep-one":
+            dropped = {i for cluster in clusters for i in cluster[1:]}
+            self.tests = [test for i, test in enumerate(self.tests) if i not in dropped]
+            print(f"Left out {len(dropped)} near-duplicates, {len(self.tests)} test cases remain")
+
+    def score_stored_response(self, aig: AIGuardManager, test: TestCase, record: dict[str, Any], seq: int) -> None:
+        """Score a test case from a stored response record (--responses-out, --manifest) instead of calling AI Guard."""
+        with stage("parse"):
+            response = parse_guard_response(record["response"])
+        duration = get_duration(response, verbose=aig.verbose)
+        if duration > 0:
+            aig.add_total_calls()
+            aig.add_duration(duration)
+        with stage("score"):
+            aig.report_call_results(test, test.messages, test.tools, response, latency=record.get("latency"), seq=seq)
+
+    def rescore(self, args: AppArgs, aig: AIGuardManager, responses_path: str) -> None:
+        """
+        Score the responses stored by an earlier run (--responses-out) against the test cases of
+        args.input_file again, with this run's detector and label settings, without calling AI Guard.
+        A case is matched to its response by index, or by content hash if the case at that index differs.
+        """
+        assert args.input_file is not None
+        if Path(args.input_file).suffix.lower() not in (".json", ".jsonl"):
+            print(f"{DARK_RED}Error: rescore needs a .json or .jsonl dataset: {args.input_file}{RESET}")
+            return
+        try:
+            by_index, by_hash = load_responses(responses_path)
+        except (OSError, ValueError) as e:
+            print(f"{DARK_RED}Error reading responses: {e}{RESET}")
+            return
+
+        if args.system_prompt:
+            self.settings.system_prompt = args.system_prompt
+        elif args.force_system_prompt:
+            self.settings.system_prompt = defaults.default_system_prompt
+        if args.recipe:
+            self.settings.recipe = args.recipe
+        load_start = time.perf_counter()
+        if not self.load_from_file(args.input_file):
+            return
+        record_stage("load", load_start)
+
+        print(f"\nRescoring {len(self.tests)} prompts from {responses_path}")
+        missing = 0
+        for seq, test in enumerate(self.tests):
+            test.index = seq + 1
+            content_hash = test.content_hash()
+            record = by_index.get(test.index)
+            if record is None or record.get("content_hash") != content_hash:
+                record = by_hash.get(content_hash)
+            if record is None:
+                missing += 1
+                continue
+            self.score_stored_response(aig, test, record, seq)
+        if missing:
+            print(
+                f"{DARK_YELLOW}{missing} of {len(self.tests)} test cases have no stored response "
+                f"(failed or not run in the original run) and were skipped.{RESET}"
+            )
         aig.print_summary()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import functools
+import statistics
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.config.settings import Settings
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+from aidr_aiguard_lab.manager.results_diff import RunDiff
+from aidr_aiguard_lab.output.writers import JsonlWriter
+from aidr_aiguard_lab.utils.colors import BRIGHT_GREEN, DARK_YELLOW, GREEN, RESET
+from aidr_aiguard_lab.utils.histogram import LatencyHistogram
+from aidr_aiguard_lab.utils.progress import ProgressRenderer
+from aidr_aiguard_lab.utils.utils import rate_limited
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from typing import TextIO
+
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.api.pangea_api import GuardResponse
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+SIDES = ("A", "B")
+
+# Per-run output files; with --compare each side writes its own, tagged with the side name
+_SIDE_OUTPUTS = ("summary_report_file", "fps_out_csv", "fns_out_csv", "results_out", "responses_out", "metrics_json")
+
+
+def side_path(path: str, side: str) -> str:
+    """path with the side name after the first part of the file name: results.jsonl.gz -> results-a.jsonl.gz."""
+    p = Path(path)
+    head, dot, tail = p.name.partition(".")
+    return str(p.with_name(f"{head}-{side.lower()}{dot}{tail}"))
+
+
+def side_args(args: AppArgs, side: str, aidr_config: str) -> AppArgs:
+    """The arguments of one side of a --compare run: its AIDR config, report title and output files."""
+    update: dict[str, Any] = {
+        "aidr_config": aidr_config,
+        "report_title": f"[{side}] {args.report_title or aidr_config}",
+    }
+    for name in _SIDE_OUTPUTS:
+        path = getattr(args, name)
+        if path:
+            update[name] = side_path(path, side)
+    return args.model_copy(update=update)
+
+
+class PairedComparison(RunDiff):
+    """
+    --compare: one load of the dataset, every test case sent to two AIDR configurations (A, the
+    baseline, and B) back to back, under one shared --rps budget. The side that goes first alternates
+    from case to case, so neither one systematically gets the warmer connection or the earlier slot.
+
+    Each side is scored by its own AIGuardManager (its own tracker, summary and output files); their
+    results records are paired per case and counted as in the diff command (flips, McNemar tests on
+    the disagreements), along with per-side latency and the paired B - A latency differences.
+    """
+
+    def __init__(self, args: AppArgs, aidr_configs: tuple[str, str], stdout: TextIO | None = None) -> None:
+        super().__init__(*aidr_configs)
+        self.args = args
+        self.sides = [
+            AIGuardManager(side_args(args, side, config), stdout=stdout)
+            for side, config in zip(SIDES, aidr_configs, strict=True)
+        ]
+        self._lock = threading.Lock()
+        # (side, test index) -> results record, until the other side of the case is scored
+        self._records: dict[tuple[int, int], dict[str, Any]] = {}
+        for side, aig in enumerate(self.sides):
+            aig.result_hook = functools.partial(self._collect, side)
+        self.latency = [LatencyHistogram() for _ in SIDES]
+        self.latency_deltas = array("d")  # B - A per case both sides answered
+        self.tests: Sequence[TestCase] = []
+
+    def _collect(self, side: int, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._records[side, record["index"]] = record
+
+    def evaluate(self, flips_out: str | None = None, examples: int = defaults.diff_examples) -> bool:
+        """Load the dataset and evaluate it on both sides; False if the dataset could not be loaded."""
+        args = self.args
+        loader = AIGuardTests(Settings(args.system_prompt, args.recipe), self.sides[0], args)
+        if not loader.load_tests(args, self.sides[0]):
+            return False
+        self.tests = loader.tests
+        writer = JsonlWriter(flips_out) if flips_out else None
+        max_workers = max(int(args.rps), 1)
+        total = len(self.tests)
+
+        # Both sides' requests take from the same token bucket
+        @rate_limited(args.rps)
+        def send(aig: AIGuardManager, test: TestCase) -> tuple[GuardResponse, float]:
+            start = time.perf_counter()
+            response = aig.ai_guard_test(test)
+            return response, time.perf_counter() - start
+
+        def process_case(index: int, test: TestCase) -> None:
+            test.index = index + 1
+            latencies: list[float | None] = [None, None]
+            for side in (0, 1) if index % 2 == 0 else (1, 0):
+                aig = self.sides[side]
+                try:
+                    response, latencies[side] = send(aig, test)
+                    if response.status == "Success":
+                        aig.report_call_results(
+                            test, test.messages, test.tools, response, latency=latencies[side], seq=index
+                        )
+                except Exception as e:
+                    aig.add_exception(test, e, f"{index + 1}/{total}")
+            with self._lock:
+                base, cand = (self._records.pop((side, test.index), None) for side in (0, 1))
+                progress.record(latencies[0])
+                if base is None or cand is None:
+                    self.unscored += 1
+                    return
+                self.add_records(base, cand, writer, examples)
+                a, b = latencies
+                if a is not None and b is not None:
+                    self.latency[0].observe(a)
+                    self.latency[1].observe(b)
+                    self.latency_deltas.append(b - a)
+
+        print(f"\nComparing {total} prompts on {len(SIDES)} AIDR configs with {max_workers} workers")
+        in_flight = threading.BoundedSemaphore(max_workers * 2)
+        progress = ProgressRenderer(
+            total=total, interval=defaults.progress_interval, log_interval=defaults.progress_log_interval
+        )
+        progress.start()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                try:
+                    for index, test in enumerate(self.tests):
+                        in_flight.acquire()
+                        future = executor.submit(process_case, index, test)
+                        future.add_done_callback(lambda _: in_flight.release())
+                except KeyboardInterrupt:
+                    print(f"\n{DARK_YELLOW}Interrupted, waiting for in-flight requests to finish...{RESET}")
+        finally:
+            progress.stop()
+            if writer is not None:
+                writer.close()
+        self.tally()
+        return True
+
+    def print_summaries(self) -> None:
+        """Each side's regular summary (and output files), then the paired comparison."""
+        for aig in self.sides:
+            aig.efficacy.print_errors()
+            aig.print_summary()
+        self.print_report()
+
+    def print_header(self, writeln: Callable[[str], None]) -> None:
+        writeln(f"\n{BRIGHT_GREEN}AIGuard A/B Comparison{RESET}")
+        writeln(f"A (baseline): {self.baseline}")
+        writeln(f"B (candidate): {self.candidate}")
+        writeln(f"Test cases scored on both sides: {self.matched} of {len(self.tests)}")
+        if self.unscored:
+            writeln(f"{DARK_YELLOW}{self.unscored} test cases failed on at least one side and are left out{RESET}")
+        if not self.latency_deltas:
+            return
+        writeln(f"\n--{GREEN}Latency (seconds, cases answered by both):{RESET}--")
+        for side, histogram in zip(SIDES, self.latency, strict=True):
+            writeln(
+                f"{side}: mean {histogram.mean:.3f}  p50 {histogram.percentile(50):.3f}  "
+                f"p90 {histogram.percentile(90):.3f}  p99 {histogram.percentile(99):.3f}"
+            )
+        deltas = self.latency_deltas
+        faster = sum(1 for delta in deltas if delta < 0)
+        writeln(
+            f"B - A per case: mean {statistics.fmean(deltas):+.3f}  median {statistics.median(deltas):+.3f}  "
+            f"(B faster on {faster} of {len(deltas)})"
+        )
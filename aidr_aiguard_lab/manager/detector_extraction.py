@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from crowdstrike_aidr.models.ai_guard import Detectors
+
+from aidr_aiguard_lab.defaults import defaults
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Iterable
+
+DETECTOR_NAME_MAPPING = {
+    "malicious_prompt": "malicious-prompt",
+    "topic": "topic",
+    "confidential_and_pii_entity": "confidential-and-pii-entity",
+    "malicious_entity": "malicious-entity",
+    "mcp_validation": "mcp-validation",
+    "secret_and_key_entity": "secret-and-key-entity",
+}
+"""Detector name mapping"""
+
+
+@dataclass
+class DetectorExtraction:
+    """Everything report_call_results needs from a response's detectors, gathered in one pass."""
+
+    # detector name -> human-readable details, e.g. {"malicious_entity": ["URL: evil.example"]}
+    details: dict[str, list[str]] = field(default_factory=dict)
+    # canonical labels (detector names and topic:<name>) for efficacy scoring
+    labels: list[str] = field(default_factory=list)
+    # label -> highest confidence reported for it, where the API reports one
+    confidences: dict[str, float] = field(default_factory=dict)
+    # counter name -> items to count (see AIGuardManager.update_detected_counts)
+    counts: dict[str, list[str]] = field(default_factory=dict)
+    analyzers: list[tuple[str, float | None]] = field(default_factory=list)
+    topics: list[tuple[str, float | None]] = field(default_factory=list)
+    invalid_topics: list[str] = field(default_factory=list)
+
+    def add_confidence(self, label: str, confidence: float | None) -> None:
+        if confidence is not None and confidence > self.confidences.get(label, float("-inf")):
+            self.confidences[label] = confidence
+
+
+def _get(obj: Any, key: str) -> Any:
+    """Attribute access that works on both the typed response models and raw JSON dicts."""
+    if obj is None:
+        return None
+    if isinstance(obj, Mapping):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _entity_str(entity: Any) -> str:
+    if isinstance(entity, str):
+        return entity
+    text = f"{_get(entity, 'type')}: {_get(entity, 'value')}"
+    action = _get(entity, "action")
+    if action:
+        text += f" (action: {action})"
+    return text
+
+
+@dataclass(frozen=True)
+class _Extractor:
+    fn: Callable[[Any, DetectorExtraction, Collection[str]], list[str]]
+    counter: str | None = None  # counter the detail strings are added to
+    adds_labels: bool = False  # True if fn adds its own labels instead of the detector's mapped name
+
+
+_EXTRACTORS: dict[str, _Extractor] = {}
+
+
+def extractor(
+    *names: str, counter: str | None = None, adds_labels: bool = False
+) -> Callable[[Callable[[Any, DetectorExtraction, Collection[str]], list[str]]], Any]:
+    """Register fn as the detail extractor for the given detector names."""
+
+    def decorator(fn: Callable[[Any, DetectorExtraction, Collection[str]], list[str]]) -> Any:
+        for name in names:
+            _EXTRACTORS[name] = _Extractor(fn, counter=counter, adds_labels=adds_labels)
+        return fn
+
+    return decorator
+
+
+@extractor("malicious_prompt", "prompt_injection")
+def _malicious_prompt(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    details = []
+    for response in _get(data, "analyzer_responses") or []:
+        analyzer = _get(response, "analyzer") or "Unknown"
+        confidence = _get(response, "confidence")
+        details.append(f"analyzer: {analyzer}, confidence: {confidence if confidence is not None else 'Unknown'}")
+        out.analyzers.append((analyzer, confidence))
+        out.counts.setdefault("analyzers", []).append(analyzer)
+        out.add_confidence("malicious-prompt", confidence)
+    return details
+
+
+@extractor("topic", adds_labels=True, counter="topics")
+def _topic(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    details = []
+    for topic in _get(data, "topics") or []:
+        name = _get(topic, "topic")
+        if not name:
+            continue
+        confidence = _get(topic, "confidence")
+        details.append(name)
+        out.topics.append((name, confidence))
+        if name in valid_topics:
+            label = f"{defaults.topic_prefix}{name}"
+            if label not in out.labels:
+                out.labels.append(label)
+            out.add_confidence(label, confidence)
+        else:
+            out.invalid_topics.append(name)
+    return details
+
+
+@extractor("language", counter="languages")
+@extractor("code", counter="code_languages")
+def _languages(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    languages = _get(data, "languages")
+    if languages is None:
+        # Older responses report a single language
+        language = _get(data, "language")
+        return [language] if language else []
+    details = []
+    for language in languages:
+        name = _get(language, "language")
+        if name:
+            details.append(name)
+    return details
+
+
+@extractor("malicious_entity", counter="malicious_entities")
+@extractor("confidential_and_pii_entity", counter="confidential_and_pii_entities")
+@extractor("secret_and_key_entity", counter="secrets")
+@extractor("custom_entity", "competitors")
+def _entities(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    return [_entity_str(entity) for entity in _get(data, "entities") or []]
+
+
+@extractor("emoji")
+def _emoji(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    return [_get(emoji, "slug") or _get(emoji, "char") or "" for emoji in _get(data, "emojis") or []]
+
+
+@extractor("mcp_validation", counter="mcp_validations")
+def _default(data: Any, out: DetectorExtraction, valid_topics: Collection[str]) -> list[str]:
+    return [str(data)]
+
+
+_DEFAULT_EXTRACTOR = _Extractor(_default)
+
+
+# Raw JSON is walked in model field order so both paths produce labels in the same order.
+_DETECTOR_ORDER = tuple(Detectors.model_fields)
+_KNOWN_DETECTORS = frozenset(_DETECTOR_ORDER)
+
+
+def _iter_detectors(detectors: Any) -> Iterable[tuple[str, Any]]:
+    if isinstance(detectors, Mapping):
+        items = [(name, detectors[name]) for name in _DETECTOR_ORDER if name in detectors]
+        items.extend((name, d) for name, d in detectors.items() if name not in _KNOWN_DETECTORS)
+        return items
+    items = [(name, getattr(detectors, name, None)) for name in type(detectors).model_fields]
+    items.extend((getattr(detectors, "model_extra", None) or {}).items())
+    return items
+
+
+def extract_detectors(
+    detectors: Any,
+    valid_detectors: Collection[str] = frozenset(defaults.valid_detectors),
+    valid_topics: Collection[str] = frozenset(defaults.valid_topics),
+    topic_threshold: float | None = None,
+) -> DetectorExtraction:
+    """
+    Single pass over a response's detectors (typed Detectors model or raw JSON dict).
+    Only detectors with detected=true contribute. Labels are canonical: mapped detector names that
+    are valid detectors, and topic:<name> for valid topics, deduplicated in order.
+    With a topic_threshold, topic labels whose reported confidence is below it are not counted as
+    detected (topics reported without a confidence are kept); details still list every topic.
+    """
+    out = DetectorExtraction()
+    if not detectors:
+        return out
+
+    for name, detector in _iter_detectors(detectors):
+        if detector is None or not _get(detector, "detected"):
+            continue
+        spec = _EXTRACTORS.get(name, _DEFAULT_EXTRACTOR)
+        data = _get(detector, "data")
+        details = spec.fn(data, out, valid_topics) if data is not None else []
+        out.details[name] = details
+        if spec.counter and details:
+            out.counts.setdefault(spec.counter, []).extend(details)
+        if not spec.adds_labels:
+            label = DETECTOR_NAME_MAPPING.get(name, name)
+            if label in valid_detectors and label not in out.labels:
+                out.labels.append(label)
+    if topic_threshold is not None:
+        out.labels = [
+            label
+            for label in out.labels
+            if not label.startswith(defaults.topic_prefix)
+            or out.confidences.get(label, topic_threshold) >= topic_threshold
+        ]
+    return out
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
-import csv
 import json
 import sys
 import threading
 import time
 from collections import Counter, defaultdict
 from datetime import datetime
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import TYPE_CHECKING, TypedDict
+from typing import TYPE_CHECKING, Any, TypedDict
 
 from tzlocal import get_localzone
 
 from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.intervals import INTERVAL_METRICS, bootstrap_intervals, wilson_intervals
+from aidr_aiguard_lab.manager.outcome_matrix import OUTCOMES, OutcomeMatrix, macro_average, ratios
+from aidr_aiguard_lab.output.error_journal import ErrorJournal
+from aidr_aiguard_lab.output.writers import CsvWriter
 from aidr_aiguard_lab.utils.colors import (
     BRIGHT_GREEN,
     DARK_GREEN,
@@ -30,8 +34,9 @@ from aidr_aiguard_lab.utils.utils import (
 if TYPE_CHECKING:
     from collections.abc import Callable
 
-    from aidr_aiguard_lab._exceptions import RequestError
     from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.api.pangea_api import Message
+    from aidr_aiguard_lab.manager.intervals import Interval
     from aidr_aiguard_lab.testcase.testcase import TestCase
 
 
@@ -39,13 +44,28 @@ class EfficacyTracker:
     end_time: float | None = None
 
     class FailedTestCase:
+        """
+        Slim record of a scored test case: just what the summary needs.
+        The messages are only kept when --print-fps / --print-fns asked for them;
+        full rows go to the streaming --fps-out-csv / --fns-out-csv writers instead.
+        """
+
+        __slots__ = ("index", "expected_label", "detector_seen", "detector_not_seen", "messages", "tool_count")
+
         def __init__(
-            self, test: TestCase, expected_label: str = "", detector_seen: str = "", detector_not_seen: str = ""
+            self,
+            test: TestCase,
+            expected_label: str = "",
+            detector_seen: str = "",
+            detector_not_seen: str = "",
+            keep_messages: bool = False,
         ):
-            self.test: TestCase = test
+            self.index: int | None = test.index
             self.expected_label: str = expected_label
             self.detector_seen: str = detector_seen
             self.detector_not_seen: str = detector_not_seen
+            self.messages: list[Message] | None = test.messages[:3] if keep_messages else None
+            self.tool_count: int = len(test.tools)
 
     def __init__(
         self,
@@ -72,6 +92,12 @@ class EfficacyTracker:
         self.per_detector_fp = Counter[str]()
         self.per_detector_fn = Counter[str]()
         self.per_detector_tn = Counter[str]()
+        # Every case's outcomes (case x detector bits, plus its labels); the metrics are computed from this
+        self.outcomes = OutcomeMatrix()
+        # --near-dup-policy weight: per-detector [tp, fp, fn, tn] sums of the cases' cluster weights
+        self.weighted_counts: defaultdict[str, list[float]] | None = (
+            defaultdict(lambda: [0.0] * len(OUTCOMES)) if args and args.near_dup_policy == "weight" else None
+        )
 
         # Initialize label counts and stats
         self.label_counts = Counter[str]()
@@ -92,36 +118,86 @@ class EfficacyTracker:
         self.true_positives: list[EfficacyTracker.FailedTestCase] = []
         self.false_negatives: list[EfficacyTracker.FailedTestCase] = []
         self.true_negatives: list[EfficacyTracker.FailedTestCase] = []
+        # (test index, detector) keys already saved above, so dedupe is O(1) and
+        # repeated --loop passes over the same case don't grow the collections.
+        self._saved_fp_keys: set[tuple[int | None, str]] = set()
+        self._saved_fn_keys: set[tuple[int | None, str]] = set()
+        self._saved_tp_indexes: set[int | None] = set()
+        self._saved_tn_indexes: set[int | None] = set()
+        self._keep_fp_messages = bool(args and args.print_fps)
+        self._keep_fn_messages = bool(args and args.print_fns)
+
+        # FP/FN rows are streamed to the CSV files as cases are scored, so long runs can be
+        # followed with `tail -f` and nothing is lost if the run is interrupted.
+        self.fps_writer = self._open_cases_csv(args.fps_out_csv, positive=True) if args else None
+        self.fns_writer = self._open_cases_csv(args.fns_out_csv, positive=False) if args else None
 
         # Initialize error tracking
-        # TODO: Modify AIGuardManager to track these here.
-        self.error_responses: list[RequestError] = []
-        self.errors = Counter[str]()
+        # Errors are journaled to <summary_report_file>.errors.jsonl as they arrive; in memory only
+        # the most recent ones and the counts by status / error class are kept.
+        self.error_journal = ErrorJournal(
+            path=f"{args.summary_report_file}.errors.jsonl" if args and args.summary_report_file else None,
+            include_payloads=args.error_payloads if args else False,
+        )
+        self.errors = self.error_journal.by_status
+        self.error_responses = self.error_journal.recent
         self.blocked = 0
 
-    def add_false_positive(self, test: TestCase, detector_seen: str, expected_label: str) -> None:
+    def add_false_positive(
+        self,
+        test: TestCase,
+        detector_seen: str,
+        expected_label: str,
+        seen: set[str] | None = None,
+        row: dict[str, set[str]] | None = None,
+    ) -> None:
         """
         Add a test case to the false positives collection.
         This is used to track test cases where no detection was expected
         for the given detector, but detection was seen.
+        seen holds the detectors already counted as FPs while scoring this response (see update()),
+        so a detector is counted once per response; without it, once per test case.
+        row collects the case's outcomes for the outcome matrix (see update()).
         """
+        key = (test.index, detector_seen)
         with self._lock:
-            duplicate = any(fp.test == test and fp.detector_seen == detector_seen for fp in self.false_positives)
-            if not duplicate:
-                self.false_positives.append(
-                    EfficacyTracker.FailedTestCase(test, expected_label=expected_label, detector_seen=detector_seen)
-                )
-                # Increment counts only for a truly new FP
+            new_case = key not in self._saved_fp_keys
+            if seen is not None:
+                count = detector_seen not in seen
+                seen.add(detector_seen)
+            else:
+                count = new_case
+            if count:
                 self.fp_count += 1
                 self.per_detector_fp[detector_seen] += 1
                 self.label_stats[detector_seen]["FP"] += 1
+                if row is not None:
+                    row["fp"].add(detector_seen)
+            if new_case:
+                self._saved_fp_keys.add(key)
+                self.false_positives.append(
+                    EfficacyTracker.FailedTestCase(
+                        test,
+                        expected_label=expected_label,
+                        detector_seen=detector_seen,
+                        keep_messages=self._keep_fp_messages,
+                    )
+                )
+        if new_case and self.fps_writer:
+            self.fps_writer.write(self._case_csv_row(test, expected_label, detector_seen))
 
         if self.verbose:
             index = test.index if hasattr(test, "index") else "unknown"
             print(f"{DARK_RED}Test:{index}:FP: expected_label '{expected_label}' but detected '{detector_seen}'")
             print(f"\t{DARK_YELLOW}Messages:\n{DARK_RED}{formatted_json_str(test.messages[:3])}{RESET}")
 
-    def add_true_negative(self, test: TestCase, detector_not_seen: str, expected_label: str = "benign") -> None:
+    def add_true_negative(
+        self,
+        test: TestCase,
+        detector_not_seen: str,
+        expected_label: str = "benign",
+        row: dict[str, set[str]] | None = None,
+    ) -> None:
         """
         TODO: MAY NOT WANT TO DO THIS - COULD BE NOISY (at least not keep every test case)
         Add a test case to the true positives collection.
@@ -130,7 +206,8 @@ class EfficacyTracker:
         TODO: Get rid of FailedTestCase, since we've added detector_not_seen, etc. to the base TestCase class.
         """
         with self._lock:
-            if test not in self.true_negatives and self.track_tp_and_tn_cases:
+            if self.track_tp_and_tn_cases and test.index not in self._saved_tn_indexes:
+                self._saved_tn_indexes.add(test.index)
                 self.true_negatives.append(
                     EfficacyTracker.FailedTestCase(
                         test, expected_label=expected_label, detector_not_seen=detector_not_seen
@@ -138,45 +215,64 @@ class EfficacyTracker:
                 )
             self.tn_count += 1
             self.per_detector_tn[detector_not_seen] += 1
+        if row is not None:
+            row["tn"].add(detector_not_seen)
 
         if self.debug:
             print(f"{DARK_GREEN}TN: expected_label '{expected_label}' detected '{detector_not_seen}'")
             print(f"\t{DARK_YELLOW}Messages:\n{DARK_GREEN}{formatted_json_str(test.messages[:3])}{RESET}")
 
-    def add_true_positive(self, test: TestCase, detector_seen: str, expected_label: str) -> None:
+    def add_true_positive(
+        self, test: TestCase, detector_seen: str, expected_label: str, row: dict[str, set[str]] | None = None
+    ) -> None:
         """
         Add a test case to the true positives collection.
         This is used to track test cases where a detection was expected
         for detector_seen given expected_label, and it was seen.
         """
         with self._lock:
-            if test not in self.true_positives and self.track_tp_and_tn_cases:
+            if self.track_tp_and_tn_cases and test.index not in self._saved_tp_indexes:
+                self._saved_tp_indexes.add(test.index)
                 self.true_positives.append(
                     EfficacyTracker.FailedTestCase(test, expected_label=expected_label, detector_seen=detector_seen)
                 )
             self.tp_count += 1
             self.per_detector_tp[detector_seen] += 1
+        if row is not None:
+            row["tp"].add(detector_seen)
 
         if self.debug:
             print(f"{DARK_GREEN}TP: expected_label '{expected_label}' detected '{detector_seen}'")
             print(f"\t{DARK_YELLOW}Messages:\n{DARK_GREEN}{formatted_json_str(test.messages[:3])}{RESET}")
 
-    def add_false_negative(self, test: TestCase, detector_not_seen: str, expected_label: str) -> None:
+    def add_false_negative(
+        self, test: TestCase, detector_not_seen: str, expected_label: str, row: dict[str, set[str]] | None = None
+    ) -> None:
         """
         Add a test case to the false negatives collection.
         This is used to track test cases where a detection was expected for
         the given detector but was not seen.
         """
+        key = (test.index, detector_not_seen)
         with self._lock:
-            if not any(fn.test == test and fn.detector_not_seen == detector_not_seen for fn in self.false_negatives):
+            new_case = key not in self._saved_fn_keys
+            if new_case:
+                self._saved_fn_keys.add(key)
                 self.false_negatives.append(
                     EfficacyTracker.FailedTestCase(
-                        test, expected_label=expected_label, detector_not_seen=detector_not_seen
+                        test,
+                        expected_label=expected_label,
+                        detector_not_seen=detector_not_seen,
+                        keep_messages=self._keep_fn_messages,
                     )
                 )
             self.fn_count += 1
             self.per_detector_fn[detector_not_seen] += 1
             self.label_stats[detector_not_seen]["FN"] += 1
+        if row is not None:
+            row["fn"].add(detector_not_seen)
+        if new_case and self.fns_writer:
+            self.fns_writer.write(self._case_csv_row(test, expected_label, detector_not_seen))
 
         if self.verbose:
             index = test.index if hasattr(test, "index") else "unknown"
@@ -195,10 +291,12 @@ class EfficacyTracker:
         benign_labels: list[str] = defaults.benign_labels,
         malicious_prompt_labels: list[str] = defaults.malicious_prompt_labels,
         negative_labels: list[str] | None = None,
+        outcomes: dict[str, set[str]] | None = None,
     ) -> tuple[bool, bool, list[str], list[str]]:
         """
         Update efficacy statistics by comparing expected and actual detector results.
         Return FP_DETECTED, FN_DETECTED, FP_NAMES, FN_NAMES
+        If outcomes is given, it is filled with the detectors counted under each outcome ("tp", "fp", "fn", "tn").
 
         (ignore block vs report, and only apply malicious_prompt_labels and benign_labels to malicious-prompt detector):
         Label on a test case means a detector or topic of that name is expected as a TP
@@ -226,6 +324,11 @@ class EfficacyTracker:
 
         """
 
+        # Detectors already counted as FPs for this response (a detector can be flagged by more than one rule below)
+        fp_seen: set[str] = set()
+        # This case's outcomes, one row of the outcome matrix
+        row: dict[str, set[str]] = {outcome: set() for outcome in OUTCOMES}
+
         # Default negative_labels if none passed
         if negative_labels is None:
             negative_labels = [f"{defaults.not_topic_prefix}*"]  # default pattern
@@ -284,10 +387,15 @@ class EfficacyTracker:
         original_detected_labels = detected_detectors_labels.copy()  # keep for debug / reporting
         detected_detectors_labels = [_canon(lbl) for lbl in detected_detectors_labels]
 
-        # Build negative_label_map from original_labels (before canonicalization)
+        # Build negative_label_map from original_labels (before canonicalization). Only the not-topic labels
+        # matching one of the negative_labels patterns (shell-style wildcards) expect no detection.
         negative_label_map: dict[str, str] = {}
         for lbl in original_labels:
-            if isinstance(lbl, str) and lbl.startswith("not-topic:"):
+            if (
+                isinstance(lbl, str)
+                and lbl.startswith("not-topic:")
+                and any(fnmatchcase(lbl, pattern) for pattern in negative_labels)
+            ):
                 detector_name = _canon(lbl.replace("not-", "", 1))
                 negative_label_map[detector_name] = lbl
 
@@ -328,9 +436,13 @@ class EfficacyTracker:
             negative_label_map["malicious-prompt"] = "not-malicious-prompt"
 
             if "malicious-prompt" in detected_detectors_labels:
-                self.add_false_positive(test, expected_label="malicious-prompt", detector_seen="malicious-prompt")
+                self.add_false_positive(
+                    test, expected_label="malicious-prompt", detector_seen="malicious-prompt", seen=fp_seen, row=row
+                )
             else:
-                self.add_true_negative(test, expected_label="malicious-prompt", detector_not_seen="malicious-prompt")
+                self.add_true_negative(
+                    test, expected_label="malicious-prompt", detector_not_seen="malicious-prompt", row=row
+                )
             # Remove helper labels to prevent double-counting downstream
             expected_labels = [
                 lbl for lbl in expected_labels if lbl not in ("malicious-prompt", "not-malicious-prompt")
@@ -344,7 +456,7 @@ class EfficacyTracker:
                 print(f"original_labels={original_labels}")
                 print(f"detected_detectors_labels={detected_detectors_labels}")
             for detected in detected_detectors_labels:
-                self.add_false_positive(test, expected_label="benign", detector_seen=detected)
+                self.add_false_positive(test, expected_label="benign", detector_seen=detected, seen=fp_seen, row=row)
             expected_labels.clear()
             negative_label_map.clear()
 
@@ -394,7 +506,7 @@ class EfficacyTracker:
                 tp_detected = True
                 found_tp.add(expected)
 
-                self.add_true_positive(test, expected_label=expected, detector_seen=expected)
+                self.add_true_positive(test, expected_label=expected, detector_seen=expected, row=row)
             else:
                 # If the expected label is not in the detected labels, it's a False Negative
                 if self.debug:
@@ -409,7 +521,7 @@ class EfficacyTracker:
                 fn_detected = True
                 found_fn.add(expected)
 
-                self.add_false_negative(test, detector_not_seen=expected, expected_label=expected)
+                self.add_false_negative(test, detector_not_seen=expected, expected_label=expected, row=row)
 
         # --------------------------------------------------------------
         # Any detection that does not match an expected label is a False Positive.
@@ -419,7 +531,11 @@ class EfficacyTracker:
                 fp_detected = True
                 found_fp.add(detected)
                 self.add_false_positive(
-                    test, expected_label=f"{defaults.not_topic_prefix}{detected}", detector_seen=detected
+                    test,
+                    expected_label=f"{defaults.not_topic_prefix}{detected}",
+                    detector_seen=detected,
+                    seen=fp_seen,
+                    row=row,
                 )
             # else: would have already been counted as a TP above
 
@@ -435,6 +551,8 @@ class EfficacyTracker:
                     test,
                     expected_label=neg_label,
                     detector_seen=neg_detector,
+                    seen=fp_seen,
+                    row=row,
                 )
             else:
                 # Correctly silent → TN
@@ -444,6 +562,7 @@ class EfficacyTracker:
                     test,
                     expected_label=neg_label,
                     detector_not_seen=neg_detector,
+                    row=row,
                 )
 
         # No fallback creation of TNs for "benign/topic" when not referenced.
@@ -459,7 +578,7 @@ class EfficacyTracker:
                     )
                 fp_detected = True
                 found_fp.add(unexpected)
-                self.add_false_positive(test, expected_label="benign", detector_seen=unexpected)
+                self.add_false_positive(test, expected_label="benign", detector_seen=unexpected, seen=fp_seen, row=row)
         # else: expected_labels not empty  →  extras are ignored
 
         # ---------------------------------------------------------
@@ -522,17 +641,26 @@ class EfficacyTracker:
             # No bucket was incremented. Guarantee a count.
             if expected_labels and detected_detectors_labels:
                 tp_detected = True
-                self.add_true_positive(test, detector_seen="benign", expected_label="benign")
+                self.add_true_positive(test, detector_seen="benign", expected_label="benign", row=row)
                 if self.debug:
                     print(f"{DARK_YELLOW}Fallback: counted as TP{RESET}")
             else:
                 tn_detected = True
                 # Count a TN under the *malicious‑prompt* detector,
                 # since the benign test implicitly expects it to stay silent.
-                self.add_true_negative(test, detector_not_seen="malicious-prompt", expected_label="benign")
+                self.add_true_negative(test, detector_not_seen="malicious-prompt", expected_label="benign", row=row)
                 if self.debug:
                     print(f"{DARK_YELLOW}Fallback: counted as TN for malicious-prompt{RESET}")
 
+        with self._lock:
+            self.outcomes.add_row(original_labels, row)
+            if self.weighted_counts is not None:
+                for o, outcome in enumerate(OUTCOMES):
+                    for detector in row[outcome]:
+                        self.weighted_counts[detector][o] += test.weight
+        if outcomes is not None:
+            outcomes.update(row)
+
         return (fp_detected, fn_detected, fp_names, fn_names)
 
     class MetricsDict(TypedDict, total=False):
@@ -580,51 +708,33 @@ class EfficacyTracker:
         tn_test_count = len(self.true_negatives)
         total_test_count = fp_test_count + fn_test_count + tp_test_count + tn_test_count
 
-        tp = self.tp_count
-        fp = self.fp_count
-        fn = self.fn_count
-        tn = self.tn_count
-        total = tp + fp + fn + tn
-
-        fp_rate = fp / (fp + tn) if (fp + tn) else 0
-        fn_rate = fn / (tp + fn) if (tp + fn) else 0
-        precision = tp / (tp + fp) if (tp + fp) else 0
-        recall = tp / (tp + fn) if (tp + fn) else 0
-        f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0
-        accuracy = (tp + tn) / (tp + fp + fn + tn) if (tp + fp + fn + tn) else 0
-        specificity = tn / (tn + fp) if (tn + fp) else 0
+        with self._lock:
+            per_detector = self.outcomes.detector_counts()
+        tp, fp, fn, tn = (sum(counts[o] for counts in per_detector.values()) for o in range(len(OUTCOMES)))
         # TODO: Ensure that the overall_metrics are only calculated against per-test case metrics,
         # not the overall counts.
         # Each test case can have multiple labels and there can be tps, tns, fps, fns for each label.
         # So we need to calculate the metrics for each label, detector, and topic separately.
-        overall_metrics: EfficacyTracker.MetricsDict = {
-            "accuracy": accuracy,
-            "precision": precision,
-            "recall": recall,
-            "f1_score": f1,
-            "specificity": specificity,
-            "fp_rate": fp_rate,
-            "fn_rate": fn_rate,
-            "total_count": total,
-            "tp_count": self.tp_count,
-            "tn_count": self.tn_count,
-            "fp_count": self.fp_count,
-            "fn_count": self.fn_count,
-            "avg_duration": self.duration_sum / self.total_calls if self.total_calls else 0.0,
-            "total_calls": self.total_calls,
-            "total_saved_test_count": total_test_count,
-            "fp_saved_test_count": fp_test_count,
-            "fn_saved_test_count": fn_test_count,
-            "tp_saved_test_count": tp_test_count,
-            "tn_saved_test_count": tn_test_count,
-            "tp_detector_summary": f"{dict(self.per_detector_tp)}",
-            "fp_detector_summary": f"{dict(self.per_detector_fp)}",
-            "fn_detector_summary": f"{dict(self.per_detector_fn)}",
-            "tn_detector_summary": f"{dict(self.per_detector_tn)}",
-        }
+        overall_metrics = self._metrics_for_counts(tp, fp, fn, tn)
+        overall_metrics.update(
+            {
+                "avg_duration": self.duration_sum / self.total_calls if self.total_calls else 0.0,
+                "total_calls": self.total_calls,
+                "total_saved_test_count": total_test_count,
+                "fp_saved_test_count": fp_test_count,
+                "fn_saved_test_count": fn_test_count,
+                "tp_saved_test_count": tp_test_count,
+                "tn_saved_test_count": tn_test_count,
+                "tp_detector_summary": f"{dict(self.per_detector_tp)}",
+                "fp_detector_summary": f"{dict(self.per_detector_fp)}",
+                "fn_detector_summary": f"{dict(self.per_detector_fn)}",
+                "tn_detector_summary": f"{dict(self.per_detector_tn)}",
+            }
+        )
         all_metrics["overall"] = overall_metrics
 
-        # Per-detector metrics
+        # Per-detector metrics. Detectors only named in negative labels have zero-count entries in the
+        # per-detector Counters (see update()) but no column in the outcome matrix; report them too.
         all_detectors = (
             set(self.per_detector_tp)
             | set(self.per_detector_fp)
@@ -632,36 +742,94 @@ class EfficacyTracker:
             | set(self.per_detector_tn)
         )
         for detector in all_detectors:
-            tp = self.per_detector_tp[detector]
-            fp = self.per_detector_fp[detector]
-            fn = self.per_detector_fn[detector]
-            tn = self.per_detector_tn[detector]
-            total = tp + fp + fn + tn
-            fp_rate = fp / (fp + tn) if (fp + tn) else 0
-            fn_rate = fn / (tp + fn) if (tp + fn) else 0
-            precision = tp / (tp + fp) if (tp + fp) else 0
-            recall = tp / (tp + fn) if (tp + fn) else 0
-            f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0
-            accuracy = (tp + tn) / (tp + fp + fn + tn) if (tp + fp + fn + tn) else 0
-            specificity = tn / (tn + fp) if (tn + fp) else 0
-            det_metrics: EfficacyTracker.MetricsDict = {
-                "accuracy": accuracy,
-                "precision": precision,
-                "recall": recall,
-                "f1_score": f1,
-                "specificity": specificity,
-                "fp_rate": fp_rate,
-                "fn_rate": fn_rate,
-                "total_count": total,
-                "tp_count": tp,
-                "tn_count": tn,
-                "fp_count": fp,
-                "fn_count": fn,
-            }
-            all_metrics[detector] = det_metrics
+            all_metrics[detector] = self._metrics_for_counts(*per_detector.get(detector, (0, 0, 0, 0)))
 
         return all_metrics
 
+    @staticmethod
+    def _metrics_for_counts(tp: int, fp: int, fn: int, tn: int) -> EfficacyTracker.MetricsDict:
+        r = ratios(tp, fp, fn, tn)
+        return {
+            "accuracy": r["accuracy"],
+            "precision": r["precision"],
+            "recall": r["recall"],
+            "f1_score": r["f1_score"],
+            "specificity": r["specificity"],
+            "fp_rate": r["fp_rate"],
+            "fn_rate": r["fn_rate"],
+            "total_count": tp + fp + fn + tn,
+            "tp_count": tp,
+            "tn_count": tn,
+            "fp_count": fp,
+            "fn_count": fn,
+        }
+
+    def confidence_intervals(
+        self, metrics: dict[str, EfficacyTracker.MetricsDict]
+    ) -> dict[str, dict[str, dict[str, Interval]]]:
+        """
+        Confidence intervals for --bootstrap / --metrics-json: name -> metric -> {"bootstrap": (low, high),
+        "wilson": (low, high)}. Bootstrap intervals are only computed with --bootstrap; Wilson intervals
+        only exist for the metrics that are proportions (not F1).
+        """
+        if not self.args or not (self.args.bootstrap or self.args.metrics_json):
+            return {}
+        confidence = self.args.confidence
+        resampled: dict[str, dict[str, Interval]] = {}
+        if self.args.bootstrap:
+            with self._lock:
+                resampled = bootstrap_intervals(self.outcomes, self.args.bootstrap, confidence, defaults.bootstrap_seed)
+        out: dict[str, dict[str, dict[str, Interval]]] = {}
+        for name, m in metrics.items():
+            tp, fp, fn, tn = m["tp_count"], m["fp_count"], m["fn_count"], m["tn_count"]
+            wilson = wilson_intervals(tp, fp, fn, tn, confidence)
+            # A metric with a zero denominator is reported as 0; it gets no interval.
+            defined = [metric for metric in INTERVAL_METRICS if metric in wilson or (metric == "f1_score" and tp)]
+            for metric in defined:
+                bounds = {"bootstrap": resampled[name][metric]} if metric in resampled.get(name, {}) else {}
+                if metric in wilson:
+                    bounds["wilson"] = wilson[metric]
+                if bounds:
+                    out.setdefault(name, {})[metric] = bounds
+        return out
+
+    def write_metrics_json(
+        self,
+        path: str,
+        metrics: dict[str, EfficacyTracker.MetricsDict],
+        intervals: dict[str, dict[str, dict[str, Interval]]],
+        macro: dict[str, float],
+    ) -> None:
+        """Write the summary metrics, with their confidence intervals, as JSON (--metrics-json)."""
+        report: dict[str, Any] = {
+            "report_title": self.args.report_title if self.args else None,
+            "generated_at": datetime.now(get_localzone()).isoformat(),
+            "input_file": self.args.input_file if self.args else None,
+            "total_calls": self.total_calls,
+            "errors": dict(self.errors),
+            "confidence": self.args.confidence if self.args else None,
+            "bootstrap_replicates": self.args.bootstrap if self.args else 0,
+            "metrics": {
+                name: {
+                    **{key: value for key, value in m.items() if not key.endswith("_summary")},
+                    "intervals": {
+                        metric: {kind: list(bounds) for kind, bounds in per_kind.items()}
+                        for metric, per_kind in intervals.get(name, {}).items()
+                    },
+                }
+                for name, m in metrics.items()
+            },
+            "macro_average": macro,
+        }
+        try:
+            with Path(path).open(mode="w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+        except OSError as e:
+            print(f"{DARK_RED}Error writing metrics JSON: {e}{RESET}")
+            return
+        print(f"{DARK_GREEN}Metrics written to {path}{RESET}")
+
     def print_errors(self) -> None:
         if len(self.errors) == 0:
             return
@@ -680,25 +848,10 @@ class EfficacyTracker:
                 except Exception as e:
                     print(f"Error in print_errors: {e}")
                     print(f"Error response: {error_pair}")
-        # TODO: Make this happen as errors are added to the collection
-        #       and flush to disk so callers can monitor errors in real-time.
-        if self.args and self.args.summary_report_file:
-            error_report_file = self.args.summary_report_file + ".errors.txt"
-            with Path(error_report_file).open(mode="w") as f:
-                f.write("\nErrors:\n")
-                for error_pair in self.error_responses:
-                    try:
-                        f.write(f"Request ID: {error_pair.request_id}\n")
-                        f.write("Request Data:\n")
-                        formatted_json_request = json.dumps(error_pair.request_body, indent=4)
-                        f.write(f"{formatted_json_request}\n")
-                        f.write("Response:\n")
-                        formatted_json_error = json.dumps(error_pair.response_body, indent=4)
-                        f.write(f"{formatted_json_error}\n")
-                        f.write("-" * 50 + "\n")
-                    except Exception as e:
-                        f.write(f"Error in print_errors: {e}\n")
-                        f.write(f"Error response: {error_pair}\n")
+        if self.error_journal.by_class:
+            print(f"{DARK_RED}Errors by class: {dict(self.error_journal.by_class)}{RESET}")
+        if self.error_journal.writer is not None:
+            print(f"{DARK_YELLOW}Error journal: {self.error_journal.writer.path}{RESET}")
 
     def print_stats(self, enabled_detectors: list[str] | None = None) -> None:
         """Print a summary of the efficacy statistics.
@@ -723,6 +876,15 @@ class EfficacyTracker:
                 enabled_detectors.remove("not-malicious-prompt")
 
             metrics = self.calculate_metrics()
+            intervals = self.confidence_intervals(metrics)
+            show_intervals = bool(self.args and self.args.bootstrap)
+
+            def ci(detector: str, metric: str) -> str:
+                bounds = intervals.get(detector, {}).get(metric) if show_intervals else None
+                if not bounds:
+                    return ""
+                return "  [" + ", ".join(f"{kind} {low:.4f}-{high:.4f}" for kind, (low, high) in bounds.items()) + "]"
+
             writeln(f"\n{BRIGHT_GREEN}AIGuard Efficacy Report{RESET}")
             if self.args and self.args.report_title:
                 writeln(f"{self.args.report_title}")
@@ -740,6 +902,11 @@ class EfficacyTracker:
             if self.end_time and self.start_time:
                 writeln(f"Total duration: {self.end_time - self.start_time:.2f} seconds")
             writeln(f"\n{RED}Errors: {self.errors}{RESET}")
+            if show_intervals and self.args:
+                writeln(
+                    f"Confidence intervals: {self.args.confidence:.0%}, percentile bootstrap over "
+                    f"{self.args.bootstrap} resamples of the test cases, and Wilson score"
+                )
 
             for detector, det_metrics in metrics.items():
                 # Filter unused detectors
@@ -762,13 +929,15 @@ class EfficacyTracker:
                 writeln(f"{DARK_GREEN}True Negatives: {det_metrics['tn_count']}{RESET}")
                 writeln(f"{DARK_RED}False Positives: {det_metrics['fp_count']}{RESET}")
                 writeln(f"{DARK_RED}False Negatives: {det_metrics['fn_count']}{RESET}")
-                writeln(f"\nAccuracy: {DARK_GREEN}{det_metrics['accuracy']:.4f}{RESET}")
-                writeln(f"Precision: {DARK_GREEN}{det_metrics['precision']:.4f}{RESET}")
-                writeln(f"Recall: {DARK_GREEN}{det_metrics['recall']:.4f}{RESET}")
-                writeln(f"F1 Score: {DARK_GREEN}{det_metrics['f1_score']:.4f}{RESET}")
-                writeln(f"Specificity: {DARK_GREEN}{det_metrics['specificity']:.4f}{RESET}")
-                writeln(f"False Positive Rate: {DARK_RED}{det_metrics['fp_rate']:.4f}{RESET}")
-                writeln(f"False Negative Rate: {DARK_RED}{det_metrics['fn_rate']:.4f}{RESET}")
+                writeln(f"\nAccuracy: {DARK_GREEN}{det_metrics['accuracy']:.4f}{RESET}{ci(detector, 'accuracy')}")
+                writeln(f"Precision: {DARK_GREEN}{det_metrics['precision']:.4f}{RESET}{ci(detector, 'precision')}")
+                writeln(f"Recall: {DARK_GREEN}{det_metrics['recall']:.4f}{RESET}{ci(detector, 'recall')}")
+                writeln(f"F1 Score: {DARK_GREEN}{det_metrics['f1_score']:.4f}{RESET}{ci(detector, 'f1_score')}")
+                writeln(
+                    f"Specificity: {DARK_GREEN}{det_metrics['specificity']:.4f}{RESET}{ci(detector, 'specificity')}"
+                )
+                writeln(f"False Positive Rate: {DARK_RED}{det_metrics['fp_rate']:.4f}{RESET}{ci(detector, 'fp_rate')}")
+                writeln(f"False Negative Rate: {DARK_RED}{det_metrics['fn_rate']:.4f}{RESET}{ci(detector, 'fn_rate')}")
                 if detector == "overall":
                     writeln(f"\n{GREEN}-- Info on Test Cases Saved for Reporting {RESET}--")
                     writeln(f"track_tp_and_tn_cases: {self.track_tp_and_tn_cases}")
@@ -785,6 +954,27 @@ class EfficacyTracker:
                     writeln(f"{DARK_RED}Summary of Per-detector FNs: {det_metrics['fn_detector_summary']}{RESET}")
                     writeln(f"\n{DARK_GREEN}Summary of Per-detector TPs: {det_metrics['tp_detector_summary']}{RESET}")
                     writeln(f"{DARK_GREEN}Summary of Per-detector TNs: {det_metrics['tn_detector_summary']}{RESET}")
+            reported = [
+                det_metrics
+                for detector, det_metrics in metrics.items()
+                if detector in enabled_detectors and det_metrics["total_count"]
+            ]
+            macro = macro_average(reported) if len(reported) > 1 else {}
+            if macro:
+                writeln(f"\n--{GREEN}Macro Average ({len(reported)} detectors):{RESET}--")
+                writeln(f"Precision: {DARK_GREEN}{macro['precision']:.4f}{RESET}")
+                writeln(f"Recall: {DARK_GREEN}{macro['recall']:.4f}{RESET}")
+                writeln(f"F1 Score: {DARK_GREEN}{macro['f1_score']:.4f}{RESET}")
+                writeln(f"Specificity: {DARK_GREEN}{macro['specificity']:.4f}{RESET}")
+            if self.weighted_counts is not None:
+                self._print_weighted_stats(writeln, enabled_detectors)
+            if self.args and self.args.metrics_json:
+                self.write_metrics_json(
+                    self.args.metrics_json,
+                    {d: m for d, m in metrics.items() if d == "overall" or d in enabled_detectors},
+                    intervals,
+                    macro,
+                )
             if self.args and self.args.print_label_stats:
                 self._print_label_stats(writeln=writeln)
             if self.args and self.args.print_fps:
@@ -794,11 +984,11 @@ class EfficacyTracker:
                 else:
                     for fp_case in self.false_positives:
                         writeln(
-                            f"{DARK_RED}Test Case: {fp_case.test.index}, "
+                            f"{DARK_RED}Test Case: {fp_case.index}, "
                             f"Expected Label: {fp_case.expected_label}, "
                             f"Detected: {fp_case.detector_seen}"
                         )
-                        writeln(f"\tMessages: {formatted_json_str(fp_case.test.messages[:3])}")
+                        writeln(f"\tMessages: {formatted_json_str(fp_case.messages)}")
             if self.args and self.args.print_fns:
                 writeln(f"\n--{GREEN}False Negatives:{RESET}--")
                 if not self.false_negatives:
@@ -806,12 +996,12 @@ class EfficacyTracker:
                 else:
                     for fn_case in self.false_negatives:
                         writeln(
-                            f"{DARK_RED}Test Case: {fn_case.test.index}, "
+                            f"{DARK_RED}Test Case: {fn_case.index}, "
                             f"Expected Label: {fn_case.expected_label}, "
                             f"Not Detected: {fn_case.detector_not_seen}"
                         )
-                        writeln(f"\tMessages: {formatted_json_str(fn_case.test.messages[:3])}")
-                        writeln(f"\tTools: {len(fn_case.test.tools)}")
+                        writeln(f"\tMessages: {formatted_json_str(fn_case.messages)}")
+                        writeln(f"\tTools: {fn_case.tool_count}")
 
         """ print_stats() body here"""
         self.end_time = time.time()
@@ -829,90 +1019,54 @@ class EfficacyTracker:
                 print(line)
 
             _print_all_stats(writeln)
-        # print fps_out_csv and fns_out_csv if specified
-        if self.args and self.args.fps_out_csv:
-            fps_out_csv = self.args.fps_out_csv
-            EfficacyTracker.print_cases_csv(
-                fps_out_csv,
-                positive=True,  # True for false positives
-                cases=self.false_positives,
-            )
-        if self.args and self.args.fns_out_csv:
-            fns_out_csv = self.args.fns_out_csv
-            EfficacyTracker.print_cases_csv(
-                fns_out_csv,
-                positive=False,  # False for false negatives
-                cases=self.false_negatives,
-            )
+        self.close_writers()
 
     @staticmethod
-    def print_cases_csv(out_csv: str, positive: bool, cases: list[EfficacyTracker.FailedTestCase]) -> str | None:
-        """
-        Print test cases (false positives, false negatives, etc.) to a CSV file.
-
-        Args:
-            out_csv (str): Output CSV file path.
-            cases (list): List of EfficacyTracker.FailedTestCase objects.
-        """
+    def _open_cases_csv(out_csv: str | None, positive: bool) -> CsvWriter | None:
+        """Open a streaming CSV writer for false positives or false negatives, if requested."""
+        if not out_csv:
+            return None
         if not out_csv.endswith(".csv"):
             out_csv += ".csv"
+        header = [
+            "Test Case Index",
+            "Test Messages",
+            "System Prompt",
+            "Expected Label",
+            "Test Case Labels",
+            "FP Detector" if positive else "FN Detector",
+        ]
         try:
-            with Path(out_csv).open(mode="w", newline="", encoding="utf-8") as csvfile:
-                csvwriter = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
-                csvwriter.writerow(
-                    [
-                        "Test Case Index",
-                        "Test Messages",
-                        "System Prompt",
-                        "Expected Label",
-                        "Test Case Labels",
-                        "FP Detector" if positive else "FN Detector",
-                    ]
-                )
-                for case in cases:
-                    messages = (
-                        case.test.messages if case.test.messages else [{"role": "user", "content": "No User Message"}]
-                    )
-                    # Join all user messages for context, sanitize to remove newlines and carriage returns
-                    test_case_messages = (
-                        " | ".join(
-                            msg["content"].replace("\n", " ").replace("\r", " ")
-                            for msg in messages
-                            if msg.get("role") == "user"
-                        )
-                        or "No Messages"
-                    )
-                    test_case_index = case.test.index if getattr(case.test, "index", None) is not None else "N/A"
-                    expected_labels = (
-                        ",".join(case.expected_label) if isinstance(case.expected_label, list) else case.expected_label
-                    )
-                    test_case_labels = (
-                        ",".join(case.test.label) if isinstance(case.test.label, list) else case.test.label
-                    )
-                    system_prompt = case.test.get_system_message()
-                    system_prompt = system_prompt.replace("\n", " ").replace("\r", " ")
-
-                    # Use detector_seen if present, else detector_not_seen; always a string.
-                    detector_field = getattr(case, "detector_seen" if positive else "detector_not_seen", None)
-                    detected_detectors = detector_field
-                    csvwriter.writerow(
-                        [
-                            test_case_index,
-                            test_case_messages,
-                            system_prompt,
-                            expected_labels,
-                            test_case_labels,
-                            detected_detectors,
-                        ]
-                    )
-            if positive:
-                print(f"{DARK_GREEN}FPs written to {out_csv}{RESET}")
-            else:
-                print(f"{DARK_GREEN}FNs written to {out_csv}{RESET}")
-        except Exception as e:
+            return CsvWriter(out_csv, header)
+        except OSError as e:
             print(f"{DARK_RED}Error writing to CSV: {e}{RESET}")
             return None
-        return out_csv
+
+    @staticmethod
+    def _case_csv_row(test: TestCase, expected_label: str, detector: str) -> list[object]:
+        """Build an FP/FN CSV row; done on the scoring thread so the writer never touches the TestCase."""
+        messages = test.messages if test.messages else [{"role": "user", "content": "No User Message"}]
+        # Join all user messages for context, sanitize to remove newlines and carriage returns
+        test_case_messages = (
+            " | ".join(
+                msg["content"].replace("\n", " ").replace("\r", " ") for msg in messages if msg.get("role") == "user"
+            )
+            or "No Messages"
+        )
+        test_case_index = test.index if test.index is not None else "N/A"
+        test_case_labels = ",".join(test.label) if isinstance(test.label, list) else test.label
+        system_prompt = test.get_system_message().replace("\n", " ").replace("\r", " ")
+        return [test_case_index, test_case_messages, system_prompt, expected_label, test_case_labels, detector]
+
+    def close_writers(self) -> None:
+        """Flush and close the streaming FP/FN CSV files and the error journal."""
+        self.error_journal.close()
+        if self.fps_writer and not self.fps_writer.closed:
+            self.fps_writer.close()
+            print(f"{DARK_GREEN}FPs written to {self.fps_writer.path}{RESET}")
+        if self.fns_writer and not self.fns_writer.closed:
+            self.fns_writer.close()
+            print(f"{DARK_GREEN}FNs written to {self.fns_writer.path}{RESET}")
 
     def print_fns_csv(self, fns_out_csv: str) -> None:
         """Print false negatives to a CSV file."""
@@ -922,17 +1076,48 @@ class EfficacyTracker:
         with Path(fns_out_csv).open(mode="w") as f:
             f.write("Test Case Index,Expected Label,Not Detected Detector\n")
             for fn_case in self.false_negatives:
-                f.write(f"{fn_case.test.index},{fn_case.expected_label},{fn_case.detector_not_seen}\n")
+                f.write(f"{fn_case.index},{fn_case.expected_label},{fn_case.detector_not_seen}\n")
         print(f"{DARK_GREEN}False negatives written to {fns_out_csv}{RESET}")
 
+    def _print_weighted_stats(self, writeln: Callable[[str], None], enabled_detectors: list[str]) -> None:
+        """Print the cluster-weighted counts and ratios, overall and per enabled detector."""
+        assert self.weighted_counts is not None
+        with self._lock:
+            per_detector = {detector: list(counts) for detector, counts in self.weighted_counts.items()}
+        overall = [sum(counts[o] for counts in per_detector.values()) for o in range(len(OUTCOMES))]
+        writeln(f"\n--{GREEN}Cluster-Weighted Metrics (each near-duplicate cluster counts as one test case):{RESET}--")
+        for name, counts in [("overall", overall), *sorted(per_detector.items())]:
+            if name != "overall" and name not in enabled_detectors:
+                continue
+            tp, fp, fn, tn = counts
+            r = ratios(tp, fp, fn, tn)
+            writeln(
+                f"\t{name}: TP: {tp:.2f}, FP: {fp:.2f}, FN: {fn:.2f}, TN: {tn:.2f}, "
+                f"Precision: {r['precision']:.4f}, Recall: {r['recall']:.4f}, F1: {r['f1_score']:.4f}, "
+                f"FP Rate: {r['fp_rate']:.4f}, FN Rate: {r['fn_rate']:.4f}"
+            )
+
     def _print_label_stats(self, writeln: Callable[[str], None]) -> None:
         """Print label-wise false positives and false negatives."""
         writeln(f"\n--{GREEN}Label-wise False Positives and False Negatives:{RESET}--")
         if not self.label_stats:
             writeln(f"{DARK_YELLOW}No label stats available.{RESET}")
+        else:
+            writeln(f"Label Stats: {dict(self.label_stats)}")
+            for label, stats in self.label_stats.items():
+                fp = stats.get("FP", 0)
+                fn = stats.get("FN", 0)
+                writeln(f"\tLabel: {label}, False Positives: {fp}, False Negatives: {fn}")
+
+        # Outcomes of the cases carrying each test case label, summed over detectors
+        with self._lock:
+            per_label = self.outcomes.label_counts()
+        if not per_label:
             return
-        writeln(f"Label Stats: {dict(self.label_stats)}")
-        for label, stats in self.label_stats.items():
-            fp = stats.get("FP", 0)
-            fn = stats.get("FN", 0)
-            writeln(f"\tLabel: {label}, False Positives: {fp}, False Negatives: {fn}")
+        writeln(f"\n--{GREEN}Per-label Metrics (test case labels):{RESET}--")
+        for label, (cases, (tp, fp, fn, tn)) in sorted(per_label.items()):
+            r = ratios(tp, fp, fn, tn)
+            writeln(
+                f"\tLabel: {label}, Cases: {cases}, TP: {tp}, FP: {fp}, FN: {fn}, TN: {tn}, "
+                f"Precision: {r['precision']:.4f}, Recall: {r['recall']:.4f}, F1: {r['f1_score']:.4f}"
+            )
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import math
+import random
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.manager.outcome_matrix import OUTCOMES, optional_numpy, ratios
+
+if TYPE_CHECKING:
+    from aidr_aiguard_lab.manager.outcome_matrix import OutcomeMatrix
+
+Interval = tuple[float, float]
+
+# Metrics that are proportions: metric -> (numerator outcomes, denominator outcomes). F1 is not one,
+# so it only gets a bootstrap interval.
+PROPORTIONS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "accuracy": (("tp", "tn"), ("tp", "fp", "fn", "tn")),
+    "precision": (("tp",), ("tp", "fp")),
+    "recall": (("tp",), ("tp", "fn")),
+    "specificity": (("tn",), ("tn", "fp")),
+    "fp_rate": (("fp",), ("fp", "tn")),
+    "fn_rate": (("fn",), ("tp", "fn")),
+}
+INTERVAL_METRICS = ("accuracy", "precision", "recall", "f1_score", "specificity", "fp_rate", "fn_rate")
+
+# Upper bound on the replicates x patterns weight matrix drawn at once (elements)
+_BATCH_ELEMENTS = 1 << 22
+
+
+def wilson_interval(successes: int, trials: int, confidence: float) -> Interval | None:
+    """Wilson score interval for a binomial proportion; None when there are no trials."""
+    if trials <= 0:
+        return None
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return (max(0.0, center - half), min(1.0, center + half))
+
+
+def wilson_intervals(tp: int, fp: int, fn: int, tn: int, confidence: float) -> dict[str, Interval]:
+    """Wilson intervals for the proportion metrics of one set of counts (metrics without trials are left out)."""
+    counts = dict(zip(OUTCOMES, (tp, fp, fn, tn), strict=True))
+    out: dict[str, Interval] = {}
+    for metric, (numerator, denominator) in PROPORTIONS.items():
+        interval = wilson_interval(sum(counts[o] for o in numerator), sum(counts[o] for o in denominator), confidence)
+        if interval is not None:
+            out[metric] = interval
+    return out
+
+
+def mcnemar_p_value(worse: int, better: int) -> float:
+    """
+    Two-sided McNemar test p-value for a paired comparison of two runs over the same cases:
+    worse / better are the cases that flipped one way / the other. Exact binomial test for up to
+    1000 flipped cases, chi-square with continuity correction beyond that.
+    """
+    flipped = worse + better
+    if flipped == 0:
+        return 1.0
+    if flipped <= 1000:
+        tail = sum(math.comb(flipped, k) for k in range(min(worse, better) + 1))
+        return min(1.0, 2 * tail / 2**flipped)
+    z = max(abs(worse - better) - 1, 0) / math.sqrt(flipped)
+    return math.erfc(z / math.sqrt(2))
+
+
+def bootstrap_intervals(
+    matrix: OutcomeMatrix, replicates: int, confidence: float, seed: int = 0
+) -> dict[str, dict[str, Interval]]:
+    """
+    Percentile bootstrap intervals, resampling test cases with replacement, for "overall" (counts summed
+    over detectors, as in the summary) and every detector in the matrix: name -> metric -> (low, high).
+
+    A resample of the cases is a multinomial draw over the matrix's distinct row patterns, so each
+    replicate costs one draw per pattern, independent of the number of cases. With NumPy all replicates
+    are drawn and scored as arrays; without it the same is done per replicate in Python.
+    """
+    names = [*matrix.detectors, "overall"]
+
+    def detector_names(masks: tuple[int, ...]) -> list[list[str]]:
+        return [sorted(name for c, name in enumerate(names[:-1]) if mask >> c & 1) for mask in masks]
+
+    # Column and pattern order depend on the order cases completed in; sort so a seed gives the same draws.
+    patterns = sorted(matrix.row_patterns(), key=lambda pattern: detector_names(pattern[1]))
+    if replicates <= 0 or not patterns:
+        return {}
+    # cells[k]: (flat index into outcome x name counts, multiplicity) for the bits set in pattern k
+    width = len(names)
+    cells: list[list[tuple[int, int]]] = []
+    for _, masks in patterns:
+        pattern_cells: list[tuple[int, int]] = []
+        for o, mask in enumerate(masks):
+            if mask:
+                pattern_cells.append((o * width + width - 1, mask.bit_count()))
+            while mask:
+                low = mask & -mask
+                pattern_cells.append((o * width + low.bit_length() - 1, 1))
+                mask ^= low
+        cells.append(pattern_cells)
+    counts = [count for count, _ in patterns]
+    low_q, high_q = (1 - confidence) / 2, (1 + confidence) / 2
+
+    np = optional_numpy()
+    if np is not None:
+        bounds = _bootstrap_numpy(np, counts, cells, width, replicates, (low_q, high_q), seed)
+    else:
+        bounds = _bootstrap_python(counts, cells, width, replicates, (low_q, high_q), seed)
+    return {
+        name: {metric: (bounds[metric][0][i], bounds[metric][1][i]) for metric in INTERVAL_METRICS}
+        for i, name in enumerate(names)
+    }
+
+
+def _bootstrap_numpy(
+    np: Any,
+    counts: list[int],
+    cells: list[list[tuple[int, int]]],
+    width: int,
+    replicates: int,
+    quantiles: tuple[float, float],
+    seed: int,
+) -> dict[str, list[list[float]]]:
+    bits = np.zeros((len(cells), len(OUTCOMES) * width))
+    for k, pattern_cells in enumerate(cells):
+        for index, multiplicity in pattern_cells:
+            bits[k, index] = multiplicity
+    cases = sum(counts)
+    probabilities = np.array(counts, dtype=np.float64) / cases
+    rng = np.random.default_rng(seed)
+    batch = max(1, _BATCH_ELEMENTS // len(cells))
+    totals = np.concatenate(
+        [
+            rng.multinomial(cases, probabilities, size=min(batch, replicates - start)) @ bits
+            for start in range(0, replicates, batch)
+        ]
+    ).reshape(replicates, len(OUTCOMES), width)
+    tp, fp, fn, tn = (totals[:, o, :] for o in range(len(OUTCOMES)))
+
+    def div(a: Any, b: Any) -> Any:
+        return np.divide(a, b, out=np.zeros_like(a, dtype=np.float64), where=b > 0)
+
+    precision, recall = div(tp, tp + fp), div(tp, tp + fn)
+    values = {
+        "accuracy": div(tp + tn, tp + fp + fn + tn),
+        "precision": precision,
+        "recall": recall,
+        "f1_score": div(2 * precision * recall, precision + recall),
+        "specificity": div(tn, tn + fp),
+        "fp_rate": div(fp, fp + tn),
+        "fn_rate": div(fn, tp + fn),
+    }
+    return {metric: np.quantile(v, quantiles, axis=0).tolist() for metric, v in values.items()}
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    # Linear interpolation between order statistics, as numpy.quantile does by default
+    position = q * (len(ordered) - 1)
+    below = math.floor(position)
+    above = min(below + 1, len(ordered) - 1)
+    return ordered[below] + (ordered[above] - ordered[below]) * (position - below)
+
+
+def _bootstrap_python(
+    counts: list[int],
+    cells: list[list[tuple[int, int]]],
+    width: int,
+    replicates: int,
+    quantiles: tuple[float, float],
+    seed: int,
+) -> dict[str, list[list[float]]]:
+    rng = random.Random(seed)
+    cases = sum(counts)
+    samples: dict[str, list[list[float]]] = {metric: [[] for _ in range(width)] for metric in INTERVAL_METRICS}
+    for _ in range(replicates):
+        # Multinomial draw as a chain of binomials
+        totals = [0] * (len(OUTCOMES) * width)
+        remaining, mass = cases, 1.0
+        for k, count in enumerate(counts):
+            if not remaining:
+                break
+            p = count / cases
+            drawn = (
+                remaining
+                if k == len(counts) - 1
+                else rng.binomialvariate(remaining, min(1.0, p / mass) if mass > 0 else 1.0)
+            )
+            remaining -= drawn
+            mass -= p
+            if drawn:
+                for index, multiplicity in cells[k]:
+                    totals[index] += drawn * multiplicity
+        for i in range(width):
+            values = ratios(*(totals[o * width + i] for o in range(len(OUTCOMES))))
+            for metric in INTERVAL_METRICS:
+                samples[metric][i].append(values[metric])
+    out: dict[str, list[list[float]]] = {}
+    for metric, per_name in samples.items():
+        ordered = [sorted(values) for values in per_name]
+        out[metric] = [[_percentile(values, q) for values in ordered] for q in quantiles]
+    return out
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.config.settings import Settings
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+from aidr_aiguard_lab.manager.compare import side_args
+from aidr_aiguard_lab.utils.colors import BRIGHT_GREEN, DARK_YELLOW, RESET
+from aidr_aiguard_lab.utils.histogram import LatencyHistogram
+from aidr_aiguard_lab.utils.progress import ProgressRenderer
+from aidr_aiguard_lab.utils.utils import rate_limited
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from typing import TextIO
+
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.api.pangea_api import GuardResponse
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+# Variant names end up in output file names
+_VARIANT_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(slots=True)
+class Variant:
+    """One row of a --matrix file: an AIDR config (JSON string or file, as for --aidr-config) and its rate cap."""
+
+    name: str
+    aidr_config: str
+    rps: int
+
+
+def load_matrix(path: str, default_rps: int) -> list[Variant]:
+    """
+    Read a --matrix file: a JSON list of variants, or an object with a "variants" list. Each variant
+    has an "aidr_config" (object, JSON string or file path) and optionally a "name" and an "rps" cap
+    (default: --rps). Raises ValueError if the file is not a valid matrix.
+    """
+    try:
+        with Path(path).open(encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"cannot read {path}: {e}") from e
+    entries = data.get("variants") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must contain a non-empty list of variants")
+
+    variants: list[Variant] = []
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or "aidr_config" not in entry:
+            raise ValueError(f"variant {i}: expected an object with an aidr_config")
+        name = str(entry.get("name") or f"v{i}")
+        if not _VARIANT_NAME.match(name):
+            raise ValueError(f"variant {i}: name {name!r} may only contain letters, digits, '_', '.' and '-'")
+        if any(v.name == name for v in variants):
+            raise ValueError(f"variant {i}: duplicate name {name!r}")
+        aidr_config = entry["aidr_config"]
+        if isinstance(aidr_config, dict):
+            aidr_config = json.dumps(aidr_config)
+        elif not isinstance(aidr_config, str):
+            raise ValueError(f"variant {name}: aidr_config must be an object, a JSON string or a file path")
+        rps = entry.get("rps", default_rps)
+        if not isinstance(rps, int) or not 1 <= rps <= defaults.max_rps:
+            raise ValueError(f"variant {name}: rps must be an integer from 1 to {defaults.max_rps}")
+        variants.append(Variant(name=name, aidr_config=aidr_config, rps=rps))
+    return variants
+
+
+class MatrixRun:
+    """
+    --matrix: one load of the dataset, every (test case, variant) pair evaluated in one pass.
+
+    Each variant is scored by its own AIGuardManager (its own EfficacyTracker, summary and output
+    files, tagged with the variant name) and has its own rate cap. One scheduler thread per variant
+    feeds a single worker pool, bounded per variant, so a variant with a low cap never holds up the
+    others; all requests go through the same pooled API client. The combined report has one row per
+    variant.
+    """
+
+    def __init__(self, args: AppArgs, variants: list[Variant], stdout: TextIO | None = None) -> None:
+        self.args = args
+        self.variants = variants
+        self.managers = [AIGuardManager(side_args(args, v.name, v.aidr_config), stdout=stdout) for v in variants]
+        self._lock = threading.Lock()
+        self.latency = [LatencyHistogram() for _ in variants]
+        self.scored = [0] * len(variants)
+        self.failed = [0] * len(variants)
+        self.tests: Sequence[TestCase] = []
+
+    def evaluate(self) -> bool:
+        """Load the dataset and evaluate it on every variant; False if the dataset could not be loaded."""
+        args = self.args
+        loader = AIGuardTests(Settings(args.system_prompt, args.recipe), self.managers[0], args)
+        if not loader.load_tests(args, self.managers[0]):
+            return False
+        self.tests = loader.tests
+        # The test cases are shared by the variants' workers: settle their labels before scoring starts
+        for test in self.tests:
+            self.managers[0].update_test_labels_from_expected_detectors(test)
+
+        total = len(self.tests)
+        max_workers = sum(v.rps for v in self.variants)
+        print(
+            f"\nEvaluating {total} prompts on {len(self.variants)} AIDR config variants "
+            f"({total * len(self.variants)} requests) with {max_workers} workers"
+        )
+        progress = ProgressRenderer(
+            total=total * len(self.variants),
+            interval=defaults.progress_interval,
+            log_interval=defaults.progress_log_interval,
+        )
+
+        def process_case(v: int, send: Callable[..., tuple[GuardResponse, float]], index: int, test: TestCase) -> None:
+            aig = self.managers[v]
+            test.index = index + 1
+            latency: float | None = None
+            detected: list[str] | None = None
+            try:
+                response, latency = send(aig, test)
+                if response.status == "Success":
+                    detected = aig.report_call_results(
+                        test, test.messages, test.tools, response, latency=latency, seq=index
+                    )
+            except Exception as e:
+                aig.add_exception(test, e, f"{index + 1}/{total} ({self.variants[v].name})")
+            with self._lock:
+                if detected is None:
+                    self.failed[v] += 1
+                else:
+                    self.scored[v] += 1
+                if latency is not None:
+                    self.latency[v].observe(latency)
+            progress.record(latency)
+
+        def schedule(v: int, executor: ThreadPoolExecutor, stop: threading.Event) -> None:
+            variant = self.variants[v]
+
+            @rate_limited(variant.rps, bucket=f"matrix:{variant.name}")
+            def send(aig: AIGuardManager, test: TestCase) -> tuple[GuardResponse, float]:
+                start = time.perf_counter()
+                response = aig.ai_guard_test(test)
+                return response, time.perf_counter() - start
+
+            in_flight = threading.BoundedSemaphore(variant.rps * 2)
+            for index, test in enumerate(self.tests):
+                in_flight.acquire()
+                if stop.is_set():
+                    return
+                try:
+                    future = executor.submit(process_case, v, send, index, test)
+                except RuntimeError:
+                    # The executor is already shutting down
+                    return
+                future.add_done_callback(lambda _: in_flight.release())
+
+        progress.start()
+        stop = threading.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                schedulers = [
+                    threading.Thread(target=schedule, args=(v, executor, stop), daemon=True)
+                    for v in range(len(self.variants))
+                ]
+                for thread in schedulers:
+                    thread.start()
+                try:
+                    for thread in schedulers:
+                        thread.join()
+                except KeyboardInterrupt:
+                    stop.set()
+                    print(f"\n{DARK_YELLOW}Interrupted, waiting for in-flight requests to finish...{RESET}")
+                    # Each scheduler returns once its next in-flight slot frees up, before the executor shuts down
+                    for thread in schedulers:
+                        thread.join()
+        finally:
+            progress.stop()
+        return True
+
+    def print_summaries(self) -> None:
+        """Each variant's regular summary (and output files), then one row per variant."""
+        for aig in self.managers:
+            aig.efficacy.print_errors()
+            aig.print_summary()
+        self.print_report()
+
+    def print_report(self, writeln: Callable[[str], None] = print) -> None:
+        writeln(f"\n{BRIGHT_GREEN}AIGuard Variant Matrix{RESET}")
+        writeln(f"Test cases: {len(self.tests)}, variants: {len(self.variants)}")
+        header = (
+            f"{'variant':<20}{'rps':>5}{'scored':>8}{'failed':>8}{'tp':>7}{'fp':>7}{'fn':>7}{'tn':>7}"
+            f"{'accuracy':>10}{'precision':>10}{'recall':>8}{'f1':>8}{'fp_rate':>9}{'fn_rate':>9}"
+            f"{'p50 s':>8}{'p99 s':>8}"
+        )
+        writeln(header)
+        writeln("-" * len(header))
+        for v, (variant, aig) in enumerate(zip(self.variants, self.managers, strict=True)):
+            m = aig.efficacy.calculate_metrics()["overall"]
+            writeln(
+                f"{variant.name:<20.20}{variant.rps:>5}{self.scored[v]:>8}{self.failed[v]:>8}"
+                f"{m['tp_count']:>7}{m['fp_count']:>7}{m['fn_count']:>7}{m['tn_count']:>7}"
+                f"{m['accuracy']:>10.4f}{m['precision']:>10.4f}{m['recall']:>8.4f}{m['f1_score']:>8.4f}"
+                f"{m['fp_rate']:>9.4f}{m['fn_rate']:>9.4f}"
+                f"{self.latency[v].percentile(50):>8.3f}{self.latency[v].percentile(99):>8.3f}"
+            )
+        for variant in self.variants:
+            writeln(f"  {variant.name}: {variant.aidr_config}")
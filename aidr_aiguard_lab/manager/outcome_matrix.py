@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import importlib
+from array import array
+from collections import Counter
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+# Outcome order used in every counts list: [tp, fp, fn, tn]
+OUTCOMES = ("tp", "fp", "fn", "tn")
+
+_WORD_BITS = 64
+_WORD_MASK = (1 << _WORD_BITS) - 1
+# Below this many new rows the pure-Python bit loop is faster than setting up NumPy arrays.
+_NUMPY_MIN_ROWS = 2048
+
+_numpy: Any = None
+
+
+def optional_numpy() -> Any | None:
+    """NumPy if it is installed (it is optional), else None; the result is cached."""
+    global _numpy
+    if _numpy is None:
+        try:
+            _numpy = importlib.import_module("numpy")
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def ratios(tp: float, fp: float, fn: float, tn: float) -> dict[str, float]:
+    """The efficacy ratios for one set of counts (or weighted counts); a ratio with a zero denominator is 0."""
+    precision = tp / (tp + fp) if (tp + fp) else 0
+    recall = tp / (tp + fn) if (tp + fn) else 0
+    total = tp + fp + fn + tn
+    return {
+        "accuracy": (tp + tn) / total if total else 0,
+        "precision": precision,
+        "recall": recall,
+        "f1_score": 2 * precision * recall / (precision + recall) if (precision + recall) else 0,
+        "specificity": tn / (tn + fp) if (tn + fp) else 0,
+        "fp_rate": fp / (fp + tn) if (fp + tn) else 0,
+        "fn_rate": fn / (tp + fn) if (tp + fn) else 0,
+    }
+
+
+def macro_average(per_detector: Iterable[Mapping[str, Any]]) -> dict[str, float]:
+    """Unweighted mean of each ratio over the given detectors (or labels)."""
+    rows = list(per_detector)
+    if not rows:
+        return {}
+    return {name: sum(row[name] for row in rows) / len(rows) for name in ratios(0, 0, 0, 0)}
+
+
+class OutcomeMatrix:
+    """
+    Scored outcomes as a compact cases x detectors bit matrix.
+
+    Each detector is a column; for every case (row) four bitmasks record which detectors were a TP,
+    FP, FN or TN for it. Masks are stored 64 columns to a machine word in array('Q') buffers, so a
+    million cases with up to 64 detectors take 32 MB. Each row also stores the id of its label set
+    (the case's normalized labels, interned).
+
+    All metrics are derived from one intermediate table: outcome counts per label set and detector.
+    It is built in a single pass over the rows (vectorized with NumPy when installed, otherwise a
+    bit loop), and only rows added since the last build are aggregated. Since the number of distinct
+    label sets is small, per-detector, per-label, per-slice and macro-averaged metrics, with any
+    label filter or label mapping, are then computed from the table without touching the rows.
+
+    Not thread-safe: callers serialize add_row() and the count queries.
+    """
+
+    def __init__(self) -> None:
+        self.detectors: list[str] = []
+        self._columns: dict[str, int] = {}
+        # _masks[word][outcome][row]: bit (column % 64) of word (column // 64)
+        self._masks: list[list[array[int]]] = []
+        self.label_sets: list[tuple[str, ...]] = []
+        self._label_set_ids: dict[tuple[str, ...], int] = {}
+        self._row_label_set = array("I")
+        self.label_set_rows: list[int] = []
+        self.rows = 0
+        # _table[label set][outcome][column], covering the first _table_rows rows
+        self._table: list[list[list[int]]] = []
+        self._table_rows = 0
+
+    def _add_column(self, detector: str) -> int:
+        column = self._columns[detector] = len(self.detectors)
+        self.detectors.append(detector)
+        if column // _WORD_BITS >= len(self._masks):
+            self._masks.append([array("Q", bytes(8 * self.rows)) for _ in OUTCOMES])
+        return column
+
+    def _add_label_set(self, key: tuple[str, ...]) -> int:
+        # Label sets are keyed by the labels as given and by their sorted, deduplicated form,
+        # so the sort only happens the first time a given label list is seen.
+        label_set = tuple(sorted(set(key)))
+        set_id = self._label_set_ids.get(label_set)
+        if set_id is None:
+            set_id = self._label_set_ids[label_set] = len(self.label_sets)
+            self.label_sets.append(label_set)
+            self.label_set_rows.append(0)
+        self._label_set_ids[key] = set_id
+        return set_id
+
+    def add_row(self, labels: Iterable[str], outcomes: Mapping[str, Iterable[str]]) -> None:
+        """Append one scored case: its labels and the detectors per outcome name ("tp", "fp", "fn", "tn")."""
+        key = tuple(labels)
+        set_id = self._label_set_ids.get(key)
+        if set_id is None:
+            set_id = self._add_label_set(key)
+        self.label_set_rows[set_id] += 1
+        columns = self._columns
+        masks = []
+        for name in OUTCOMES:
+            mask = 0
+            for detector in outcomes.get(name, ()):
+                column = columns.get(detector)
+                mask |= 1 << (self._add_column(detector) if column is None else column)
+            masks.append(mask)
+        self._row_label_set.append(set_id)
+        if len(self._masks) == 1:
+            for column_masks, mask in zip(self._masks[0], masks, strict=True):
+                column_masks.append(mask)
+        else:
+            for w, word in enumerate(self._masks):
+                shift = w * _WORD_BITS
+                for column_masks, mask in zip(word, masks, strict=True):
+                    column_masks.append((mask >> shift) & _WORD_MASK)
+        self.rows += 1
+
+    def label_set_counts(self) -> list[list[list[int]]]:
+        """Outcome counts as table[label set id][outcome][column], aggregating rows added since the last call."""
+        table = self._table
+        columns = len(self.detectors)
+        for cells in table:
+            for counts in cells:
+                counts.extend([0] * (columns - len(counts)))
+        table.extend([[0] * columns for _ in OUTCOMES] for _ in range(len(self.label_sets) - len(table)))
+        start = self._table_rows
+        if start < self.rows:
+            np = optional_numpy()
+            if np is not None and self.rows - start >= _NUMPY_MIN_ROWS:
+                self._aggregate_numpy(np, start)
+            else:
+                self._aggregate_python(start)
+            self._table_rows = self.rows
+        return table
+
+    def _aggregate_python(self, start: int) -> None:
+        table, set_ids = self._table, self._row_label_set
+        for w, word in enumerate(self._masks):
+            base = w * _WORD_BITS
+            for o, column_masks in enumerate(word):
+                for row in range(start, self.rows):
+                    mask = column_masks[row]
+                    if not mask:
+                        continue
+                    counts = table[set_ids[row]][o]
+                    while mask:
+                        low = mask & -mask
+                        counts[base + low.bit_length() - 1] += 1
+                        mask ^= low
+
+    def _aggregate_numpy(self, np: Any, start: int) -> None:
+        # Rows repeat a few distinct (label set, mask) pairs: count the pairs, then expand each distinct
+        # mask into its bits once and add the bits, weighted by the pair counts, into the label set's row.
+        sets = len(self.label_sets)
+        set_ids = np.frombuffer(self._row_label_set, dtype=np.uint32)[start : self.rows].astype(np.int64)
+        for w, word in enumerate(self._masks):
+            base = w * _WORD_BITS
+            width = min(_WORD_BITS, len(self.detectors) - base)
+            for o, column_masks in enumerate(word):
+                words = np.frombuffer(column_masks, dtype=np.uint64)[start : self.rows]
+                if not words.any():
+                    continue
+                masks, mask_ids = np.unique(words, return_inverse=True)
+                pairs, pair_counts = np.unique(mask_ids.astype(np.int64) * sets + set_ids, return_counts=True)
+                as_bytes = masks.astype("<u8").view(np.uint8).reshape(-1, 8)
+                bits = np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :width]
+                sums = np.zeros((sets, width), dtype=np.int64)
+                np.add.at(sums, pairs % sets, bits[pairs // sets] * pair_counts[:, None])
+                for set_id, row_sums in enumerate(sums.tolist()):
+                    counts = self._table[set_id][o]
+                    for c, n in enumerate(row_sums, base):
+                        counts[c] += n
+
+    def detector_counts(self, include: Callable[[tuple[str, ...]], bool] | None = None) -> dict[str, list[int]]:
+        """Detector -> [tp, fp, fn, tn] over the cases whose label set passes include (all cases by default)."""
+        table = self.label_set_counts()
+        totals = [[0] * len(OUTCOMES) for _ in self.detectors]
+        for set_id, labels in enumerate(self.label_sets):
+            if include is not None and not include(labels):
+                continue
+            for o, counts in enumerate(table[set_id]):
+                for c, n in enumerate(counts):
+                    if n:
+                        totals[c][o] += n
+        return dict(zip(self.detectors, totals, strict=True))
+
+    def label_counts(
+        self,
+        label_map: Mapping[str, str | None] | None = None,
+        include: Callable[[tuple[str, ...]], bool] | None = None,
+    ) -> dict[str, tuple[int, list[int]]]:
+        """
+        Label -> (cases, [tp, fp, fn, tn] summed over detectors) for the cases carrying that label.
+        label_map renames labels (e.g. synonyms onto one name) or drops them (mapped to None or "").
+        """
+        table = self.label_set_counts()
+        out: dict[str, tuple[int, list[int]]] = {}
+        for set_id, labels in enumerate(self.label_sets):
+            if include is not None and not include(labels):
+                continue
+            mapped = {label_map.get(label, label) for label in labels} if label_map else set(labels)
+            set_totals = [sum(counts) for counts in table[set_id]]
+            for label in mapped:
+                if not label:
+                    continue
+                cases, totals = out.get(label, (0, [0] * len(OUTCOMES)))
+                out[label] = (
+                    cases + self.label_set_rows[set_id],
+                    [a + b for a, b in zip(totals, set_totals, strict=True)],
+                )
+        return out
+
+    def slice_counts(self, slice_of: Callable[[tuple[str, ...]], str | None]) -> dict[str, dict[str, list[int]]]:
+        """Slice -> detector -> [tp, fp, fn, tn], where slice_of names each label set's slice (None skips it)."""
+        slices: dict[str, set[tuple[str, ...]]] = {}
+        for labels in self.label_sets:
+            name = slice_of(labels)
+            if name is not None:
+                slices.setdefault(name, set()).add(labels)
+        return {name: self.detector_counts(members.__contains__) for name, members in slices.items()}
+
+    def row_patterns(self) -> list[tuple[int, tuple[int, ...]]]:
+        """
+        The distinct rows, ignoring labels: (number of cases, (tp, fp, fn, tn) masks over all columns).
+        Resampling cases is resampling these patterns, which are far fewer than the cases.
+        """
+        if not self.rows:
+            return []
+        if not self._masks:
+            return [(self.rows, (0,) * len(OUTCOMES))]
+        arrays = [column_masks for word in self._masks for column_masks in word]  # index word * 4 + outcome
+        np = optional_numpy()
+        if np is not None and self.rows >= _NUMPY_MIN_ROWS:
+            stacked = np.stack([np.frombuffer(a, dtype=np.uint64)[: self.rows] for a in arrays], axis=1)
+            unique, counts = np.unique(stacked, axis=0, return_counts=True)
+            rows: list[tuple[int, tuple[int, ...]]] = list(
+                zip(counts.tolist(), map(tuple, unique.tolist()), strict=True)
+            )
+        else:
+            rows = [(count, words) for words, count in Counter(zip(*arrays, strict=True)).items()]
+        width = len(OUTCOMES)
+        return [
+            (
+                count,
+                tuple(
+                    sum(words[w * width + o] << (w * _WORD_BITS) for w in range(len(self._masks))) for o in range(width)
+                ),
+            )
+            for count, words in rows
+        ]
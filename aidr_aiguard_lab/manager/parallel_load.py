@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import io
+import json
+import multiprocessing
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.aiguard_manager import AIGuardTests, SkippedTestCase
+from aidr_aiguard_lab.testcase.testcase import TestCase
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.config.settings import Settings
+    from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager
+
+# The workers are started from a forkserver rather than forked from this process, which by the time a
+# dataset is loaded runs the output writer threads (and under --watch or --matrix, more).
+_START_METHOD = "forkserver"
+
+# A worker's loader, set up by _init_worker()
+_loader: AIGuardTests | None = None
+_filename = ""
+_system_prompt: str | None = None
+
+
+@dataclass(slots=True)
+class _DetectorOptions:
+    """The part of the AIGuardManager that AIGuardTests._normalize_test_case() reads and updates."""
+
+    enabled_detectors: list[str]
+    use_labels_as_detectors: bool
+    enabled_topics: list[str]
+
+
+@dataclass(slots=True)
+class ParsedChunk:
+    """
+    One chunk's results, in input order: a test case (TestCase.to_record(), without the dataset's global
+    settings), a SkippedTestCase (invalid record), or the line number (counted from the start of the
+    chunk) and text of a line that is not valid JSON.
+    """
+
+    entries: list[dict[str, Any] | SkippedTestCase | tuple[int, str]] = field(default_factory=list)
+    lines: int = 0
+    # The enabled topics as last set while normalizing the chunk, if they were
+    enabled_topics: list[str] | None = None
+    error: str | None = None
+
+
+def parse_workers(requested: int, filename: str) -> int:
+    """
+    How many processes parse filename: requested, or with 0 one per available CPU for an input of at
+    least defaults.parallel_parse_min_bytes. 1 means in this process, as on platforms without forkserver.
+    """
+    if requested == 1 or _START_METHOD not in multiprocessing.get_all_start_methods():
+        return 1
+    if requested:
+        return requested
+    try:
+        if Path(filename).stat().st_size < defaults.parallel_parse_min_bytes:
+            return 1
+    except OSError:
+        return 1
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def line_chunks(filename: str, chunk_bytes: int = defaults.parallel_parse_chunk_bytes) -> Iterator[tuple[int, int]]:
+    """Byte ranges of about chunk_bytes covering the file, each ending at a line end (or the end of the file)."""
+    with Path(filename).open("rb") as f:
+        size = f.seek(0, io.SEEK_END)
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def _init_worker(
+    args: AppArgs, settings: Settings, options: _DetectorOptions, filename: str, system_prompt: str | None
+) -> None:
+    global _loader, _filename, _system_prompt
+    _loader = AIGuardTests(settings, cast("AIGuardManager", options), args)
+    _filename, _system_prompt = filename, system_prompt
+
+
+def _normalize(chunk: ParsedChunk, test_data: Any) -> None:
+    assert _loader is not None
+    test = _loader._normalize_test_case(test_data, _system_prompt)
+    chunk.entries.append(test if isinstance(test, SkippedTestCase) else test.to_record(_loader.settings))
+
+
+def _parse_lines(span: tuple[int, int]) -> ParsedChunk:
+    """Read, decode and normalize the lines in a byte range of the .jsonl file."""
+    assert _loader is not None
+    chunk = ParsedChunk()
+    initial_topics = _loader.aig.enabled_topics
+    start, end = span
+    with Path(_filename).open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        chunk.error = str(e)
+        return chunk
+    # Split into lines as iterating over the file in text mode does (universal newlines)
+    for line in io.StringIO(text, newline=None):
+        chunk.lines += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            test_data = json.loads(line)
+        except Exception:
+            chunk.entries.append((chunk.lines, line))
+            continue
+        _normalize(chunk, test_data)
+    if _loader.aig.enabled_topics is not initial_topics:
+        chunk.enabled_topics = _loader.aig.enabled_topics
+    return chunk
+
+
+def _parse_records(records: list[Any]) -> ParsedChunk:
+    """Normalize a range of the decoded .json records."""
+    assert _loader is not None
+    chunk = ParsedChunk()
+    initial_topics = _loader.aig.enabled_topics
+    for test_data in records:
+        _normalize(chunk, test_data)
+    if _loader.aig.enabled_topics is not initial_topics:
+        chunk.enabled_topics = _loader.aig.enabled_topics
+    return chunk
+
+
+def load_parallel(
+    loader: AIGuardTests, filename: str, system_prompt: str | None, workers: int, records: list[Any] | None = None
+) -> bool:
+    """
+    AIGuardTests.load_from_file() on a pool of worker processes. A .jsonl file is split into byte ranges
+    at line ends, which the workers read, decode and normalize; for a .json file (records) the decoded
+    records are split into ranges. The workers send back plain test case records (TestCase.to_record()),
+    which are cheaper to transfer and rebuild than pickled TestCase objects. Chunks come back in input
+    order, so test case numbers, indexes and warnings are the same as when the file is loaded in this
+    process. Returns False if the file could not be read.
+    """
+    tasks: list[Any]
+    parse: Callable[[Any], ParsedChunk]
+    if records is None:
+        tasks = list(line_chunks(filename))
+        parse = _parse_lines
+    else:
+        step = defaults.parallel_parse_chunk_records
+        tasks = [records[lo : lo + step] for lo in range(0, len(records), step)]
+        parse = _parse_records
+    options = _DetectorOptions(
+        loader.aig.enabled_detectors, loader.aig.use_labels_as_detectors, loader.aig.enabled_topics
+    )
+
+    tests: list[TestCase] = []
+    warnings: list[str] = []
+    enabled_topics: list[str] | None = None
+    idx = 0  # records that are valid JSON, as numbered in the warnings
+    line_base = 0
+    context = multiprocessing.get_context(_START_METHOD)
+    initargs = (loader.args, loader.settings, options, filename, system_prompt)
+    with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        for chunk in pool.imap(parse, tasks):
+            if chunk.error is not None:
+                print(f"Error: Unexpected error while reading file '{filename}': {chunk.error}")
+                return False
+            for entry in chunk.entries:
+                if isinstance(entry, tuple):
+                    print(f"Skipping invalid JSON line {line_base + entry[0]}: {entry[1]}")
+                    continue
+                idx += 1
+                if isinstance(entry, SkippedTestCase):
+                    warnings.append(entry.warning(idx))
+                    continue
+                test = TestCase.from_record(entry, loader.settings)
+                loader._place_test_case(test, position=len(loader.tests) + len(tests) + 1)
+                tests.append(test)
+            line_base += chunk.lines
+            if chunk.enabled_topics is not None:
+                enabled_topics = chunk.enabled_topics
+
+    # As in load_from_file(), invalid records are reported after the invalid JSON lines
+    for warning in warnings:
+        print(warning)
+    loader.tests.extend(tests)
+    if enabled_topics is not None:
+        loader.aig.enabled_topics = enabled_topics
+    if tests and loader.args.recipe:
+        # Normalizing a test case sets the recipe on the dataset's settings, which the workers did on their copy
+        loader.settings.recipe = loader.args.recipe
+    return True
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.intervals import mcnemar_p_value
+from aidr_aiguard_lab.manager.outcome_matrix import OUTCOMES, ratios
+from aidr_aiguard_lab.output.results_store import iter_results
+from aidr_aiguard_lab.output.writers import JsonlWriter
+from aidr_aiguard_lab.utils.colors import BRIGHT_GREEN, DARK_GREEN, DARK_RED, DARK_YELLOW, GREEN, RESET
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping, Sequence
+
+# A case's scoring state as spilled to the partition files: "detected<TAB>false positives<TAB>false negatives
+# <TAB>true positives<TAB>true negatives", each a sorted, comma-separated list of detector names. Cases repeat a
+# few distinct states, so flips and counts are computed once per distinct (baseline state, candidate state) pair.
+_SEPARATOR = "\t"
+_MAX_CACHED_STATES = 100_000
+_STATE_FIELDS = ("detected_labels", "false_positives", "false_negatives", "true_positives", "true_negatives")
+
+# Flip kinds, in reporting order
+FLIPS = {
+    "new_fp": "New False Positives",
+    "new_fn": "New False Negatives",
+    "fixed_fp": "Fixed False Positives",
+    "fixed_fn": "Fixed False Negatives",
+}
+
+# metric -> the flips its McNemar test is computed from (worse, better); None: no paired test
+_METRIC_TESTS: dict[str, tuple[str, str] | None] = {
+    "accuracy": ("worse", "better"),
+    "precision": None,
+    "recall": ("new_fn", "fixed_fn"),
+    "f1_score": None,
+    "fp_rate": ("new_fp", "fixed_fp"),
+    "fn_rate": ("new_fn", "fixed_fn"),
+}
+
+
+def _state(
+    detected_labels: Sequence[str],
+    false_positives: Sequence[str],
+    false_negatives: Sequence[str],
+    true_positives: Sequence[str] | None,
+    true_negatives: Sequence[str] | None,
+) -> str:
+    # Results rows name topics "topic:<name>" in detected_labels but "<name>" in the outcome lists, as the
+    # summary does. Rows written before the TPs and TNs were stored take the detected detectors that are
+    # not FPs as TPs and have no TNs.
+    detected = {label.removeprefix(defaults.topic_prefix) for label in detected_labels}
+    if true_positives is None:
+        true_positives = sorted(detected - set(false_positives))
+    return _SEPARATOR.join(
+        ",".join(sorted(names))
+        for names in (
+            detected,
+            set(false_positives),
+            set(false_negatives),
+            set(true_positives),
+            set(true_negatives or ()),
+        )
+    )
+
+
+def _record_state(record: Mapping[str, Any]) -> str:
+    """The scoring state of a results record (--results-out layout)."""
+    return _state(
+        record.get("detected_labels") or (),
+        record.get("false_positives") or (),
+        record.get("false_negatives") or (),
+        record.get("true_positives"),
+        record.get("true_negatives"),
+    )
+
+
+def _fields(state: str) -> list[list[str]]:
+    """A state's [detected, false positives, false negatives, true positives, true negatives]."""
+    return [names.split(",") if names else [] for names in state.split(_SEPARATOR)]
+
+
+def _outcomes(state: str) -> dict[str, str]:
+    """
+    Detector -> outcome for the detectors the case was scored on, as EfficacyTracker counted them; detectors
+    it did not score (neither expected, nor negatively labeled, nor flagged) are left out.
+    """
+    _, fps, fns, tps, tns = _fields(state)
+    out = dict.fromkeys(tns, "tn")
+    out.update(dict.fromkeys(tps, "tp"))
+    out.update(dict.fromkeys(fps, "fp"))
+    out.update(dict.fromkeys(fns, "fn"))
+    return out
+
+
+def _flips(before: str, after: str) -> tuple[dict[str, list[str]], dict[str, str]]:
+    """The detectors per flip kind between two states, and detector -> "worse"/"better" where correctness changed."""
+    was_outcomes, now_outcomes = _outcomes(before), _outcomes(after)
+    flipped: dict[str, list[str]] = {kind: [] for kind in FLIPS}
+    changed: dict[str, str] = {}
+    for detector in sorted(was_outcomes.keys() | now_outcomes.keys()):
+        was, now = was_outcomes.get(detector), now_outcomes.get(detector)
+        if was == now:
+            continue
+        for kind, hit in (
+            ("new_fp", now == "fp"),
+            ("fixed_fp", was == "fp"),
+            ("new_fn", now == "fn"),
+            ("fixed_fn", was == "fn"),
+        ):
+            if hit:
+                flipped[kind].append(detector)
+        correct_before, correct_after = was not in ("fp", "fn"), now not in ("fp", "fn")
+        if correct_before != correct_after:
+            changed[detector] = "better" if correct_after else "worse"
+    return flipped, changed
+
+
+class RunDiff:
+    """
+    Case-by-case comparison of two result stores (--results-out) of the same dataset, e.g. before and
+    after a policy change, joined on the test case content hash rather than the positional index.
+
+    Both stores are streamed once into hash partitions on disk (a grace hash join), then joined one
+    partition at a time, so memory is bounded by a partition rather than the run. Per detector it
+    counts the flips (new / fixed FPs and FNs) and each run's TP/FP/FN/TN over the matched cases, as
+    stored in the rows (the outcomes EfficacyTracker counted); metric deltas are tested with McNemar's
+    test on the paired flips.
+    """
+
+    def __init__(self, baseline: str, candidate: str, partitions: int = defaults.diff_partitions) -> None:
+        self.baseline = baseline
+        self.candidate = candidate
+        self.partitions = partitions
+        self.matched = 0
+        self.only_baseline = 0
+        self.only_candidate = 0
+        self.duplicates = 0  # repeated content hashes (e.g. --loop runs, duplicate prompts); the first row is used
+        self.unscored = 0  # rows without a content hash or with an error
+        self.without_outcomes = 0  # rows written before TPs/TNs were stored: their TNs are not counted
+        # (baseline state, candidate state) -> matched cases
+        self.pairs = Counter[tuple[str, str]]()
+        # name ("overall" or a detector) -> [baseline [tp, fp, fn, tn], candidate [tp, fp, fn, tn]]
+        self.counts: dict[str, list[list[int]]] = {}
+        # name -> flip kind (FLIPS, plus "worse"/"better" for correct <-> incorrect) -> cases
+        self.flips: dict[str, Counter[str]] = {}
+        self.examples: dict[str, list[dict[str, Any]]] = {kind: [] for kind in FLIPS}
+
+    def run(self, flips_out: str | None = None, examples: int = defaults.diff_examples) -> None:
+        """Join the two stores; every flipped case is streamed to flips_out (JSONL) if given."""
+        writer = JsonlWriter(flips_out) if flips_out else None
+        try:
+            with tempfile.TemporaryDirectory(prefix="aiguard_lab_diff_") as tmp:
+                self._partition(self.baseline, Path(tmp), "baseline")
+                self._partition(self.candidate, Path(tmp), "candidate")
+                for p in range(self.partitions):
+                    self._join(Path(tmp) / f"baseline-{p}.tsv", Path(tmp) / f"candidate-{p}.tsv", writer, examples)
+        finally:
+            if writer is not None:
+                writer.close()
+        self.tally()
+
+    def _partition(self, path: str, tmp: Path, name: str) -> None:
+        # Rows repeat a few distinct label lists, so their states are built once
+        states: dict[tuple[tuple[str, ...] | None, ...], str] = {}
+        files: list[IO[str]] = []
+        try:
+            files = [(tmp / f"{name}-{p}.tsv").open(mode="w", encoding="utf-8") for p in range(self.partitions)]
+            for record in iter_results(path):
+                content_hash = record.get("content_hash")
+                if not isinstance(content_hash, str) or record.get("error") is not None:
+                    self.unscored += 1
+                    continue
+                if record.get("true_negatives") is None:
+                    self.without_outcomes += 1
+                key = tuple(None if record.get(f) is None else tuple(record[f]) for f in _STATE_FIELDS)
+                state = states.get(key)
+                if state is None:
+                    if len(states) >= _MAX_CACHED_STATES:
+                        states.clear()
+                    state = states[key] = _record_state(record)
+                index = record.get("index")
+                files[int(content_hash[:8], 16) % self.partitions].write(
+                    f"{content_hash}\t{'' if index is None else index}\t{state}\n"
+                )
+        finally:
+            for f in files:
+                f.close()
+
+    def _join(self, baseline_path: Path, candidate_path: Path, writer: JsonlWriter | None, examples: int) -> None:
+        # content hash -> (index, state) of the baseline rows in this partition
+        baseline: dict[str, tuple[str, str]] = {}
+        with baseline_path.open(encoding="utf-8") as f:
+            for line in f:
+                content_hash, index, state = line.rstrip("\n").split(_SEPARATOR, 2)
+                if content_hash in baseline:
+                    self.duplicates += 1
+                else:
+                    baseline[content_hash] = (index, state)
+        seen: set[str] = set()
+        with candidate_path.open(encoding="utf-8") as f:
+            for line in f:
+                content_hash, index, state = line.rstrip("\n").split(_SEPARATOR, 2)
+                if content_hash in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(content_hash)
+                base = baseline.pop(content_hash, None)
+                if base is None:
+                    self.only_candidate += 1
+                    continue
+                self.add_pair(content_hash, base, (index, state), writer, examples)
+        self.only_baseline += len(baseline)
+
+    def add_pair(
+        self,
+        content_hash: str,
+        base: tuple[str, str],
+        cand: tuple[str, str],
+        writer: JsonlWriter | None = None,
+        examples: int = 0,
+    ) -> None:
+        """Count one matched case, given as (index, state) in each run; tally() must run after the last one."""
+        self.matched += 1
+        self.pairs[base[1], cand[1]] += 1
+        if base[1] != cand[1] and (writer is not None or examples):
+            self._record_flip(content_hash, base, cand, writer, examples)
+
+    def add_records(
+        self,
+        base: Mapping[str, Any],
+        cand: Mapping[str, Any],
+        writer: JsonlWriter | None = None,
+        examples: int = 0,
+    ) -> None:
+        """Count one matched case given as a results record (--results-out layout) from each run."""
+        base_index, cand_index = (
+            "" if record.get("index") is None else str(record["index"]) for record in (base, cand)
+        )
+        self.without_outcomes += sum(record.get("true_negatives") is None for record in (base, cand))
+        base_state, cand_state = (_record_state(record) for record in (base, cand))
+        self.add_pair(base["content_hash"], (base_index, base_state), (cand_index, cand_state), writer, examples)
+
+    def _record_flip(
+        self,
+        content_hash: str,
+        base: tuple[str, str],
+        cand: tuple[str, str],
+        writer: JsonlWriter | None,
+        examples: int,
+    ) -> None:
+        flipped, _ = _flips(base[1], cand[1])
+        if not any(flipped.values()):
+            return
+        record = {
+            "content_hash": content_hash,
+            "baseline_index": int(base[0]) if base[0] else None,
+            "candidate_index": int(cand[0]) if cand[0] else None,
+            **flipped,
+            "baseline_detected": _fields(base[1])[0],
+            "candidate_detected": _fields(cand[1])[0],
+        }
+        for kind, detectors in flipped.items():
+            if detectors and len(self.examples[kind]) < examples:
+                self.examples[kind].append(record)
+        if writer is not None:
+            writer.write(record)
+
+    def tally(self) -> None:
+        """Counts and flips per detector and overall, from the distinct state pairs."""
+        runs_template = [[0] * len(OUTCOMES), [0] * len(OUTCOMES)]
+        overall_flips = self.flips.setdefault("overall", Counter())
+        for (before, after), n in self.pairs.items():
+            for run, state in enumerate((before, after)):
+                for detector, outcome in _outcomes(state).items():
+                    runs = self.counts.setdefault(detector, [list(counts) for counts in runs_template])
+                    runs[run][OUTCOMES.index(outcome)] += n
+            if before == after:
+                continue
+            flipped, changed = _flips(before, after)
+            for kind, detectors in flipped.items():
+                for detector in detectors:
+                    self.flips.setdefault(detector, Counter())[kind] += n
+                if detectors:
+                    overall_flips[kind] += n
+            for detector, direction in changed.items():
+                self.flips.setdefault(detector, Counter())[direction] += n
+            # Case-level correctness: no FP and no FN for any detector
+            correct_before, correct_after = (not any(state.split(_SEPARATOR)[1:3]) for state in (before, after))
+            if correct_before != correct_after:
+                overall_flips["better" if correct_after else "worse"] += n
+        overall = [[0] * len(OUTCOMES), [0] * len(OUTCOMES)]
+        for runs in self.counts.values():
+            for total, counts in zip(overall, runs, strict=True):
+                for o, n in enumerate(counts):
+                    total[o] += n
+        self.counts["overall"] = overall
+
+    def print_header(self, writeln: Callable[[str], None]) -> None:
+        writeln(f"\n{BRIGHT_GREEN}AIGuard Run Diff{RESET}")
+        writeln(f"Baseline: {self.baseline}")
+        writeln(f"Candidate: {self.candidate}")
+        writeln(f"Matched test cases (by content hash): {self.matched}")
+        writeln(f"Only in baseline: {self.only_baseline}, only in candidate: {self.only_candidate}")
+        if self.duplicates or self.unscored:
+            writeln(
+                f"{DARK_YELLOW}Skipped rows: {self.duplicates} repeated test cases (first row used), "
+                f"{self.unscored} without a content hash or with an error{RESET}"
+            )
+        if self.without_outcomes:
+            writeln(
+                f"{DARK_YELLOW}{self.without_outcomes} rows have no stored TPs/TNs (written by an older version): "
+                f"their TNs are not counted{RESET}"
+            )
+
+    def print_report(self, writeln: Callable[[str], None] = print) -> None:
+        self.print_header(writeln)
+        if not self.matched:
+            writeln(f"{DARK_YELLOW}No test cases in common.{RESET}")
+            return
+
+        overall = self.flips.get("overall", Counter())
+        writeln(f"\n--{GREEN}Flipped Test Cases:{RESET}--")
+        for kind, title in FLIPS.items():
+            per_detector = {name: flips[kind] for name, flips in sorted(self.flips.items()) if name != "overall"}
+            color = DARK_RED if kind.startswith("new") else DARK_GREEN
+            nonzero = {name: n for name, n in per_detector.items() if n}
+            writeln(f"{color}{title}: {overall[kind]}{RESET} {nonzero}")
+        for kind, title in FLIPS.items():
+            if self.examples[kind]:
+                writeln(f"\n--{GREEN}{title} (first {len(self.examples[kind])}):{RESET}--")
+                for record in self.examples[kind]:
+                    writeln(
+                        f"  {record['content_hash'][:12]}  index {record['baseline_index']} -> "
+                        f"{record['candidate_index']}: {', '.join(record[kind])}"
+                    )
+
+        writeln(f"\n--{GREEN}Metric Deltas (baseline -> candidate, matched test cases):{RESET}--")
+        writeln(f"* McNemar p < {defaults.diff_significance_level} (paired test on the flipped cases)")
+        names = ["overall", *sorted(name for name in self.counts if name != "overall")]
+        for name in names:
+            before, after = (ratios(*counts) for counts in self.counts[name])
+            flips = self.flips.get(name, Counter())
+            writeln(f"\n--{GREEN}{'Overall' if name == 'overall' else f'Detector: {name}'}{RESET}--")
+            for metric, test in _METRIC_TESTS.items():
+                delta = after[metric] - before[metric]
+                line = f"{metric:<12}{before[metric]:>9.4f} -> {after[metric]:.4f}  ({delta:+.4f})"
+                if test is not None:
+                    p = mcnemar_p_value(flips[test[0]], flips[test[1]])
+                    mark = "*" if p < defaults.diff_significance_level else ""
+                    line += f"  p={p:.4g}{mark}"
+                writeln(line)
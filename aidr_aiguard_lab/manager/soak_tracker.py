@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.utils.colors import DARK_RED, DARK_YELLOW, RESET
+from aidr_aiguard_lab.utils.histogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def _open_fd_count() -> int | None:
+    """Number of open file descriptors for this process (Linux only), used to spot connection leaks."""
+    try:
+        return sum(1 for _ in Path("/proc/self/fd").iterdir())
+    except OSError:
+        return None
+
+
+def _max_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+class SoakTracker:
+    """
+    Rolling per-window statistics for long --loop / --duration runs.
+
+    Each window (one minute by default) records throughput, latency percentiles, error classes and
+    detection rates, and counts verdict flips: a test case whose detected labels differ from the
+    first time it was scored.  Window state is reset on every rotation and the verdict map is
+    bounded by the dataset size, so memory stays constant however long the run lasts.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, report_file: str | None = None) -> None:
+        self.window_seconds = window_seconds
+        self.report_file = report_file
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.window_index = 0
+        self.window_start = time.time()
+        self._new_window()
+
+        # First-seen verdict per test case index, for nondeterminism tracking.
+        self._verdicts: dict[int, tuple[str, ...]] = {}
+        self._verdict_interned: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self.unstable_cases: set[int] = set()
+        self.total_flips = 0
+
+    def _new_window(self) -> None:
+        self.requests = 0
+        self.scored = 0
+        self.with_detection = 0
+        self.flips = 0
+        self.errors = Counter[str]()
+        self.detected_labels = Counter[str]()
+        self.latency = LatencyHistogram()
+
+    def start(self) -> None:
+        if self.report_file:
+            # Truncate any windows left over from a previous run
+            Path(self.report_file).open(mode="w").close()
+        with self._lock:
+            self.window_start = time.time()
+        self._thread = threading.Thread(target=self._run, name="soak-windows", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.rotate()
+
+    def _run(self) -> None:
+        while not self._stop.wait(1.0):
+            if time.time() - self.window_start >= self.window_seconds:
+                self.rotate()
+
+    def record(
+        self,
+        test_index: int,
+        latency: float | None,
+        error_class: str | None = None,
+        detected_labels: Sequence[str] | None = None,
+    ) -> None:
+        with self._lock:
+            self.requests += 1
+            if latency is not None:
+                self.latency.observe(latency)
+            if error_class is not None:
+                self.errors[error_class] += 1
+                return
+            if detected_labels is None:
+                return
+
+            self.scored += 1
+            if detected_labels:
+                self.with_detection += 1
+                self.detected_labels.update(detected_labels)
+
+            verdict = tuple(sorted(detected_labels))
+            verdict = self._verdict_interned.setdefault(verdict, verdict)
+            first = self._verdicts.setdefault(test_index, verdict)
+            if first != verdict:
+                self.flips += 1
+                self.total_flips += 1
+                self.unstable_cases.add(test_index)
+
+    def rotate(self) -> dict[str, Any]:
+        """Close the current window, emit it, and start a new one."""
+        with self._lock:
+            now = time.time()
+            elapsed = max(now - self.window_start, 1e-9)
+            window = {
+                "window": self.window_index,
+                "start": datetime.fromtimestamp(self.window_start).isoformat(timespec="seconds"),
+                "seconds": round(elapsed, 3),
+                "requests": self.requests,
+                "rps": round(self.requests / elapsed, 3),
+                "latency_p50": round(self.latency.percentile(50), 4),
+                "latency_p95": round(self.latency.percentile(95), 4),
+                "latency_p99": round(self.latency.percentile(99), 4),
+                "latency_max": round(self.latency.max, 4),
+                "errors": dict(self.errors),
+                "detection_rate": round(self.with_detection / self.scored, 4) if self.scored else 0.0,
+                "label_rates": {k: round(v / self.scored, 4) for k, v in self.detected_labels.items()}
+                if self.scored
+                else {},
+                "verdict_flips": self.flips,
+                "unstable_cases": len(self.unstable_cases),
+                "open_fds": _open_fd_count(),
+                "threads": threading.active_count(),
+                "max_rss_kb": _max_rss_kb(),
+            }
+            self.window_index += 1
+            self.window_start = now
+            self._new_window()
+
+        self._emit(window)
+        return window
+
+    def _emit(self, window: dict[str, Any]) -> None:
+        color = DARK_RED if window["errors"] or window["verdict_flips"] else DARK_YELLOW
+        print("\r\033[2K", end="")
+        print(
+            f"{color}[soak] window {window['window']} @ {window['start']}: "
+            f"{window['requests']} req ({window['rps']:.2f} rps), "
+            f"p50={window['latency_p50']:.3f}s p95={window['latency_p95']:.3f}s p99={window['latency_p99']:.3f}s, "
+            f"errors={window['errors']}, detection_rate={window['detection_rate']:.4f}, "
+            f"flips={window['verdict_flips']} (unstable cases: {window['unstable_cases']}), "
+            f"fds={window['open_fds']}, threads={window['threads']}{RESET}",
+            flush=True,
+        )
+        if self.report_file:
+            try:
+                with Path(self.report_file).open(mode="a", encoding="utf-8") as f:
+                    f.write(json.dumps(window) + "\n")
+            except OSError as e:
+                print(f"{DARK_RED}Error writing soak window to {self.report_file}: {e}{RESET}")
+
+    def print_summary(self) -> None:
+        print(f"\n{DARK_YELLOW}Soak windows: {self.window_index}, total verdict flips: {self.total_flips}{RESET}")
+        if self.unstable_cases:
+            shown = sorted(self.unstable_cases)[:50]
+            print(f"{DARK_RED}Test cases with nondeterministic verdicts: {shown}{RESET}")
+            if len(self.unstable_cases) > len(shown):
+                print(f"{DARK_RED}... and {len(self.unstable_cases) - len(shown)} more{RESET}")
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.config.settings import Settings
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+from aidr_aiguard_lab.utils.colors import DARK_GREEN, DARK_YELLOW, RESET
+from aidr_aiguard_lab.utils.utils import reset_rate_limits
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+    from aidr_aiguard_lab._types import AppArgs
+    from aidr_aiguard_lab.output.manifest import RunManifest
+
+
+class FileWatcher:
+    """
+    Polls a file's (inode, size, mtime) for changes. Editors that save by replacing the file are seen
+    as a change too, and a file that is briefly missing while being replaced is not.
+    """
+
+    def __init__(self, path: str, interval: float = defaults.watch_poll_interval) -> None:
+        self.path = path
+        self.interval = interval
+        self._last = self._stat()
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        try:
+            st = Path(self.path).stat()
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def wait_for_change(self) -> None:
+        """Block until the file has changed and then stayed unchanged for one interval (a finished save)."""
+        while True:
+            time.sleep(self.interval)
+            current = self._stat()
+            if current is None or current == self._last:
+                continue
+            time.sleep(self.interval)
+            if self._stat() == current:
+                self._last = current
+                return
+
+
+def watch_input_file(args: AppArgs, stdout: TextIO | None = None) -> None:
+    """
+    --watch: evaluate args.input_file, then re-evaluate it every time it is saved until Ctrl-C.
+
+    Every pass is a regular run (summary and output files included) in this process, so the pooled
+    API client stays warm. Responses scored in a pass are kept in memory: the next pass re-reads the
+    file and scores unchanged test cases (same content hash and request config) from them with the
+    current settings, sending only added or edited ones. A pass that scores nothing (the file does not
+    parse or has no test cases) keeps the responses of the pass before it.
+    """
+    assert args.input_file is not None
+    watcher = FileWatcher(args.input_file)
+    previous: RunManifest | None = None
+    passes = 0
+    try:
+        while True:
+            passes += 1
+            start = time.perf_counter()
+            aig = AIGuardManager(args, stdout=stdout, previous_run=previous)
+            tests = AIGuardTests(Settings(args.system_prompt, args.recipe), aig, args)
+            tests.process_all_prompts(args, aig)
+            if aig.manifest is not None and aig.manifest.records:
+                previous = aig.manifest
+            elif previous is not None:
+                # The file did not parse (the error is printed above) or has no test cases yet, e.g. saved
+                # mid-edit: the next pass still starts from the responses of the last pass that scored any
+                print(f"{DARK_YELLOW}No test cases scored in pass {passes}, keeping the previous responses{RESET}")
+            print(
+                f"\n{DARK_GREEN}Pass {passes} done in {time.perf_counter() - start:.2f}s.{RESET} "
+                f"Watching {args.input_file} for changes (Ctrl-C to stop)"
+            )
+            watcher.wait_for_change()
+            print(f"\n{DARK_YELLOW}{args.input_file} changed, re-evaluating{RESET}")
+            # Each pass starts with a fresh rate-limit window, as a separate run would
+            reset_rate_limits()
+    except KeyboardInterrupt:
+        print("\nStopped watching")
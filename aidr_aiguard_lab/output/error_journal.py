@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.output.writers import JsonlWriter
+from aidr_aiguard_lab.utils.colors import DARK_RED, RESET
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from aidr_aiguard_lab._exceptions import RequestError
+
+
+def payload_sha256(payload: Mapping[str, Any]) -> str:
+    """Stable hash of a request body, so repeated failures of the same payload can be grouped."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ErrorJournal:
+    """
+    Records AI Guard errors as they happen.
+
+    Each error is appended to a JSON Lines file (when a path is given) by a background writer, so
+    errors can be monitored in real time.  Records carry the request id, status, error class, test
+    index and a hash of the request payload; the full request body is only included when
+    include_payloads is set.  In memory, only a bounded ring of the most recent errors is kept, plus
+    counts by status and by error class, so an error storm cannot exhaust memory.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        ring_size: int = defaults.max_saved_error_responses,
+        include_payloads: bool = False,
+    ) -> None:
+        self.include_payloads = include_payloads
+        self.recent: deque[RequestError] = deque(maxlen=ring_size)
+        self.by_status = Counter[str]()
+        self.by_class = Counter[str]()
+        self._lock = threading.Lock()
+        self.writer: JsonlWriter | None = None
+        if path:
+            try:
+                self.writer = JsonlWriter(path)
+            except OSError as e:
+                print(f"{DARK_RED}Error opening error journal {path}: {e}{RESET}")
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_status.values())
+
+    def record(self, error: RequestError, status: str, error_class: str, test_index: int | None = None) -> None:
+        with self._lock:
+            self.by_status[status] += 1
+            self.by_class[error_class] += 1
+            self.recent.append(error)
+        if self.writer is None:
+            return
+
+        entry: dict[str, Any] = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "request_id": error.request_id,
+            "status": status,
+            "error_class": error_class,
+            "test_index": test_index,
+            "message": error.message,
+            "payload_sha256": payload_sha256(error.request_body),
+        }
+        if self.include_payloads:
+            entry["request_body"] = error.request_body
+        self.writer.write(entry)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.output.results_store import check_responses_path, load_responses, response_record
+from aidr_aiguard_lab.output.writers import BackgroundWriter, GzipJsonlWriter, JsonlWriter
+
+if TYPE_CHECKING:
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+
+class RunManifest:
+    """
+    --manifest: the raw responses of the last run, keyed by (test case content hash, request config hash),
+    for incremental runs.
+
+    Test cases found in the manifest under the current config hash are scored from their stored
+    response instead of being sent again (see AIGuardTests.process_all_prompts); everything else is
+    sent. The new manifest, with every response scored in this run (carried over or fresh), is
+    written next to the old one and moved over it when the run finishes, so an interrupted run
+    leaves the previous manifest intact, as does a run that scored nothing (e.g. the dataset did
+    not parse). With full=True nothing is carried over.
+
+    --watch runs one manifest per pass with keep=True, so the records scored in a pass stay in
+    memory and the next pass starts from them (previous) instead of the file. Without a path
+    nothing is written.
+
+    Records have the --responses-out layout plus config_hash, so a manifest can also be re-scored.
+    """
+
+    def __init__(
+        self,
+        path: str | None,
+        config_hash: str,
+        full: bool = False,
+        previous: RunManifest | None = None,
+        keep: bool = False,
+    ) -> None:
+        self.path = path
+        self.config_hash = config_hash
+        self.entries: dict[str, dict[str, Any]] = {}
+        if previous is not None and previous.recorded is not None:
+            self.entries = {h: r for h, r in previous.recorded.items() if r.get("config_hash") == config_hash}
+        elif path is not None and not full and Path(path).exists():
+            _, by_hash = load_responses(path)
+            self.entries = {h: r for h, r in by_hash.items() if r.get("config_hash") == config_hash}
+        # Where carried-over responses come from, for the run's messages (None: nothing to carry over)
+        self.source = "the previous pass" if previous is not None else path
+        self.recorded: dict[str, dict[str, Any]] | None = {} if keep else None
+        self.records = 0  # responses recorded in this run
+        self._writer: BackgroundWriter[dict[str, Any]] | None = None
+        if path is not None:
+            check_responses_path(path)
+            self._partial = str(Path(path).with_name(f".{Path(path).name}.partial"))
+            self._writer = (
+                GzipJsonlWriter(self._partial) if path.lower().endswith(".gz") else JsonlWriter(self._partial)
+            )
+
+    def lookup(self, test: TestCase) -> dict[str, Any] | None:
+        """The stored response record for a test case, if its content and the request config are unchanged."""
+        return self.entries.get(test.content_hash())
+
+    def record(self, test: TestCase, response: dict[str, Any], latency: float | None) -> None:
+        record = {**response_record(test, response, latency), "config_hash": self.config_hash}
+        self.records += 1
+        if self.recorded is not None:
+            self.recorded[record["content_hash"]] = record
+        if self._writer is not None:
+            self._writer.write(record)
+
+    @property
+    def closed(self) -> bool:
+        return self._writer is None or self._writer.closed
+
+    def close(self) -> bool:
+        """
+        Finish writing the new manifest and replace the old one with it. Returns False (and keeps the old
+        manifest) if nothing was written or no response was recorded in this run.
+        """
+        if self._writer is None or self._writer.closed:
+            return False
+        self._writer.close()
+        if not self.records:
+            Path(self._partial).unlink(missing_ok=True)
+            return False
+        assert self.path is not None
+        Path(self._partial).replace(self.path)
+        return True
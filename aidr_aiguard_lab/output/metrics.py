@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.api.pangea_api import retry_count
+from aidr_aiguard_lab.utils.colors import DARK_GREEN, RESET
+from aidr_aiguard_lab.utils.histogram import LATENCY_BUCKETS
+from aidr_aiguard_lab.utils.utils import rate_limit_wait_seconds
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager
+    from aidr_aiguard_lab.utils.progress import ProgressRenderer
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every 8th LatencyHistogram bound (1ms .. ~4.5min, roughly doubling): exact cumulative counts
+# from the existing buckets, at a resolution dashboards can handle.
+_EXPORTED_BUCKETS = tuple(range(0, len(LATENCY_BUCKETS), 8))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Exposition:
+    """Builds one scrape in OpenMetrics or Prometheus text format."""
+
+    def __init__(self, openmetrics: bool) -> None:
+        self.openmetrics = openmetrics
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        # OpenMetrics names a counter family without its _total suffix; Prometheus text uses the sample name.
+        family = name.removesuffix("_total") if self.openmetrics and kind == "counter" else name
+        self.lines.append(f"# TYPE {family} {kind}")
+        self.lines.append(f"# HELP {family} {help_text}")
+
+    def sample(self, name: str, value: float, labels: Mapping[str, str] | None = None) -> None:
+        self.lines.append(f"{name}{_labels(labels or {})} {value}")
+
+    def text(self) -> str:
+        if self.openmetrics:
+            self.lines.append("# EOF")
+        return "\n".join(self.lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint (--metrics-port) exposing a live run's counters at /metrics for Prometheus.
+
+    Every value is read from state the run already keeps (EfficacyTracker counts, the error journal,
+    the progress latency histogram, the rate limiter, the API client's request counts). Scrapes copy
+    those values without taking the scoring locks, so a scrape never stalls workers; a scrape taken
+    mid-update may be one case behind, which is fine for monitoring.
+    """
+
+    def __init__(self, aig: AIGuardManager, port: int, host: str = "127.0.0.1") -> None:
+        self.aig = aig
+        self.progress: ProgressRenderer | None = None
+        self.total_cases: int | None = None
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = metrics.render(openmetrics=openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - http.server signature
+                pass  # keep scrapes out of the run's output
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}/metrics"
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        print(f"{DARK_GREEN}Serving metrics at {self.url}{RESET}")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._thread = None
+
+    def render(self, openmetrics: bool = False) -> str:
+        efficacy = self.aig.efficacy
+        journal = efficacy.error_journal
+        # dict() copies are single C-level operations, so workers adding keys concurrently can't break them
+        by_status = dict(journal.by_status)
+        by_class = dict(journal.by_class)
+        per_detector = {
+            "tp": dict(efficacy.per_detector_tp),
+            "fp": dict(efficacy.per_detector_fp),
+            "fn": dict(efficacy.per_detector_fn),
+            "tn": dict(efficacy.per_detector_tn),
+        }
+        out = _Exposition(openmetrics)
+
+        completed = self.progress.completed if self.progress is not None else 0
+        out.family("aiguard_lab_cases_completed_total", "counter", "Test cases finished (scored or failed).")
+        out.sample("aiguard_lab_cases_completed_total", completed)
+        if self.total_cases is not None:
+            out.family("aiguard_lab_cases", "gauge", "Test cases in this run.")
+            out.sample("aiguard_lab_cases", self.total_cases)
+
+        out.family("aiguard_lab_requests_total", "counter", "AI Guard requests by response status.")
+        out.sample("aiguard_lab_requests_total", max(completed - sum(by_status.values()), 0), {"status": "Success"})
+        for status, count in sorted(by_status.items()):
+            out.sample("aiguard_lab_requests_total", count, {"status": status})
+
+        out.family("aiguard_lab_errors_total", "counter", "Failed requests by error class.")
+        for error_class, count in sorted(by_class.items()):
+            out.sample("aiguard_lab_errors_total", count, {"class": error_class})
+
+        out.family("aiguard_lab_in_flight", "gauge", "Requests currently waiting on AI Guard.")
+        out.sample("aiguard_lab_in_flight", self.aig.in_flight)
+
+        out.family("aiguard_lab_retries_total", "counter", "Requests retried by the API client.")
+        out.sample("aiguard_lab_retries_total", retry_count())
+
+        out.family(
+            "aiguard_lab_rate_limit_wait_seconds_total", "counter", "Time workers spent waiting on the --rps limit."
+        )
+        out.sample("aiguard_lab_rate_limit_wait_seconds_total", float(rate_limit_wait_seconds()))
+
+        out.family("aiguard_lab_blocked_total", "counter", "Requests AI Guard blocked.")
+        out.sample("aiguard_lab_blocked_total", efficacy.blocked)
+
+        out.family("aiguard_lab_outcomes_total", "counter", "Scoring outcomes (tp, fp, fn, tn) per detector.")
+        for outcome, counts in per_detector.items():
+            for detector, count in sorted(counts.items()):
+                out.sample("aiguard_lab_outcomes_total", count, {"detector": detector, "outcome": outcome})
+
+        if self.progress is not None:
+            histogram = self.progress.latency
+            buckets = list(histogram.counts)
+            out.family("aiguard_lab_request_latency_seconds", "histogram", "AI Guard request latency.")
+            cumulative = 0
+            previous = 0
+            for i in _EXPORTED_BUCKETS:
+                cumulative += sum(buckets[previous : i + 1])
+                previous = i + 1
+                out.sample("aiguard_lab_request_latency_seconds_bucket", cumulative, {"le": f"{LATENCY_BUCKETS[i]:g}"})
+            total = sum(buckets)
+            out.sample("aiguard_lab_request_latency_seconds_bucket", total, {"le": "+Inf"})
+            out.sample("aiguard_lab_request_latency_seconds_count", total)
+            out.sample("aiguard_lab_request_latency_seconds_sum", float(histogram.sum))
+
+        return out.text()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import gzip
+import importlib
+import json
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.output.writers import BackgroundWriter, GzipJsonlWriter, JsonlWriter
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from aidr_aiguard_lab.manager.detector_extraction import DetectorExtraction
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz")
+ARROW_SUFFIXES = (".parquet", ".arrow", ".feather")
+
+# Rows per Arrow record batch / Parquet row group.
+ARROW_BATCH_SIZE = 5000
+
+
+def _import_pyarrow() -> Any:
+    try:
+        return importlib.import_module("pyarrow")
+    except ImportError:
+        raise ValueError("Parquet/Arrow output requires pyarrow (pip install pyarrow)") from None
+
+
+def check_results_path(path: str) -> None:
+    """Raise ValueError if path has an unsupported extension, or needs pyarrow and it is not installed."""
+    lower = path.lower()
+    if lower.endswith(ARROW_SUFFIXES):
+        _import_pyarrow()
+    elif not lower.endswith(JSONL_SUFFIXES):
+        supported = ", ".join(JSONL_SUFFIXES + ARROW_SUFFIXES)
+        raise ValueError(f"Unsupported results file extension (expected one of {supported}): {path}")
+
+
+def _open_jsonl(path: str) -> IO[str]:
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, mode="rt", encoding="utf-8")
+    return Path(path).open(encoding="utf-8")
+
+
+def check_responses_path(path: str) -> None:
+    """Raise ValueError unless path is a JSON Lines file (optionally gzipped)."""
+    if not path.lower().endswith(JSONL_SUFFIXES):
+        raise ValueError(f"Unsupported responses file extension (expected one of {', '.join(JSONL_SUFFIXES)}): {path}")
+
+
+def open_responses_writer(path: str) -> BackgroundWriter[dict[str, Any]]:
+    """Open a streaming writer for raw responses (--responses-out)."""
+    check_responses_path(path)
+    return GzipJsonlWriter(path) if path.lower().endswith(".gz") else JsonlWriter(path)
+
+
+def response_record(test: TestCase, response: dict[str, Any], latency: float | None) -> dict[str, Any]:
+    """One stored raw response, keyed by test index and content hash so it can be re-scored later."""
+    return {"index": test.index, "content_hash": test.content_hash(), "latency": latency, "response": response}
+
+
+def load_responses(path: str) -> tuple[dict[int, dict[str, Any]], dict[str, dict[str, Any]]]:
+    """
+    Read a --responses-out file into (records by test index, records by content hash).
+    With --loop a case has several records; the first one is kept.
+    """
+    check_responses_path(path)
+    by_index: dict[int, dict[str, Any]] = {}
+    by_hash: dict[str, dict[str, Any]] = {}
+    with _open_jsonl(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from None
+            if not isinstance(record, dict) or not isinstance(record.get("response"), dict):
+                raise ValueError(f"{path}:{line_number}: not a stored response record")
+            index = record.get("index")
+            if isinstance(index, int):
+                by_index.setdefault(index, record)
+            content_hash = record.get("content_hash")
+            if isinstance(content_hash, str):
+                by_hash.setdefault(content_hash, record)
+    return by_index, by_hash
+
+
+def result_record(
+    test: TestCase,
+    request_id: str | None,
+    blocked: bool,
+    extraction: DetectorExtraction,
+    expected_labels: Sequence[str],
+    false_positives: Sequence[str],
+    false_negatives: Sequence[str],
+    true_positives: Sequence[str],
+    true_negatives: Sequence[str],
+    latency: float | None,
+) -> dict[str, Any]:
+    """Flatten one scored test case into a results row."""
+    return {
+        "index": test.index,
+        "content_hash": test.content_hash(),
+        "expected_labels": list(expected_labels),
+        "detected_labels": list(extraction.labels),
+        "topic_confidences": [{"topic": name, "confidence": conf} for name, conf in extraction.topics],
+        "analyzers": [{"analyzer": name, "confidence": conf} for name, conf in extraction.analyzers],
+        "detected_details": extraction.details,
+        "blocked": blocked,
+        "latency": latency,
+        "request_id": request_id,
+        "false_positives": list(false_positives),
+        "false_negatives": list(false_negatives),
+        "true_positives": list(true_positives),
+        "true_negatives": list(true_negatives),
+    }
+
+
+def error_record(test: TestCase, error: str, latency: float | None) -> dict[str, Any]:
+    """Record for a test case that could not be scored (exception or non-Success response)."""
+    return {
+        "index": test.index,
+        "content_hash": test.content_hash(),
+        "expected_labels": list(test.label),
+        "error": error,
+        "latency": latency,
+    }
+
+
+def iter_results(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Stream the rows of a results store (--results-out, or --output-jsonl verdicts) one at a time:
+    JSONL line by line, Parquet / Arrow one record batch at a time.
+    """
+    lower = path.lower()
+    if lower.endswith(ARROW_SUFFIXES):
+        pa = _import_pyarrow()
+        if lower.endswith(".parquet"):
+            for batch in importlib.import_module("pyarrow.parquet").ParquetFile(path).iter_batches(ARROW_BATCH_SIZE):
+                yield from batch.to_pylist()
+            return
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield from reader.get_batch(i).to_pylist()
+        return
+    if not lower.endswith(JSONL_SUFFIXES):
+        check_results_path(path)
+    with _open_jsonl(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from None
+            if isinstance(record, dict):
+                yield record
+
+
+class ArrowResultsWriter(BackgroundWriter[dict[str, Any]]):
+    """
+    Writes results rows as Parquet (.parquet) or Arrow IPC (.arrow/.feather) in record batches.
+    Rows are buffered until ARROW_BATCH_SIZE is reached, so the file only becomes readable once closed.
+    """
+
+    def _open(self) -> IO[Any]:
+        pa = _import_pyarrow()
+        self._pa = pa
+        self._rows: list[dict[str, Any]] = []
+
+        def scored(name: str) -> Any:
+            return pa.list_(pa.struct([(name, pa.string()), ("confidence", pa.float64())]))
+
+        self._schema = pa.schema(
+            [
+                ("index", pa.int64()),
+                ("content_hash", pa.string()),
+                ("expected_labels", pa.list_(pa.string())),
+                ("detected_labels", pa.list_(pa.string())),
+                ("topic_confidences", scored("topic")),
+                ("analyzers", scored("analyzer")),
+                ("detected_details", pa.map_(pa.string(), pa.list_(pa.string()))),
+                ("blocked", pa.bool_()),
+                ("latency", pa.float64()),
+                ("request_id", pa.string()),
+                ("false_positives", pa.list_(pa.string())),
+                ("false_negatives", pa.list_(pa.string())),
+                ("true_positives", pa.list_(pa.string())),
+                ("true_negatives", pa.list_(pa.string())),
+            ]
+        )
+        f = Path(self.path).open(mode="wb")  # noqa: SIM115 - closed in _close()
+        if self.path.lower().endswith(".parquet"):
+            self._writer = importlib.import_module("pyarrow.parquet").ParquetWriter(f, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(f, self._schema)
+        return f
+
+    def _write(self, record: dict[str, Any]) -> None:
+        row = dict(record)
+        row["detected_details"] = list(row["detected_details"].items())
+        self._rows.append(row)
+        if len(self._rows) >= ARROW_BATCH_SIZE:
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        if self._rows:
+            self._writer.write_batch(self._pa.RecordBatch.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def _close(self) -> None:
+        self._write_batch()
+        self._writer.close()
+        if not self._file.closed:
+            super()._close()
+
+
+def open_results_writer(path: str) -> BackgroundWriter[dict[str, Any]]:
+    """Open a streaming results writer; the format is chosen from the file extension."""
+    check_results_path(path)
+    lower = path.lower()
+    if lower.endswith(ARROW_SUFFIXES):
+        return ArrowResultsWriter(path)
+    if lower.endswith(".gz"):
+        return GzipJsonlWriter(path)
+    return JsonlWriter(path)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.output.writers import BackgroundWriter, JsonlWriter
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+SERVICE_NAME = "aidr_aiguard_lab"
+
+
+def is_otlp_path(path: str) -> bool:
+    return path.lower().endswith((".otlp.json", ".otlp.jsonl"))
+
+
+class ChromeTraceWriter(BackgroundWriter[list[dict[str, Any]]]):
+    """
+    Background writer for the Chrome trace-event JSON array format (Perfetto, chrome://tracing).
+    Events are appended as they arrive; the array is closed in close().
+    """
+
+    def _open(self) -> IO[Any]:
+        f = super()._open()
+        f.write("[\n")
+        return f
+
+    def _write(self, record: list[dict[str, Any]]) -> None:
+        for event in record:
+            self._file.write(json.dumps(event, default=str) + ",\n")
+
+    def _close(self) -> None:
+        # Final metadata event, so the array needs no trailing-comma handling
+        self._file.write(
+            json.dumps({"ph": "M", "name": "process_name", "pid": os.getpid(), "args": {"name": SERVICE_NAME}})
+        )
+        self._file.write("\n]\n")
+        super()._close()
+
+
+def _otlp_value(value: object) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class CaseTracer:
+    """
+    Span tree per test case for --trace-out.
+
+    stage() blocks on a worker thread (rate-limit wait, request, parse, score, write) are collected in
+    a thread-local list; finish_case() turns them into one trace: a root "case" span from submission
+    to completion, a "queue_wait" span until a worker picked the case up, and the stages below it,
+    tagged with the test index, payload size, recipe and AI Guard request_id.
+
+    Output is Chrome trace-event JSON (one track per worker thread; queue waits as async events),
+    or OTLP JSON (one ExportTraceServiceRequest per line, one trace per case) for .otlp.json paths.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.otlp = is_otlp_path(path)
+        self.writer: BackgroundWriter[Any] = JsonlWriter(path) if self.otlp else ChromeTraceWriter(path)
+        self.pid = os.getpid()
+        # perf_counter() -> wall clock, for OTLP timestamps
+        self._origin = time.perf_counter()
+        self._origin_ns = time.time_ns()
+        self._local = threading.local()
+        self._named_threads: set[int] = set()
+        self._lock = threading.Lock()
+
+    def _spans(self) -> list[tuple[str, float, float]]:
+        spans: list[tuple[str, float, float]] | None = getattr(self._local, "spans", None)
+        if spans is None:
+            spans = self._local.spans = []
+        return spans
+
+    @contextlib.contextmanager
+    def span(self, name: str, inner: contextlib.AbstractContextManager[None]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            with inner:
+                yield
+        finally:
+            self._spans().append((name, start, time.perf_counter()))
+
+    def finish_case(self, submitted: float, attributes: Mapping[str, object]) -> None:
+        """Emit the current thread's spans as the trace of one test case, submitted at perf_counter() time."""
+        spans = self._spans()
+        self._local.spans = []
+        end = time.perf_counter()
+        picked_up = min((start for _, start, _ in spans), default=end)
+        if self.otlp:
+            self.writer.write(self._otlp_case(submitted, picked_up, end, spans, attributes))
+        else:
+            self.writer.write(self._chrome_case(submitted, picked_up, end, spans, attributes))
+
+    def run_span(self, name: str, start: float, end: float) -> None:
+        """A span that belongs to the run rather than one case, e.g. loading the dataset."""
+        if self.otlp:
+            self.writer.write(self._otlp_case(start, start, end, [], {}, root_name=name))
+        else:
+            self.writer.write(self._chrome_thread_name() + [self._chrome_event(name, start, end, {})])
+
+    def close(self) -> None:
+        self.writer.close()
+
+    # Chrome trace events: microseconds since the tracer started
+
+    def _us(self, t: float) -> float:
+        return round((t - self._origin) * 1e6, 3)
+
+    def _chrome_event(self, name: str, start: float, end: float, args: Mapping[str, object]) -> dict[str, Any]:
+        return {
+            "name": name,
+            "cat": "case",
+            "ph": "X",
+            "ts": self._us(start),
+            "dur": round((end - start) * 1e6, 3),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": dict(args),
+        }
+
+    def _chrome_thread_name(self) -> list[dict[str, Any]]:
+        tid = threading.get_ident()
+        with self._lock:
+            if tid in self._named_threads:
+                return []
+            self._named_threads.add(tid)
+        name = threading.current_thread().name
+        return [{"ph": "M", "name": "thread_name", "pid": self.pid, "tid": tid, "args": {"name": name}}]
+
+    def _chrome_case(
+        self,
+        submitted: float,
+        picked_up: float,
+        end: float,
+        spans: list[tuple[str, float, float]],
+        attributes: Mapping[str, object],
+    ) -> list[dict[str, Any]]:
+        # The root span starts at pick-up, so cases on one worker track nest; queue wait is an async event.
+        args = {k: v for k, v in attributes.items() if v is not None}
+        args["queue_wait_ms"] = round((picked_up - submitted) * 1000, 3)
+        events = self._chrome_thread_name()
+        events.append(self._chrome_event("case", picked_up, end, args))
+        events.extend(
+            self._chrome_event(name, start, stop, {"index": attributes.get("index")}) for name, start, stop in spans
+        )
+        queue = {
+            "name": "queue_wait",
+            "cat": "queue",
+            "id": attributes.get("seq", 0),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        events.append({**queue, "ph": "b", "ts": self._us(submitted), "args": {"index": attributes.get("index")}})
+        events.append({**queue, "ph": "e", "ts": self._us(picked_up)})
+        return events
+
+    # OTLP JSON: unix nanoseconds, hex ids
+
+    def _ns(self, t: float) -> str:
+        return str(self._origin_ns + int((t - self._origin) * 1e9))
+
+    def _otlp_case(
+        self,
+        submitted: float,
+        picked_up: float,
+        end: float,
+        spans: list[tuple[str, float, float]],
+        attributes: Mapping[str, object],
+        root_name: str = "case",
+    ) -> dict[str, Any]:
+        trace_id = f"{random.getrandbits(128):032x}"
+        root_id = f"{random.getrandbits(64):016x}"
+        error = attributes.get("error")
+
+        def otlp_span(
+            name: str, span_id: str, parent_id: str, start: float, stop: float, attrs: Mapping[str, object]
+        ) -> dict[str, Any]:
+            span: dict[str, Any] = {
+                "traceId": trace_id,
+                "spanId": span_id,
+                "name": name,
+                "kind": 3 if name == "request" else 1,  # CLIENT for the HTTP call, INTERNAL otherwise
+                "startTimeUnixNano": self._ns(start),
+                "endTimeUnixNano": self._ns(stop),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items() if v is not None],
+            }
+            if parent_id:
+                span["parentSpanId"] = parent_id
+            return span
+
+        out = [otlp_span(root_name, root_id, "", submitted, end, attributes)]
+        if error:
+            out[0]["status"] = {"code": 2, "message": str(error)}
+        if picked_up > submitted:
+            out.append(otlp_span("queue_wait", f"{random.getrandbits(64):016x}", root_id, submitted, picked_up, {}))
+        # Stages on one thread nest properly; the innermost open span that contains a stage is its parent.
+        stack: list[tuple[str, float]] = []
+        for name, start, stop in sorted(spans, key=lambda s: (s[1], -s[2])):
+            while stack and stack[-1][1] < stop:
+                stack.pop()
+            span_id = f"{random.getrandbits(64):016x}"
+            out.append(otlp_span(name, span_id, stack[-1][0] if stack else root_id, start, stop, {}))
+            stack.append((span_id, stop))
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": out}],
+                }
+            ]
+        }
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.utils.colors import DARK_YELLOW, RESET
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+
+class VerdictWriter:
+    """
+    Emits one JSON line per scored test case as soon as it is available, flushed immediately so the
+    next stage of a pipeline sees it without delay ("-" writes to stdout).
+
+    Records are keyed by submission sequence number. With preserve_order, a record that finishes ahead
+    of earlier ones is held until they arrive; the hold-back buffer is bounded by the number of
+    requests in flight, since every submitted case produces exactly one record (a verdict or an error).
+    """
+
+    def __init__(self, path: str, preserve_order: bool = False, stdout: TextIO | None = None) -> None:
+        self.path = path
+        self.preserve_order = preserve_order
+        self.records_written = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._pending: dict[int, str] = {}
+        self._next_seq = 0
+        if path == "-":
+            assert stdout is not None, "stdout stream required for '-'"
+            self._file = stdout
+            self._owns_file = False
+        else:
+            self._file = Path(path).open(mode="w", encoding="utf-8")  # noqa: SIM115 - closed in close()
+            self._owns_file = True
+
+    def write(self, seq: int, record: dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if self.closed:
+                return
+            if not self.preserve_order:
+                self._emit(line)
+                return
+            self._pending[seq] = line
+            while self._next_seq in self._pending:
+                self._emit(self._pending.pop(self._next_seq))
+                self._next_seq += 1
+
+    def _emit(self, line: str) -> None:
+        try:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.records_written += 1
+        except BrokenPipeError:
+            # Downstream stopped reading (e.g. `| head`); keep scoring, drop further records.
+            print(f"{DARK_YELLOW}Verdict output closed by reader; no further records written.{RESET}")
+            self.closed = True
+
+    def close(self) -> None:
+        """Emit any held-back records (in order) and close the file. Safe to call more than once."""
+        with self._lock:
+            for seq in sorted(self._pending):
+                if not self.closed:
+                    self._emit(self._pending[seq])
+            self._pending.clear()
+            if self._owns_file and not self._file.closed:
+                self._file.close()
+            self.closed = True
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import abc
+import contextlib
+import csv
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Generic, TypeVar
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.utils.colors import DARK_RED, RESET
+
+T = TypeVar("T")
+
+_CLOSE = object()
+
+
+class BackgroundWriter(abc.ABC, Generic[T]):
+    """
+    Append records to a file from a dedicated writer thread.
+
+    Callers only enqueue records, so scoring threads never block on disk I/O.  The writer thread
+    buffers writes, flushes every flush_interval seconds (so `tail -f` sees rows promptly) and fsyncs
+    every fsync_interval seconds.  Subclasses implement _write() and may override _open().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = defaults.writer_flush_interval,
+        fsync_interval: float = defaults.writer_fsync_interval,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+        self.closed = False
+        self._queue: queue.SimpleQueue[object] = queue.SimpleQueue()
+        self._file: IO[Any] = self._open()
+        self._thread = threading.Thread(target=self._run, name=f"writer:{Path(path).name}", daemon=True)
+        self._thread.start()
+
+    def _open(self) -> IO[Any]:
+        return Path(self.path).open(mode="w", newline="", encoding="utf-8")
+
+    @abc.abstractmethod
+    def _write(self, record: T) -> None: ...
+
+    def _close(self) -> None:
+        self._flush(sync=True)
+        self._file.close()
+
+    def _flush(self, sync: bool) -> None:
+        self._file.flush()
+        if sync:
+            with contextlib.suppress(OSError, ValueError):
+                os.fsync(self._file.fileno())
+
+    def write(self, record: T) -> None:
+        if not self.closed:
+            self._queue.put(record)
+
+    def close(self) -> None:
+        """Drain pending records, fsync and close. Safe to call more than once."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run(self) -> None:
+        last_flush = last_sync = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                break
+            if item is not None:
+                try:
+                    self._write(item)  # type: ignore[arg-type]
+                    self.records_written += 1
+                    dirty = True
+                except Exception as e:
+                    print(f"{DARK_RED}Error writing to {self.path}: {e}{RESET}")
+            now = time.monotonic()
+            if dirty and now - last_flush >= self.flush_interval:
+                sync = now - last_sync >= self.fsync_interval
+                self._flush(sync)
+                last_flush = now
+                if sync:
+                    last_sync = now
+                dirty = False
+        self._close()
+
+
+class CsvWriter(BackgroundWriter[list[object]]):
+    """Background CSV writer; the header row is written (and flushed) immediately on open."""
+
+    def __init__(self, path: str, header: list[str], **kwargs: Any) -> None:
+        self.header = header
+        super().__init__(path, **kwargs)
+
+    def _open(self) -> IO[Any]:
+        f = super()._open()
+        self._csvwriter = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        self._csvwriter.writerow(self.header)
+        f.flush()
+        return f
+
+    def _write(self, record: list[object]) -> None:
+        self._csvwriter.writerow(record)
+
+
+class JsonlWriter(BackgroundWriter[dict[str, Any]]):
+    """Background JSON Lines writer, one record per line."""
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+
+class GzipJsonlWriter(JsonlWriter):
+    """JSON Lines writer with gzip compression (each flush emits a sync point, so partial files stay readable)."""
+
+    def _open(self) -> IO[Any]:
+        return gzip.open(self.path, mode="wt", encoding="utf-8")
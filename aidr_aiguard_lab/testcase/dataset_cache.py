@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import MutableSequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
+
+from aidr_aiguard_lab.config.settings import Settings
+from aidr_aiguard_lab.testcase.testcase import TestCase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+_MAGIC = b"AIGLDSC\x01"
+# magic, test case count, offset of the offset table (native uint64), offset and length of the metadata
+_HEADER = struct.Struct("<8sQQQQ")
+
+
+def _package_version() -> str:
+    try:
+        return importlib.metadata.version("aidr-aiguard-lab")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def dataset_cache_key(input_file: str, options: dict[str, Any]) -> str:
+    """
+    SHA-256 of the input file's bytes, the loading options that change the normalized test cases and the
+    package version, so snapshots written by another release (which may normalize differently) are rebuilt.
+    """
+    with Path(input_file).open("rb") as f:
+        digest = hashlib.file_digest(f, "sha256")
+    digest.update(json.dumps({"version": _package_version(), **options}, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedTestCases(MutableSequence[TestCase]):
+    """
+    The test cases of a dataset snapshot, memory-mapped. Each one is decoded the first time it is
+    accessed and kept from then on, so opening a snapshot costs the same for any number of cases and
+    changes made to a test case (index, weight, labels) stick. Any insert or delete first hydrates the
+    remaining cases.
+    """
+
+    def __init__(self, mapped: mmap.mmap, offsets: memoryview, settings: Settings) -> None:
+        self._mapped = mapped
+        self._offsets = offsets
+        self._settings = settings
+        self._cases: list[TestCase | None] = [None] * (len(offsets) - 1)
+        self._lock = threading.Lock()
+
+    def _hydrate(self, index: int) -> TestCase:
+        with self._lock:
+            test = self._cases[index]
+            if test is None:
+                start, end = self._offsets[index], self._offsets[index + 1]
+                test = TestCase.from_record(json.loads(self._mapped[start:end]), self._settings)
+                self._cases[index] = test
+        return test
+
+    def _hydrate_all(self) -> list[TestCase | None]:
+        return [self._hydrate(i) for i in range(len(self._cases))]
+
+    def __len__(self) -> int:
+        return len(self._cases)
+
+    @overload
+    def __getitem__(self, index: int) -> TestCase: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[TestCase]: ...
+    def __getitem__(self, index: int | slice) -> TestCase | list[TestCase]:
+        if isinstance(index, slice):
+            return [self._hydrate(i) for i in range(len(self._cases))[index]]
+        return self._hydrate(range(len(self._cases))[index])
+
+    def __iter__(self) -> Iterator[TestCase]:
+        for i in range(len(self._cases)):
+            yield self._hydrate(i)
+
+    @overload
+    def __setitem__(self, index: int, value: TestCase) -> None: ...
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[TestCase]) -> None: ...
+    def __setitem__(self, index: int | slice, value: Any) -> None:
+        tests = self._hydrate_all()
+        tests[index] = value
+        self._cases = tests
+
+    def __delitem__(self, index: int | slice) -> None:
+        tests = self._hydrate_all()
+        del tests[index]
+        self._cases = tests
+
+    def insert(self, index: int, value: TestCase) -> None:
+        tests = self._hydrate_all()
+        tests.insert(index, value)
+        self._cases = tests
+
+
+class DatasetCache:
+    """
+    --dataset-cache: a binary snapshot of the test cases loaded from a .json/.jsonl dataset, after all
+    the normalization done while loading (labels, synonyms, settings and expected detectors hydration,
+    valid labels), so the next run with the same file and options starts without re-parsing it.
+
+    Snapshots are named after the input file and keyed by dataset_cache_key, so an edited file, different
+    label options or another release of the lab simply miss and write a new one. The file holds each test
+    case as compact JSON (TestCase.to_record(), without the dataset's global settings), a table of their
+    offsets and JSON metadata (the dataset's global settings and enabled topics); it is written next to its
+    final name and moved into place when complete. Reading a snapshot only decodes JSON, so it cannot run
+    code.
+    """
+
+    def __init__(self, directory: str, input_file: str, key: str) -> None:
+        self.key = key
+        self.path = Path(directory) / f"{Path(input_file).name}.{key[:16]}.aigl"
+
+    def load(self) -> tuple[CachedTestCases, Settings, list[str]] | None:
+        """
+        The cached test cases, the dataset's global settings and its enabled topics, or None if there is
+        no (valid) snapshot for this key.
+        """
+        try:
+            with self.path.open("rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, count, offsets_at, meta_at, meta_len = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC:
+                return None
+            offsets = memoryview(mapped)[offsets_at : offsets_at + 8 * (count + 1)].cast("Q")
+            meta = json.loads(mapped[meta_at : meta_at + meta_len])
+            if meta["key"] != self.key:
+                return None
+            settings = Settings.from_record(meta["settings"])
+        except (struct.error, TypeError, ValueError, KeyError):
+            return None
+        return CachedTestCases(mapped, offsets, settings), settings, meta["enabled_topics"]
+
+    def save(self, tests: Iterable[TestCase], settings: Settings, enabled_topics: list[str]) -> None:
+        """Write a snapshot of tests loaded with settings; an existing snapshot for the same key is replaced."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f".{self.path.name}.partial")
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        offsets: list[int] = []
+        with partial.open("wb") as f:
+            f.write(bytes(_HEADER.size))
+            for test in tests:
+                offsets.append(f.tell())
+                f.write(encoder.encode(test.to_record(settings)).encode("utf-8"))
+            offsets.append(f.tell())
+            offsets_at = f.tell()
+            f.write(array("Q", offsets).tobytes())
+            meta_at = f.tell()
+            meta = {"key": self.key, "settings": settings.to_record(), "enabled_topics": enabled_topics}
+            meta_blob = encoder.encode(meta).encode("utf-8")
+            f.write(meta_blob)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, len(offsets) - 1, offsets_at, meta_at, len(meta_blob)))
+            f.flush()
+            os.fsync(f.fileno())
+        partial.replace(self.path)
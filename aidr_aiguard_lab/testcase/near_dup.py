@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sys
+from array import array
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.outcome_matrix import optional_numpy
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+_TOKEN = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = defaults.near_dup_shingle) -> set[bytes]:
+    """
+    Word n-grams of the normalized (lower-cased, punctuation-free) text. A text shorter than one
+    n-gram is a single shingle, so short prompts only match prompts with the same words.
+    """
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens).encode("utf-8")}
+    return {" ".join(tokens[i : i + size]).encode("utf-8") for i in range(len(tokens) - size + 1)}
+
+
+def case_text(test: TestCase) -> str:
+    """The system and user messages of a test case, the part that makes two prompts near-duplicates."""
+    return "\n".join(
+        str(message.get("content", "")) for message in test.messages if message.get("role") in ("system", "user")
+    )
+
+
+class MinHasher:
+    """
+    MinHash signatures: for each of num_perm hash functions, the minimum hash over a set's shingles.
+
+    The num_perm 32-bit hashes of a shingle are one SHAKE-128 digest of it, so a shingle costs a single
+    hash call; the column minimums are taken with NumPy when it is installed (same result without).
+    """
+
+    def __init__(self, num_perm: int = defaults.near_dup_permutations) -> None:
+        self.num_perm = num_perm
+        self._np = optional_numpy()
+
+    def signature(self, shingle_set: set[bytes]) -> tuple[int, ...]:
+        size = 4 * self.num_perm
+        digests = [hashlib.shake_128(shingle).digest(size) for shingle in shingle_set]
+        np = self._np
+        if np is not None:
+            return tuple(np.frombuffer(b"".join(digests), dtype="<u4").reshape(-1, self.num_perm).min(axis=0).tolist())
+        return tuple(map(min, zip(*(_le_uint32(digest) for digest in digests), strict=True)))
+
+
+def _le_uint32(digest: bytes) -> array[int]:
+    values = array("I", digest)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def near_duplicate_clusters(
+    tests: Sequence[TestCase],
+    threshold: float = defaults.near_dup_threshold,
+    bands: int = defaults.near_dup_bands,
+    num_perm: int = defaults.near_dup_permutations,
+) -> list[list[int]]:
+    """
+    Groups of near-duplicate test cases, as lists of positions in tests (each sorted, the groups in
+    order of their first position); test cases without a near-duplicate are left out.
+
+    Two test cases are near-duplicates when the estimated Jaccard similarity of their shingle sets is
+    at least threshold, they have the same labels and they use the same recipe. Candidate pairs come
+    from locality-sensitive hashing: the signatures are cut into bands, and cases that agree on all
+    rows of any band share a bucket. Only candidates are compared, so the cost stays close to linear
+    in the number of test cases. Near-duplicate pairs are merged transitively (union-find).
+    """
+    rows = num_perm // bands
+    hasher = MinHasher(rows * bands)
+    signatures = [hasher.signature(shingles(case_text(test))) for test in tests]
+
+    parent = list(range(len(tests)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: defaultdict[tuple[object, ...], list[int]] = defaultdict(list)
+    for i, (test, signature) in enumerate(zip(tests, signatures, strict=True)):
+        group = (json.dumps(test.label, sort_keys=True, default=str), test.get_recipe())
+        for band in range(bands):
+            buckets[(group, band, signature[band * rows : (band + 1) * rows])].append(i)
+
+    min_matches = threshold * rows * bands
+    for members in buckets.values():
+        # Each case is checked against one case per cluster found so far in the bucket
+        leaders: list[int] = []
+        for i in members:
+            for leader in leaders:
+                root_i, root_leader = find(i), find(leader)
+                if root_i == root_leader:
+                    break
+                if sum(x == y for x, y in zip(signatures[i], signatures[leader], strict=True)) >= min_matches:
+                    parent[max(root_i, root_leader)] = min(root_i, root_leader)
+                    break
+            else:
+                leaders.append(i)
+
+    clusters: defaultdict[int, list[int]] = defaultdict(list)
+    for i in range(len(tests)):
+        clusters[find(i)].append(i)
+    return [members for _, members in sorted(clusters.items()) if len(members) > 1]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
 from typing import TYPE_CHECKING, Any
 
 from pydantic import BaseModel, Field
@@ -222,6 +224,91 @@ class ExpectedDetectors:
 
         return expected_labels
 
+    @classmethod
+    def from_test_dict(cls, expected_detectors: dict[str, Any]) -> ExpectedDetectors:
+        """Hydrate the expected_detectors of a test case from its .json/.jsonl form."""
+        ed = cls()
+        for name, value in expected_detectors.items():
+            if name == "prompt_injection" and value is not None:
+                ed.prompt_injection = DetectorResult(
+                    detected=value.get("detected", False),
+                    data=DetectorData(
+                        action=value["data"].get("action", ""),
+                        analyzer_responses=[
+                            AnalyzerResponse(
+                                analyzer=ar.get("analyzer", ""),
+                                confidence=ar.get("confidence", 0.0),
+                            )
+                            for ar in value["data"].get("analyzer_responses", [])
+                        ],
+                    ),
+                )
+            elif name == "code" and value is not None:
+                ed.code_detection = CodeResult(
+                    detected=value.get("detected", False),
+                    data=value["data"],
+                )
+            elif name == "language" and value is not None:
+                ed.language_detection = DetectorResult(
+                    detected=value.get("detected", False),
+                    data=DetectorData(
+                        action=value["data"].get("action", ""),
+                        analyzer_responses=[
+                            AnalyzerResponse(
+                                analyzer=ar.get("analyzer", ""),
+                                confidence=ar.get("confidence", 0.0),
+                            )
+                            for ar in value["data"].get("analyzer_responses", [])
+                        ],
+                    ),
+                )
+            elif name == "topic" and value is not None:
+                ed.topic = TopicResult(
+                    detected=value.get("detected", False),
+                    action=value.get("action", ""),
+                    topics=[
+                        TopicResponse(
+                            topic=tr.get("topic", ""),
+                            confidence=tr.get("confidence", 0.0),
+                        )
+                        for tr in value["data"].get("topics", [])
+                    ],
+                )
+            elif name in ("malicious_entity", "custom_entity") and value is not None:
+                setattr(
+                    ed,
+                    name,
+                    EntityResult(
+                        detected=value.get("detected", False),
+                        data={"entities": [EntityResponse(**er) for er in value["data"].get("entities", [])]},
+                    ),
+                )
+        return ed
+
+    def to_test_dict(self) -> dict[str, Any]:
+        """The .json/.jsonl form of the expected detectors that are set (from_test_dict() reverses it)."""
+        data: dict[str, Any] = {}
+        for name, key in (("prompt_injection", "prompt_injection"), ("language_detection", "language")):
+            result: DetectorResult | None = getattr(self, name)
+            if result is not None:
+                data[key] = {"detected": result.detected, "data": result.data.model_dump()}
+        if self.code_detection is not None:
+            data["code"] = {"detected": self.code_detection.detected, "data": dict(self.code_detection.data)}
+        if self.topic is not None:
+            data["topic"] = {
+                "detected": self.topic.detected,
+                "action": self.topic.action,
+                "data": {"topics": [asdict(tr) for tr in self.topic.topics]},
+            }
+        for name in ("malicious_entity", "custom_entity"):
+            entities: EntityResult | None = getattr(self, name)
+            if entities is not None:
+                data[name] = {
+                    "detected": entities.detected,
+                    "data": {"entities": [asdict(er) for er in entities.data.get("entities", [])]},
+                }
+        return data
+
 
 @dataclass
 class TestCase:
@@ -240,6 +327,8 @@ class TestCase:
     """Optional labels for the test case."""
     index: int | None = None
     """Optional index of the test case in the input, useful for tracking."""
+    weight: float = 1.0
+    """Weight in the cluster-weighted metrics: 1 / size of its near-duplicate cluster (--near-dup-policy weight)."""
 
     def __init__(
         self,
@@ -275,66 +364,9 @@ class TestCase:
         if settings is not None:
             # TODO: Do the settings.overrides etc. work here instead of in AIGuardTests:load_from_file()
             self.settings = settings
-        if expected_detectors:
-            ed = ExpectedDetectors()
-            for name, value in expected_detectors.items():
-                if name == "prompt_injection" and value is not None:
-                    ed.prompt_injection = DetectorResult(
-                        detected=value.get("detected", False),
-                        data=DetectorData(
-                            action=value["data"].get("action", ""),
-                            analyzer_responses=[
-                                AnalyzerResponse(
-                                    analyzer=ar.get("analyzer", ""),
-                                    confidence=ar.get("confidence", 0.0),
-                                )
-                                for ar in value["data"].get("analyzer_responses", [])
-                            ],
-                        ),
-                    )
-                elif name == "code" and value is not None:
-                    ed.code_detection = CodeResult(
-                        detected=value.get("detected", False),
-                        data=value["data"],
-                    )
-                elif name == "language" and value is not None:
-                    ed.language_detection = DetectorResult(
-                        detected=value.get("detected", False),
-                        data=DetectorData(
-                            action=value["data"].get("action", ""),
-                            analyzer_responses=[
-                                AnalyzerResponse(
-                                    analyzer=ar.get("analyzer", ""),
-                                    confidence=ar.get("confidence", 0.0),
-                                )
-                                for ar in value["data"].get("analyzer_responses", [])
-                            ],
-                        ),
-                    )
-                elif name == "topic" and value is not None:
-                    ed.topic = TopicResult(
-                        detected=value.get("detected", False),
-                        action=value.get("action", ""),
-                        topics=[
-                            TopicResponse(
-                                topic=tr.get("topic", ""),
-                                confidence=tr.get("confidence", 0.0),
-                            )
-                            for tr in value["data"].get("topics", [])
-                        ],
-                    )
-                elif name in ("malicious_entity", "custom_entity") and value is not None:
-                    setattr(
-                        ed,
-                        name,
-                        EntityResult(
-                            detected=value.get("detected", False),
-                            data={"entities": [EntityResponse(**er) for er in value["data"].get("entities", [])]},
-                        ),
-                    )
-            self.expected_detectors = ed
-        else:
-            self.expected_detectors = ExpectedDetectors()
+        self.expected_detectors = (
+            ExpectedDetectors.from_test_dict(expected_detectors) if expected_detectors else ExpectedDetectors()
+        )
 
     # TODO: The Settings.system_prompt could be there AND there could be a
     # system message in the messages list.
@@ -399,9 +431,64 @@ class TestCase:
         self.label = filtered
         return self.label
 
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the canonical JSON of the messages and tools, i.e. what is actually sent to AI Guard.
+        Stable across runs and datasets, so results can be joined on it even when indexes differ.
+        """
+        canonical = json.dumps(
+            {"messages": self.messages, "tools": self.tools}, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
     def __repr__(self) -> str:
         return f"TestCase(settings={self.settings!r}, messages={self.messages!r}, tools={self.tools!r})"
 
+    def to_record(self, shared_settings: Settings | None = None) -> dict[str, Any]:
+        """
+        The loaded (normalized) test case as plain JSON-compatible values, for handing test cases between
+        processes and storing them in --dataset-cache snapshots. Fields at their default are left out, and
+        so are the settings if they are shared_settings (the dataset's global settings).
+        """
+        record: dict[str, Any] = {"messages": self.messages, "label": self.label}
+        if self.tools:
+            record["tools"] = self.tools
+        if self.settings is not shared_settings:
+            record["settings"] = self.settings.to_record() if self.settings is not None else None
+        expected_detectors = self.expected_detectors.to_test_dict()
+        if expected_detectors:
+            record["expected_detectors"] = expected_detectors
+        if self.enabled_override_detectors:
+            record["enabled_override_detectors"] = self.enabled_override_detectors
+        if self.index is not None:
+            record["index"] = self.index
+        if self.weight != 1.0:
+            record["weight"] = self.weight
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any], shared_settings: Settings | None = None) -> TestCase:
+        """
+        Rebuild a test case from to_record() with the same shared_settings. The record was validated and
+        normalized when it was loaded, so this skips __init__ and neither copies nor checks it again.
+        """
+        test = cls.__new__(cls)
+        test.messages = record["messages"]
+        test.tools = record.get("tools") or []
+        test.label = record["label"]
+        settings = record.get("settings", shared_settings)
+        test.settings = Settings.from_record(settings) if isinstance(settings, dict) else settings
+        expected_detectors = record.get("expected_detectors")
+        test.expected_detectors = (
+            ExpectedDetectors.from_test_dict(expected_detectors) if expected_detectors else ExpectedDetectors()
+        )
+        test.enabled_override_detectors = record.get("enabled_override_detectors") or []
+        if "index" in record:
+            test.index = record["index"]
+        if "weight" in record:
+            test.weight = record["weight"]
+        return test
+
     @classmethod
     # TODO: REVIEW ALL from_dict methods to ensure they are consistent and correct.
     # Add more isinstance checks to ensure that the data is in the expected format.
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Log-spaced bucket upper bounds (seconds): 1ms .. ~5min, each bucket ~10% wider than the last.
+# Fixed bounds keep every histogram the same small size no matter how many observations it sees.
+LATENCY_BUCKETS: tuple[float, ...] = tuple(0.001 * 1.1**i for i in range(133))
+
+
+class LatencyHistogram:
+    """
+    Constant-memory latency histogram with approximate percentiles.
+
+    Not thread-safe; callers are expected to hold their own lock around observe() / merge() / reset().
+    """
+
+    def __init__(self) -> None:
+        self.counts: list[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: LatencyHistogram) -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the approximate q-th percentile (0-100), interpolated within the bucket it falls in.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if not c:
+                continue
+            if seen + c >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                fraction = (rank - seen) / c
+                return min(lower + (upper - lower) * fraction, self.max)
+            seen += c
+        return self.max
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import contextlib
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.utils.colors import DARK_RED, DARK_YELLOW, RESET
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import FrameType
+
+    from aidr_aiguard_lab.output.traces import CaseTracer
+
+# The stages a run is broken down into, in reporting order. Other names are reported after these.
+STAGES = ("load", "rate_limit", "request", "parse", "score", "write")
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class StageTimers:
+    """
+    Wall-clock time spent in each stage of a run (--profile wall).
+
+    Every thread accumulates into its own table, so timing a stage takes no lock. Stages may nest
+    (e.g. "parse" inside "request"); each stage is charged only its own time, not its children's,
+    so the totals add up to the time actually covered.
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # name -> [calls, total seconds, max seconds], one table per thread
+        self._tables: list[dict[str, list[float]]] = []
+
+    def _table(self) -> dict[str, list[float]]:
+        table: dict[str, list[float]] | None = getattr(self._local, "table", None)
+        if table is None:
+            table = self._local.table = {}
+            self._local.children = []  # child time of each open stage, innermost last
+            with self._lock:
+                self._tables.append(table)
+        return table
+
+    def add(self, name: str, seconds: float) -> None:
+        table = self._table()
+        stats = table.get(name)
+        if stats is None:
+            table[name] = [1, seconds, seconds]
+            return
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._table()
+        children: list[float] = self._local.children
+        children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add(name, elapsed - children.pop())
+            if children:
+                children[-1] += elapsed
+
+    def summary(self) -> dict[str, tuple[int, float, float, int]]:
+        """Merge the per-thread tables: name -> (calls, total seconds, max seconds, threads)."""
+        merged: dict[str, tuple[int, float, float, int]] = {}
+        with self._lock:
+            tables = list(self._tables)
+        for table in tables:
+            for name, (calls, total, longest) in list(table.items()):
+                prev_calls, prev_total, prev_max, threads = merged.get(name, (0, 0.0, 0.0, 0))
+                merged[name] = (prev_calls + int(calls), prev_total + total, max(prev_max, longest), threads + 1)
+        return merged
+
+    def print_table(self) -> None:
+        summary = self.summary()
+        wall = time.perf_counter() - self.start_time
+        if not summary:
+            print(f"{DARK_YELLOW}Stage timings: nothing recorded.{RESET}")
+            return
+        covered = sum(total for _, total, _, _ in summary.values()) or 1.0
+        names = [s for s in STAGES if s in summary] + sorted(set(summary) - set(STAGES))
+        print(f"\n{DARK_YELLOW}Stage timings (wall {wall:.2f}s, summed over all threads):{RESET}")
+        print(f"  {'Stage':<12}{'Calls':>9}{'Total s':>11}{'Mean ms':>10}{'Max ms':>10}{'Threads':>9}{'Share':>8}")
+        for name in names:
+            calls, total, longest, threads = summary[name]
+            mean_ms = total / calls * 1000 if calls else 0.0
+            print(
+                f"  {name:<12}{calls:>9}{total:>11.3f}{mean_ms:>10.3f}{longest * 1000:>10.3f}"
+                f"{threads:>9}{total / covered:>8.1%}"
+            )
+        if "request" in summary and "parse" not in summary:
+            print("  (response parsing is included in request unless --fast-parse is used)")
+
+
+# Timers and case tracer for the current run; with neither set (the default) stage() is a no-op.
+_active: StageTimers | None = None
+_tracer: CaseTracer | None = None
+
+
+def set_stage_timers(timers: StageTimers | None) -> StageTimers | None:
+    """Install the timers stage() records into (None to turn timing off) and return them."""
+    global _active
+    _active = timers
+    return timers
+
+
+def set_case_tracer(tracer: CaseTracer | None) -> CaseTracer | None:
+    """Install the tracer stage() records spans into (None to turn tracing off) and return it."""
+    global _tracer
+    _tracer = tracer
+    return tracer
+
+
+def stage(name: str) -> contextlib.AbstractContextManager[None]:
+    """
+    Time a block as the named stage when --profile wall is on, and record it as a span of the current
+    test case when --trace-out is on; otherwise a shared no-op context.
+    """
+    timers, tracer = _active, _tracer
+    if tracer is None:
+        return _NULL_STAGE if timers is None else timers.stage(name)
+    return tracer.span(name, _NULL_STAGE if timers is None else timers.stage(name))
+
+
+def record_stage(name: str, start: float, end: float | None = None) -> None:
+    """Record an already measured perf_counter() interval as a run-level stage (e.g. loading the dataset)."""
+    timers, tracer = _active, _tracer
+    if timers is None and tracer is None:
+        return
+    end = time.perf_counter() if end is None else end
+    if timers is not None:
+        timers.add(name, end - start)
+    if tracer is not None:
+        tracer.run_span(name, start, end)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sampling profiler for --profile cpu.
+
+    A background thread records the Python stack of every other thread at a fixed interval. The
+    samples are written in the folded format ("thread;outer;...;inner count" per line) read by
+    flamegraph.pl, speedscope and similar tools. Worker threads are grouped under one name so their
+    samples add up. Samples include time spent waiting (rate limiter, network), which shows up as
+    stacks ending in sleep / socket calls.
+    """
+
+    def __init__(self, path: str, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self.samples = Counter[str]()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name.split("_")[0] for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: list[str] = []
+                current: FrameType | None = frame
+                while current is not None:
+                    stack.append(_frame_label(current))
+                    current = current.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def stop(self) -> None:
+        """Stop sampling and write the folded stacks to path."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            with Path(self.path).open(mode="w", encoding="utf-8") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"{DARK_RED}Error writing CPU profile to {self.path}: {e}{RESET}")
+            return
+        print(f"\n{DARK_YELLOW}CPU profile ({self.sample_count} samples) written to {self.path}{RESET}")
+        print(f"{DARK_YELLOW}Top functions by samples:{RESET}")
+        for label, count in self.top_functions():
+            print(f"  {count:>8}  {label}")
+
+    def top_functions(self, limit: int = 10) -> list[tuple[str, int]]:
+        """Innermost frames by sample count (self time)."""
+        leaves = Counter[str]()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+def start_profile(mode: str | None, path: str, interval: float) -> tuple[StageTimers | None, StackSampler | None]:
+    """Turn on the --profile mode for a run: stage timers for "wall", the stack sampler for "cpu"."""
+    timers = set_stage_timers(StageTimers() if mode == "wall" else None)
+    sampler = StackSampler(path, interval) if mode == "cpu" else None
+    if sampler is not None:
+        sampler.start()
+    return timers, sampler
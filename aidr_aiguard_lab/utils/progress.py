@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+from aidr_aiguard_lab.utils.histogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from aidr_aiguard_lab.manager.efficacy_tracker import EfficacyTracker
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:d}:{secs:02d}"
+
+
+class ProgressRenderer:
+    """
+    Single background thread that renders run progress.
+
+    Worker threads only call record(), which bumps a couple of counters under a short lock; all
+    formatting and terminal I/O happens here a few times a second.  When stdout is not a TTY (e.g. CI
+    logs) it falls back to one plain log line every log_interval seconds.
+    """
+
+    def __init__(
+        self,
+        total: int | None,
+        efficacy: EfficacyTracker | None = None,
+        deadline: float | None = None,
+        interval: float = 0.25,
+        log_interval: float = 10.0,
+    ) -> None:
+        self.total = total
+        self.efficacy = efficacy
+        self.deadline = deadline  # time.monotonic() value, for --duration runs
+        self.is_tty = sys.stdout.isatty()
+        self.interval = interval if self.is_tty else log_interval
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.completed = 0
+        self.latency = LatencyHistogram()
+        self.start_time = time.monotonic()
+        # (timestamp, completed) samples covering roughly the last 5 seconds, for current RPS
+        self._samples: deque[tuple[float, int]] = deque()
+
+    def record(self, latency: float | None = None) -> None:
+        with self._lock:
+            self.completed += 1
+            if latency is not None:
+                self.latency.observe(latency)
+
+    def start(self) -> None:
+        self.start_time = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._render(final=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._render()
+
+    def status_line(self) -> str:
+        now = time.monotonic()
+        with self._lock:
+            completed = self.completed
+            p95 = self.latency.percentile(95)
+
+        self._samples.append((now, completed))
+        while len(self._samples) > 2 and now - self._samples[0][0] > 5.0:
+            self._samples.popleft()
+        first_t, first_c = self._samples[0]
+        elapsed = now - self.start_time
+        if now - first_t > 0:
+            rps = (completed - first_c) / (now - first_t)
+        else:
+            rps = completed / elapsed if elapsed > 0 else 0.0
+
+        fp = fn = errors = 0
+        if self.efficacy is not None:
+            fp = self.efficacy.fp_count
+            fn = self.efficacy.fn_count
+            errors = sum(dict(self.efficacy.errors).values())  # copy: workers may add new keys concurrently
+
+        done = f"{completed}/{self.total} ({completed / self.total * 100:.1f}%)" if self.total else f"{completed}"
+        if self.deadline is not None:
+            eta = _format_seconds(max(self.deadline - now, 0.0))
+        elif self.total and rps > 0:
+            eta = _format_seconds(max(self.total - completed, 0) / rps)
+        else:
+            eta = "--"
+
+        return (
+            f"{done} | {rps:.1f} rps | p95 {p95:.2f}s | FP {fp} FN {fn} Err {errors} | "
+            f"elapsed {_format_seconds(elapsed)} ETA {eta}"
+        )
+
+    def _render(self, final: bool = False) -> None:
+        line = self.status_line()
+        if self.is_tty:
+            end = "\n" if final else ""
+            sys.stdout.write(f"\r\033[2K{line}{end}")
+            sys.stdout.flush()
+        else:
+            print(f"[progress] {line}", flush=True)
@@ -1,20 +1,21 @@
 from __future__ import annotations
 
+import math
 import threading
 import time
 from collections import deque
 from typing import TYPE_CHECKING, Any, cast
 
-from pydantic_core import to_json
-
 from aidr_aiguard_lab.defaults import defaults
 from aidr_aiguard_lab.utils.colors import DARK_YELLOW, RESET
+from aidr_aiguard_lab.utils.profiling import stage
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Sequence
 
     from crowdstrike_aidr.models import PangeaResponse
-    from crowdstrike_aidr.models.ai_guard import GuardChatCompletionsResponse
+
+    from aidr_aiguard_lab.api.pangea_api import FastGuardResponse, GuardResponse
 
 
 def remove_topic_prefix(labels: list[str]) -> list[str]:
@@ -90,10 +91,12 @@ def apply_synonyms(labels: str | list[str], synonyms: list[str], replacement: st
 
 
 def formatted_json_str(json_data: object) -> str:
+    from pydantic_core import to_json  # deferred: utils is imported by the CLI entry point
+
     return to_json(json_data, indent=4).decode("utf-8")
 
 
-def get_duration(response: PangeaResponse | None, verbose: bool = False) -> float:
+def get_duration(response: PangeaResponse | FastGuardResponse | None, verbose: bool = False) -> float:
     if response is None:
         return 0
 
@@ -106,17 +109,15 @@ def get_duration(response: PangeaResponse | None, verbose: bool = False) -> floa
     return duration.total_seconds()
 
 
-def print_response(
-    messages: Sequence[object], response: GuardChatCompletionsResponse, result_only: bool = False
-) -> None:
+def print_response(messages: Sequence[object], response: GuardResponse, result_only: bool = False) -> None:
     """Utility to neatly print the API response."""
 
-    formatted_json_response = response.model_dump_json(indent=4)
+    formatted_json_response = formatted_json_str(response)
 
     print(f"messages: {messages[:1]}")
     if response.status == "Success":
         assert response.result is not None
-        formatted_json_result = response.result.model_dump_json(indent=4)
+        formatted_json_result = formatted_json_str(response.result)
 
         if result_only:
             print(f"{formatted_json_result}\n")
@@ -128,6 +129,39 @@ def print_response(
         print(f"{formatted_json_response}{RESET}")
 
 
+_DURATION_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as "90", "90s", "15m", "4h", "1d" or "1h30m" into seconds.
+    A bare number is taken as seconds.
+    """
+    text = value.strip().lower()
+    if not text:
+        raise ValueError("Empty duration")
+    try:
+        seconds = float(text)
+    except ValueError:
+        seconds = 0.0
+        number = ""
+        for ch in text:
+            if ch.isdigit() or ch == ".":
+                number += ch
+            elif ch in _DURATION_UNITS and number:
+                seconds += float(number) * _DURATION_UNITS[ch]
+                number = ""
+            else:
+                raise ValueError(f"Invalid duration: {value!r}") from None
+        if number:
+            raise ValueError(f"Invalid duration (missing unit after {number!r}): {value!r}")
+    if not math.isfinite(seconds):
+        raise ValueError(f"Duration must be finite: {value!r}")
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value!r}")
+    return seconds
+
+
 def remove_outer_quotes(s: str) -> str:
     # Keep removing a layer of quotes as long as the first and last characters are the same quote type.
     while len(s) > 1 and ((s.startswith('"') and s.endswith('"')) or (s.startswith("'") and s.endswith("'"))):
@@ -151,16 +185,19 @@ def unescape_and_unquote(value: str) -> str:
     return value
 
 
-# Shared state: one bucket per requested RPS value
-_RATE_LIMITER_STATE: dict[float, dict[str, object]] = {}
+# Shared state: one bucket per requested RPS value (and bucket name)
+_RATE_LIMITER_STATE: dict[float | tuple[str, float], dict[str, object]] = {}
 
 
-def rate_limited(max_per_second: float) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+def rate_limited(
+    max_per_second: float, bucket: str | None = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
     Thread-safe decorator that enforces a *global* requests-per-second cap.
 
     Any function wrapped with the same ``max_per_second`` value shares a
-    single token bucket across every thread and module.
+    single token bucket across every thread and module. A ``bucket`` name
+    gives a separate cap, shared only by functions wrapped with that name.
 
     Example
     -------
@@ -172,30 +209,50 @@ def rate_limited(max_per_second: float) -> Callable[[Callable[..., Any]], Callab
         return lambda f: f  # no limit requested
 
     window = 1.0  # sliding window in seconds
-    state = _RATE_LIMITER_STATE.setdefault(max_per_second, {"lock": threading.Lock(), "calls": deque()})
+    state = _RATE_LIMITER_STATE.setdefault(
+        max_per_second if bucket is None else (bucket, max_per_second),
+        {"lock": threading.Lock(), "calls": deque(), "waited": [0.0]},
+    )
     lock = cast("threading.Lock", state["lock"])
     call_times = cast("deque[float]", state["calls"])
+    waited = cast("list[float]", state["waited"])  # total seconds callers were told to sleep
 
     def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
         import functools
 
         @functools.wraps(fn)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            while True:
-                with lock:
-                    now = time.perf_counter()
-                    # Drop timestamps older than the window
-                    while call_times and now - call_times[0] >= window:
-                        call_times.popleft()
-
-                    if len(call_times) < max_per_second:
-                        call_times.append(now)
-                        break
-                    sleep_for = window - (now - call_times[0])
-                if sleep_for > 0:
-                    time.sleep(sleep_for)
+            with stage("rate_limit"):
+                while True:
+                    with lock:
+                        now = time.perf_counter()
+                        # Drop timestamps older than the window
+                        while call_times and now - call_times[0] >= window:
+                            call_times.popleft()
+
+                        if len(call_times) < max_per_second:
+                            call_times.append(now)
+                            break
+                        sleep_for = window - (now - call_times[0])
+                        if sleep_for > 0:
+                            waited[0] += sleep_for
+                    if sleep_for > 0:
+                        time.sleep(sleep_for)
             return fn(*args, **kwargs)
 
         return wrapper
 
     return decorator
+
+
+def reset_rate_limits() -> None:
+    """Forget recent calls for every rate_limited cap, e.g. between independent runs in one process."""
+    for state in _RATE_LIMITER_STATE.values():
+        with cast("threading.Lock", state["lock"]):
+            cast("deque[float]", state["calls"]).clear()
+            cast("list[float]", state["waited"])[0] = 0.0
+
+
+def rate_limit_wait_seconds() -> float:
+    """Total time callers have spent waiting on rate_limited caps (read without taking the bucket locks)."""
+    return sum(cast("list[float]", state["waited"])[0] for state in list(_RATE_LIMITER_STATE.values()))
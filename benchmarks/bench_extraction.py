@@ -0,0 +1,98 @@
+"""
+Per-response CPU time of detector extraction: the previous two model_dump() passes versus the
+single-pass extractor registry (typed model and raw JSON).
+
+    uv run python benchmarks/bench_extraction.py [--responses 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Any
+
+from crowdstrike_aidr.models.ai_guard import GuardChatCompletionsResponse
+from synthetic import synthetic_response
+
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.detector_extraction import DETECTOR_NAME_MAPPING, extract_detectors
+from aidr_aiguard_lab.utils.utils import normalize_topics_and_detectors
+
+VALID_DETECTORS = frozenset(defaults.valid_detectors)
+VALID_TOPICS = frozenset(defaults.valid_topics)
+
+
+def legacy_extract(response: GuardChatCompletionsResponse) -> tuple[dict[str, list[str]], list[str]]:
+    """The previous implementation: model_dump() twice, if/elif per detector, then re-normalize."""
+    details: dict[str, list[str]] = defaultdict(list)
+    api_response = response.model_dump()
+    for detector, d in api_response["result"]["detectors"].items():
+        if d is not None and d.get("detected", False):
+            if detector == "malicious_entity":
+                for entity in d["data"].get("entities", []):
+                    details[detector].append(f"{entity['type']}: {entity['value']}")
+            elif detector == "topic":
+                details[detector].extend(t["topic"] for t in d["data"].get("topics", []) if t.get("topic"))
+            elif detector in ("language", "code"):
+                if d["data"].get("language"):
+                    details[detector].append(d["data"]["language"])
+            else:
+                details[detector].append(str(d["data"]))
+
+    assert response.result is not None and response.result.detectors is not None
+    labels: list[str] = []
+    for detector, d in response.result.detectors.model_dump().items():
+        if d is not None and d.get("detected", False):
+            if detector == "topic":
+                for topic in d.get("data", {}).get("topics", []):
+                    name = topic.get("topic")
+                    if name in VALID_TOPICS and f"{defaults.topic_prefix}{name}" not in labels:
+                        labels.append(f"{defaults.topic_prefix}{name}")
+            else:
+                labels.append(DETECTOR_NAME_MAPPING.get(detector, detector))
+    labels, _ = normalize_topics_and_detectors(labels, defaults.valid_detectors, defaults.valid_topics)
+    return details, labels
+
+
+def timed(label: str, fn: Any, items: list[Any]) -> float:
+    start = time.process_time()
+    for item in items:
+        fn(item)
+    per_response = (time.process_time() - start) / len(items)
+    print(f"{label:<28} {per_response * 1e6:8.1f} us/response")
+    return per_response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    raw = [synthetic_response(rng) for _ in range(args.responses)]
+    typed = [GuardChatCompletionsResponse.model_validate(r) for r in raw]
+
+    # Same labels either way
+    for response in typed[:1000]:
+        assert response.result is not None
+        assert legacy_extract(response)[1] == extract_detectors(response.result.detectors).labels
+
+    before = timed("legacy (2x model_dump)", legacy_extract, typed)
+    after = timed(
+        "registry (typed model)",
+        lambda r: extract_detectors(r.result.detectors, VALID_DETECTORS, VALID_TOPICS),
+        typed,
+    )
+    timed(
+        "registry (raw JSON)",
+        lambda r: extract_detectors(r["result"]["detectors"], VALID_DETECTORS, VALID_TOPICS),
+        raw,
+    )
+    print(f"speedup (typed): {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+CLI startup budget: cumulative `-X importtime` of the entry module, best of several runs.
+Exits non-zero if the budget is exceeded or a deferred dependency is imported at startup.
+
+    uv run python benchmarks/bench_import.py [--budget-ms 150] [--runs 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+ENTRY_MODULE = "aidr_aiguard_lab.aiguard_lab"
+
+# Only needed once a run actually starts; importing them for --help is a regression.
+DEFERRED_MODULES = ("crowdstrike_aidr", "pydantic", "pydantic_core", "dotenv", "tzlocal", "httpx")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per top-level module name, from a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times(ENTRY_MODULE) for _ in range(args.runs)]
+    best_ms = min(times[ENTRY_MODULE] for times in runs) / 1000
+    print(f"import {ENTRY_MODULE}: {best_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    eager = sorted(name for name in DEFERRED_MODULES if name in runs[0])
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        others = (item for item in runs[0].items() if item[0] != ENTRY_MODULE)
+        slowest = sorted(others, key=lambda item: item[1], reverse=True)[:10]
+        print(f"FAIL: over budget by {best_ms - args.budget_ms:.1f} ms. Slowest imports:")
+        for name, us in slowest:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Per-response CPU time of decoding a guard_chat_completions response body and extracting the
+detectors: full pydantic validation versus the --fast-parse raw JSON view.
+
+    uv run python benchmarks/bench_parse.py [--responses 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from bench_extraction import VALID_DETECTORS, VALID_TOPICS
+from crowdstrike_aidr.models.ai_guard import GuardChatCompletionsResponse
+from synthetic import synthetic_response
+
+from aidr_aiguard_lab.api.pangea_api import FastGuardResponse, parse_guard_response
+from aidr_aiguard_lab.manager.detector_extraction import extract_detectors
+
+
+def full_model(body: bytes) -> list[str]:
+    response = GuardChatCompletionsResponse.model_validate(json.loads(body))
+    assert response.result is not None
+    return extract_detectors(response.result.detectors, VALID_DETECTORS, VALID_TOPICS).labels
+
+
+def fast_view(body: bytes) -> list[str]:
+    response = parse_guard_response(json.loads(body))
+    assert isinstance(response, FastGuardResponse) and response.result is not None
+    return extract_detectors(response.result.detectors, VALID_DETECTORS, VALID_TOPICS).labels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bodies = [json.dumps(synthetic_response(rng)).encode() for _ in range(args.responses)]
+    assert all(full_model(b) == fast_view(b) for b in bodies[:1000])
+
+    results = {}
+    for label, fn in (("full model", full_model), ("fast view", fast_view)):
+        start = time.process_time()
+        for body in bodies:
+            fn(body)
+        results[label] = (time.process_time() - start) / len(bodies)
+        print(f"{label:<12} {results[label] * 1e6:8.1f} us/response")
+    print(f"speedup: {results['full model'] / results['fast view']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
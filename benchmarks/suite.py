@@ -0,0 +1,288 @@
+"""
+Offline benchmark suite for the lab's hot paths on synthetic datasets.
+
+Each stage is timed separately (wall and CPU seconds, microseconds per case, peak RSS):
+
+    load       AIGuardTests.load_from_file: JSONL parsing and TestCase hydration
+    normalize  normalize_topics_and_detectors over every case's labels
+    extract    extract_detectors over raw response JSON
+    update     EfficacyTracker.update for every case (with FP/FN CSV streaming)
+    metrics    EfficacyTracker.calculate_metrics
+    report     EfficacyTracker.print_stats to a summary file, closing the CSV writers
+    e2e        the full run (process_all_prompts) against an in-process fake HTTP transport,
+               with the rate limiter disabled so only the lab's own overhead is measured
+
+Results are written as JSON; pass --baseline to compare against an earlier results file.
+
+    uv run python benchmarks/suite.py --sizes 10000,100000,1000000 --out bench.json
+    uv run python benchmarks/suite.py --sizes 10000 --stages load,update --baseline bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from crowdstrike_aidr import AIGuard
+from synthetic import response_for, synthetic_response, write_dataset
+
+import aidr_aiguard_lab.manager.aiguard_manager as aiguard_manager
+from aidr_aiguard_lab._types import AppArgs
+from aidr_aiguard_lab.api import pangea_api
+from aidr_aiguard_lab.config.settings import Settings
+from aidr_aiguard_lab.defaults import defaults
+from aidr_aiguard_lab.manager.aiguard_manager import AIGuardManager, AIGuardTests
+from aidr_aiguard_lab.manager.detector_extraction import extract_detectors
+from aidr_aiguard_lab.manager.efficacy_tracker import EfficacyTracker
+from aidr_aiguard_lab.utils.utils import normalize_topics_and_detectors
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, MutableSequence
+
+    from aidr_aiguard_lab.testcase.testcase import TestCase
+
+STAGES = ("load", "normalize", "extract", "update", "metrics", "report", "e2e")
+# Detectors enabled for every stage: the synthetic labels and responses use these.
+DETECTORS = ",".join(
+    ["malicious-prompt", "malicious-entity", "confidential-and-pii-entity"]
+    + [f"topic:{topic}" for topic in defaults.valid_topics]
+)
+# Stage -> the stages whose output it consumes
+NEEDS: dict[str, tuple[str, ...]] = {
+    "normalize": ("load",),
+    "extract": ("load",),
+    "update": ("normalize", "extract"),
+    "metrics": ("update",),
+    "report": ("metrics",),
+}
+E2E_WORKERS = 16
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _fake_client() -> AIGuard:
+    """AIGuard client whose HTTP transport answers in-process with deterministic synthetic responses."""
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        return httpx.Response(200, json=response_for(body.get("guard_input", {})))
+
+    http_client = httpx.Client(transport=httpx.MockTransport(handle))
+    return AIGuard(base_url_template="https://{SERVICE_NAME}.bench.invalid", token="bench", http_client=http_client)
+
+
+def _no_rate_limit(
+    max_per_second: float, bucket: str | None = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Stand-in for utils.rate_limited that leaves the function unthrottled."""
+    return lambda fn: fn
+
+
+class Suite:
+    def __init__(self, size: int, workdir: Path, seed: int) -> None:
+        self.size = size
+        self.workdir = workdir
+        self.seed = seed
+        self.dataset = workdir / f"cases-{size}.jsonl"
+        self.results: list[dict[str, Any]] = []
+        # Outputs of earlier stages that later stages consume
+        self.tests: MutableSequence[TestCase] = []
+        self.expected: list[list[str]] = []
+        self.responses: list[dict[str, Any]] = []
+        self.detected: list[list[str]] = []
+        self.tracker: EfficacyTracker | None = None
+
+    def args(self, name: str, **kwargs: Any) -> AppArgs:
+        return AppArgs(
+            input_file=str(self.dataset),
+            detectors=DETECTORS,
+            summary_report_file=str(self.workdir / f"{name}-{self.size}.summary.txt"),
+            fps_out_csv=str(self.workdir / f"{name}-{self.size}.fps.csv"),
+            fns_out_csv=str(self.workdir / f"{name}-{self.size}.fns.csv"),
+            **kwargs,
+        )
+
+    def timed(self, stage: str) -> None:
+        """
+        Run stage_<stage> (which returns the number of cases it handled) with stdout silenced and
+        record its timings. An optional setup_<stage> runs first, outside the timed region.
+        """
+        setup: Callable[[], None] | None = getattr(self, f"setup_{stage}", None)
+        fn: Callable[[], int] = getattr(self, f"stage_{stage}")
+        with Path(os.devnull).open("w") as devnull, contextlib.redirect_stdout(devnull):
+            if setup:
+                setup()
+            wall, cpu = time.perf_counter(), time.process_time()
+            cases = fn()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        result = {
+            "size": self.size,
+            "stage": stage,
+            "cases": cases,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "us_per_case": round(wall / cases * 1e6, 2) if cases else None,
+            "max_rss_mb": round(_max_rss_mb(), 1),
+        }
+        self.results.append(result)
+        print(
+            f"{self.size:>9} {stage:<10} {result['wall_s']:>9.3f}s wall {result['cpu_s']:>9.3f}s cpu "
+            f"{result['us_per_case'] or 0:>10.2f} us/case {result['max_rss_mb']:>8.1f} MB"
+        )
+
+    def stage_load(self) -> int:
+        args = self.args("load")
+        aig = AIGuardManager(args)
+        tests = AIGuardTests(Settings(), aig, args)
+        tests.load_from_file(str(self.dataset))
+        aig.close_outputs()
+        self.tests = tests.tests
+        return len(self.tests)
+
+    def stage_normalize(self) -> int:
+        self.expected = []
+        for test in self.tests:
+            normalized, _invalid = normalize_topics_and_detectors(
+                test.label, defaults.valid_detectors, defaults.valid_topics
+            )
+            self.expected.append(normalized)
+        return len(self.tests)
+
+    def setup_extract(self) -> None:
+        rng = random.Random(self.seed)
+        self.responses = [synthetic_response(rng) for _ in self.tests]
+
+    def stage_extract(self) -> int:
+        self.detected = [extract_detectors(r["result"]["detectors"]).labels for r in self.responses]
+        return len(self.responses)
+
+    def stage_update(self) -> int:
+        self.tracker = EfficacyTracker(args=self.args("update"))
+        for test, expected, detected in zip(self.tests, self.expected, self.detected, strict=True):
+            self.tracker.update(test, expected_labels=expected, detected_detectors_labels=detected)
+            self.tracker.total_calls += 1
+        return len(self.tests)
+
+    def stage_metrics(self) -> int:
+        assert self.tracker is not None
+        self.tracker.calculate_metrics()
+        return self.tracker.total_calls
+
+    def stage_report(self) -> int:
+        assert self.tracker is not None
+        self.tracker.close_writers()
+        self.tracker.print_stats(enabled_detectors=DETECTORS.split(","))
+        return self.tracker.total_calls
+
+    def stage_e2e(self) -> int:
+        args = self.args("e2e", rps=E2E_WORKERS)
+        saved = pangea_api._ai_guard_client, aiguard_manager.rate_limited
+        client = _fake_client()
+        pangea_api._ai_guard_client = lambda: client
+        aiguard_manager.rate_limited = _no_rate_limit
+        try:
+            aig = AIGuardManager(args)
+            tests = AIGuardTests(Settings(), aig, args)
+            tests.process_all_prompts(args, aig)
+        finally:
+            pangea_api._ai_guard_client, aiguard_manager.rate_limited = saved
+        return aig.efficacy.total_calls
+
+    def run(self, stages: list[str]) -> list[dict[str, Any]]:
+        write_dataset(self.dataset, self.size, self.seed)
+        # Stages run in STAGES order; a requested stage also runs the stages it depends on,
+        # but only the requested ones are reported.
+        selected: set[str] = set()
+        todo = list(stages)
+        while todo:
+            stage = todo.pop()
+            if stage not in selected:
+                selected.add(stage)
+                todo.extend(NEEDS.get(stage, ()))
+        for stage in STAGES:
+            if stage in selected:
+                self.timed(stage)
+        return [r for r in self.results if r["stage"] in stages]
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str, tolerance: float) -> bool:
+    """Print per-stage ratios against a baseline results file; True if nothing regressed beyond tolerance."""
+    baseline = {(r["size"], r["stage"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    ok = True
+    print(f"\nvs {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        base = baseline.get((result["size"], result["stage"]))
+        if not base or not base.get("us_per_case") or not result["us_per_case"]:
+            continue
+        ratio = result["us_per_case"] / base["us_per_case"]
+        regressed = ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(f"{result['size']:>9} {result['stage']:<10} {ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000", help="comma separated case counts")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated stages to report")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="aiguard-lab-bench-") as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            results.extend(Suite(size, Path(workdir), args.seed).run(stages))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nResults written to {args.out}")
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Deterministic synthetic test cases and AI Guard responses for the benchmarks.
+
+Cases mix plain labels, label synonyms, topic:<name> and not-topic:<name> labels, expected_detectors
+blocks, benign cases and long multi-turn conversations. Responses are derived from a hash of the
+request content, so the same case always gets the same detections.
+
+    uv run python benchmarks/synthetic.py --cases 100000 --out /tmp/synthetic.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aidr_aiguard_lab.defaults import defaults
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+TOPICS = defaults.valid_topics
+WORDS = [
+    "please",
+    "ignore",
+    "previous",
+    "instructions",
+    "and",
+    "reveal",
+    "the",
+    "system",
+    "prompt",
+    "tell",
+    "me",
+    "about",
+    "savings",
+    "plans",
+    "weather",
+    "forecast",
+    "recipe",
+    "invoice",
+    "customer",
+    "account",
+    "password",
+    "reset",
+    "schedule",
+    "meeting",
+    "summary",
+    "translate",
+    "this",
+    "paragraph",
+    "into",
+    "french",
+    "write",
+    "a",
+    "poem",
+    "about",
+    "the",
+    "sea",
+    "debug",
+    "my",
+    "python",
+    "function",
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _messages(rng: random.Random) -> list[dict[str, str]]:
+    if rng.random() < 0.1:
+        # Long multi-turn conversation with a system prompt
+        turns = rng.randint(6, 20)
+        messages = [{"role": "system", "content": _text(rng, 40)}]
+        for turn in range(turns):
+            messages.append({"role": "user" if turn % 2 == 0 else "assistant", "content": _text(rng, 150)})
+        return messages
+    return [{"role": "user", "content": _text(rng, rng.randint(5, 60))}]
+
+
+def synthetic_case(rng: random.Random) -> dict[str, Any]:
+    """One .jsonl test case record."""
+    case: dict[str, Any] = {"messages": _messages(rng)}
+    kind = rng.random()
+    if kind < 0.3:
+        case["label"] = [rng.choice(("malicious-prompt", "malicious", "injection", "jailbreak"))]
+    elif kind < 0.5:
+        case["label"] = ["benign"]
+    elif kind < 0.7:
+        case["label"] = [f"topic:{t}" for t in rng.sample(TOPICS, rng.randint(1, 2))]
+    elif kind < 0.8:
+        case["label"] = [f"not-topic:{rng.choice(TOPICS)}"]
+    elif kind < 0.9:
+        case["label"] = {"kind": "topic", "tag": rng.choice(TOPICS)}
+    else:
+        case["label"] = []
+        case["expected_detectors"] = {
+            "prompt_injection": {
+                "detected": True,
+                "data": {"action": "reported", "analyzer_responses": [{"analyzer": "PA4002", "confidence": 1.0}]},
+            },
+            "topic": {
+                "detected": True,
+                "data": {"topics": [{"topic": rng.choice(TOPICS), "confidence": 1.0}]},
+            },
+        }
+    return case
+
+
+def iter_cases(count: int, seed: int = 1) -> Iterator[dict[str, Any]]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield synthetic_case(rng)
+
+
+def write_dataset(path: str | Path, count: int, seed: int = 1) -> Path:
+    """Write count cases as JSON Lines, streaming so 1M-case files don't need to fit in memory."""
+    path = Path(path)
+    with path.open(mode="w", encoding="utf-8") as f:
+        for case in iter_cases(count, seed):
+            f.write(json.dumps(case) + "\n")
+    return path
+
+
+def synthetic_response(rng: random.Random) -> dict[str, Any]:
+    """A guard_chat_completions response body with a random mix of detections."""
+    topics = [{"topic": t, "confidence": round(rng.random(), 3)} for t in rng.sample(TOPICS, rng.randint(0, 3))]
+    mp = rng.random() < 0.4
+    return {
+        "request_id": f"prq_{rng.getrandbits(48):012x}",
+        "request_time": "2025-01-01T00:00:00Z",
+        "response_time": "2025-01-01T00:00:00.050000Z",
+        "status": "Success",
+        "summary": "ok",
+        "result": {
+            "blocked": mp,
+            "guard_output": {},
+            "detectors": {
+                "malicious_prompt": {
+                    "detected": mp,
+                    "data": {"action": "blocked", "analyzer_responses": [{"analyzer": "PA4002", "confidence": 0.97}]},
+                },
+                "topic": {"detected": bool(topics), "data": {"action": "reported", "topics": topics}},
+                "malicious_entity": {
+                    "detected": rng.random() < 0.1,
+                    "data": {"entities": [{"type": "URL", "value": "evil.example"}]},
+                },
+                "confidential_and_pii_entity": {
+                    "detected": rng.random() < 0.1,
+                    "data": {"entities": [{"type": "EMAIL_ADDRESS", "value": "a@b.c", "action": "redacted"}]},
+                },
+                "language": {
+                    "detected": rng.random() < 0.2,
+                    "data": {"languages": [{"language": "fr", "confidence": 0.8}]},
+                },
+            },
+        },
+    }
+
+
+def response_for(guard_input: Mapping[str, Any]) -> dict[str, Any]:
+    """Deterministic response for a request, seeded from a hash of its messages."""
+    digest = hashlib.sha256(json.dumps(guard_input.get("messages", []), sort_keys=True).encode()).digest()
+    return synthetic_response(random.Random(digest))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    write_dataset(args.out, args.cases, args.seed)
+    print(f"Wrote {args.cases} cases to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
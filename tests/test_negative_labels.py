@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import unittest
+
+from aidr_aiguard_lab.manager.efficacy_tracker import EfficacyTracker
+from aidr_aiguard_lab.testcase.testcase import TestCase as LabTestCase
+
+
+def _score(label: list[str], detected: list[str], negative_labels: list[str] | None) -> EfficacyTracker:
+    """Score one test case with the given --negative-labels patterns (None: the default not-topic:*)."""
+    tracker = EfficacyTracker()
+    test = LabTestCase(messages=[{"role": "user", "content": "hello"}], label=label)
+    test.index = 1
+    tracker.update(test, expected_labels=label, detected_detectors_labels=detected, negative_labels=negative_labels)
+    return tracker
+
+
+class NegativeLabelsTest(unittest.TestCase):
+    def test_default_pattern_counts_every_not_topic_label(self) -> None:
+        fired = _score(["not-topic:toxicity"], ["topic:toxicity"], None)
+        self.assertEqual((fired.fp_count, fired.tn_count), (1, 0))
+        silent = _score(["not-topic:toxicity"], [], None)
+        self.assertEqual((silent.fp_count, silent.tn_count), (0, 1))
+        self.assertEqual(silent.per_detector_tn["toxicity"], 1)
+
+    def test_unmatched_not_topic_label_expects_nothing(self) -> None:
+        # An unexpected detection is still an FP, but the silent topic detector is no longer a TN:
+        # the case expects nothing, so it counts as a benign TN for malicious-prompt instead
+        fired = _score(["not-topic:toxicity"], ["topic:toxicity"], ["not-topic:legal-advice"])
+        self.assertEqual((fired.fp_count, fired.tn_count), (1, 0))
+        silent = _score(["not-topic:toxicity"], [], ["not-topic:legal-advice"])
+        self.assertEqual((silent.fp_count, silent.tn_count), (0, 1))
+        self.assertEqual(silent.per_detector_tn["toxicity"], 0)
+        self.assertEqual(silent.per_detector_tn["malicious-prompt"], 1)
+
+    def test_patterns_select_the_negative_labels(self) -> None:
+        label = ["not-topic:toxicity", "not-topic:legal-advice"]
+        for patterns, tns in (
+            (["not-topic:*"], {"toxicity", "legal-advice"}),
+            (["not-topic:legal-*"], {"legal-advice"}),
+            (["not-topic:toxicity", "not-topic:legal-advice"], {"toxicity", "legal-advice"}),
+            (["not-topic:self-harm"], set()),
+        ):
+            with self.subTest(patterns=patterns):
+                tracker = _score(label, [], patterns)
+                self.assertEqual(
+                    {topic for topic in ("toxicity", "legal-advice") if tracker.per_detector_tn[topic]}, tns
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()